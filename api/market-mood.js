@@ -1,9 +1,24 @@
 // Market Mood API - Calculates 9-box positioning from CoinGecko data
 // Uses stored historical data for real trails
+// Serves the precomputed response from capture_mood.py (data/mood-current.json)
+// while it is recent, calling CoinGecko only when captures have stopped
 
 import { readFileSync } from 'fs';
 import { join } from 'path';
 
+// Oldest capture served as-is (captures run hourly, or every few minutes with --watch)
+const CURRENT_MAX_AGE_MS = 2 * 60 * 60 * 1000;
+
+function readCurrentMood() {
+    try {
+        const current = JSON.parse(readFileSync(join(process.cwd(), 'data', 'mood-current.json'), 'utf8'));
+        const age = Date.now() - Date.parse(current.lastUpdated);
+        return age >= 0 && age < CURRENT_MAX_AGE_MS ? current : null;
+    } catch (e) {
+        return null;
+    }
+}
+
 export default async function handler(req, res) {
     // Set CORS headers
     res.setHeader('Access-Control-Allow-Origin', '*');
@@ -14,6 +29,11 @@ export default async function handler(req, res) {
         return res.status(200).end();
     }
     
+    const current = readCurrentMood();
+    if (current) {
+        return res.status(200).json(current);
+    }
+    
     try {
         // Fetch current global market data
         const globalRes = await fetch('https://api.coingecko.com/api/v3/global');
@@ -70,8 +90,14 @@ export default async function handler(req, res) {
             mvRatio7d = trail7d.reduce((sum, p) => sum + p.mv, 0) / trail7d.length;
         }
         
-        // Calculate average breadth from 24h trail
-        const breadthAvg24h = trail24h.reduce((sum, p) => sum + p.breadth, 0) / trail24h.length;
+        // Intraday trail and rolling aggregates from continuous capture (capture_mood.py --watch)
+        const trailIntraday = Array.isArray(history.intraday)
+            ? history.intraday.map(p => ({ breadth: p.breadth, mv: p.mv }))
+            : [];
+        const aggregates = history.aggregates || null;
+        
+        // Calculate average breadth from 24h trail (rolling mean of the intraday samples when available)
+        const breadthAvg24h = aggregates?.breadth?.mean ?? trail24h.reduce((sum, p) => sum + p.breadth, 0) / trail24h.length;
         
         // M/V range for visualization
         const mvRange = { low: 10, high: 45 };
@@ -85,10 +111,13 @@ export default async function handler(req, res) {
             mvRatio7d: Math.round(mvRatio7d * 10) / 10,
             trail: trail24h,      // 24H trail for daily view
             trail7d: trail7d,     // 7-day trail for weekend view
+            trailIntraday,        // every-N-minutes samples, empty without continuous capture
+            aggregates,           // rolling mean/min/max/EMA of breadth and M/V, or null
             mvRange,
             dataPoints: {
                 hourly: trail24h.length,
-                daily: trail7d.length
+                daily: trail7d.length,
+                intraday: trailIntraday.length
             },
             raw: {
                 totalMarketCap,
@@ -767,8 +767,8 @@ function renderMarketMood(data) {
     // Use average breadth if available, otherwise fall back to current
     const avgBreadth = breadthAvg24h !== undefined ? breadthAvg24h : breadth;
     
-    // Calculate zone based on current position (teal dot)
-    const zone = getMarketZone(breadth, mvRatio24h, mvRange);
+    // Captured data carries its zone (mood_zones); the live API fallback does not
+    const zone = data.zone || getMarketZone(breadth, mvRatio24h, mvRange);
     
     // Update title and description
     setText('mood-title', MOOD_ZONES[zone]?.label || 'Market Mood');
@@ -871,9 +871,9 @@ function getMarketZone(breadth, mv, mvRange) {
     
     const col = breadth < 33 ? 0 : breadth < 66 ? 1 : 2;
     
-    // M/V thresholds (lower M/V = more frenzied)
-    const mvNormalized = (mv - mvRange.low) / (mvRange.high - mvRange.low);
-    const row = mvNormalized < 0.33 ? 0 : mvNormalized < 0.66 ? 1 : 2;
+    // Activity axis as in scripts/mood_zones.py (lower M/V = more frenzied)
+    const activity = Math.max(0, Math.min(100, (mvRange.high - mv) / (mvRange.high - mvRange.low) * 100));
+    const row = activity >= 66 ? 0 : activity >= 33 ? 1 : 2;
     
     const zones = [
         ['concentration', 'leadership', 'strong-rally'],
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Streaming Messages API client - The Litmus
+Consumes the Anthropic SSE stream and tracks the JSON structure as it arrives.
+
+The generators ask Claude for one large JSON object. Streaming lets us:
+- record when each top-level key / brief section finished arriving
+- abort as soon as the output is structurally broken (prose instead of
+  JSON, mismatched brackets) so the caller's retry starts immediately
+  instead of after a full 4-8k token generation
+
+The returned text is parsed by the caller exactly as a blocking response would be.
+"""
+
+import json
+import time
+
+import http_client
+
+ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Give up if this much text arrives before the opening brace
+MAX_PREAMBLE_CHARS = 400
+MAX_DEPTH = 32
+
+# Mid-stream error events that a fresh request can get past
+RETRYABLE_STREAM_ERRORS = {"overloaded_error", "api_error", "rate_limit_error"}
+
+
+class StreamAborted(ValueError):
+    """Raised when the streamed output is structurally unusable"""
+
+
+class StreamCancelled(Exception):
+    """Raised when the caller's cancel event is set (a hedged request lost the race)"""
+
+
+class SectionTracker:
+    """Incremental scanner over streamed JSON text
+
+    Tracks string/escape state and the bracket stack one character at a time
+    (O(1) per character) and records when each section completes:
+    top-level keys, plus the children of a top-level "sections" object.
+
+    Quote handling mirrors the repair logic in the parsers: a quote inside a
+    string only closes it when the next non-space character is one of
+    : , } ] or a newline; otherwise it is treated as an unescaped inner quote.
+    """
+
+    CLOSE_CHARS = ':,}]\n'
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.stack = []           # frames: {"type": "{"|"[", "key": str|None, "expect_key": bool}
+        self.started = False
+        self.finished = False
+        self.preamble = 0
+        self.in_string = False
+        self.escape = False
+        self.pending_close = False
+        self.key_chars = None     # list while capturing an object key
+        self.sections = {}        # "sections.the_lead" -> seconds since start
+        self.order = []
+
+    def feed(self, text: str):
+        for char in text:
+            self._feed_char(char)
+
+    def _abort(self, reason: str):
+        raise StreamAborted(f"Malformed JSON stream: {reason}")
+
+    def _feed_char(self, char: str):
+        if self.finished:
+            return
+
+        if self.in_string:
+            if self.pending_close:
+                if char in ' \t\r':
+                    return
+                self.pending_close = False
+                if char in self.CLOSE_CHARS:
+                    self._close_string()
+                    if char != '\n':
+                        self._structural(char)
+                    return
+                # Unescaped quote inside the string - keep going
+                if self.key_chars is not None:
+                    self.key_chars.append('"')
+            if self.escape:
+                self.escape = False
+            elif char == '\\':
+                self.escape = True
+                return
+            elif char == '"':
+                self.pending_close = True
+                return
+            if self.key_chars is not None:
+                self.key_chars.append(char)
+            return
+
+        self._structural(char)
+
+    def _close_string(self):
+        self.in_string = False
+        if self.key_chars is not None:
+            self.stack[-1]["key"] = "".join(self.key_chars)
+            self.key_chars = None
+
+    def _complete_value(self):
+        """Called on , or } inside an object: the current key's value is done"""
+        frame = self.stack[-1]
+        key = frame["key"]
+        if key is None:
+            return
+        depth = len(self.stack)
+        if depth == 1:
+            path = key
+        elif depth == 2 and self.stack[0]["key"] == "sections":
+            path = f"sections.{key}"
+        else:
+            path = None
+        if path and path not in self.sections:
+            self.sections[path] = round(time.monotonic() - self.started_at, 2)
+            self.order.append(path)
+        frame["key"] = None
+
+    def _structural(self, char: str):
+        if char in ' \t\r\n':
+            return
+
+        if not self.started:
+            if char == '{':
+                self.started = True
+                self.stack.append({"type": "{", "key": None, "expect_key": True})
+                return
+            self.preamble += 1
+            if self.preamble > MAX_PREAMBLE_CHARS:
+                self._abort(f"no JSON object in first {MAX_PREAMBLE_CHARS} characters")
+            return
+
+        frame = self.stack[-1]
+
+        if char in '{[':
+            if len(self.stack) >= MAX_DEPTH:
+                self._abort("nesting too deep")
+            self.stack.append({"type": char, "key": None, "expect_key": char == '{'})
+        elif char == '}':
+            if frame["type"] != '{':
+                self._abort("'}' closes an array")
+            self._complete_value()
+            self.stack.pop()
+        elif char == ']':
+            if frame["type"] != '[':
+                self._abort("']' closes an object")
+            self.stack.pop()
+        elif char == ',':
+            if frame["type"] == '{':
+                self._complete_value()
+                frame["expect_key"] = True
+        elif char == ':':
+            if frame["type"] == '{':
+                frame["expect_key"] = False
+        elif char == '"':
+            self.in_string = True
+            if frame["type"] == '{' and frame["expect_key"]:
+                self.key_chars = []
+
+        if self.started and not self.stack:
+            self.finished = True
+
+
+def build_headers(api_key: str) -> dict:
+    return {
+        "Content-Type": "application/json",
+        "x-api-key": api_key,
+        "anthropic-version": ANTHROPIC_VERSION
+    }
+
+
+def stream_message(payload: dict, api_key: str, timeout: int = 120, cancel=None) -> dict:
+    """POST a Messages API request with stream=true and consume the SSE events
+
+    Returns {"text", "sections", "first_section", "stop_reason", "usage", "seconds"}.
+    Raises StreamAborted as soon as the output is structurally unusable, and
+    StreamCancelled once the optional cancel (a hedging.Cancel) is set;
+    either way the connection is closed on the way out, which stops the
+    generation. Setting cancel shuts the socket down straight away, so a
+    stalled stream does not hold the thread until the read timeout.
+    """
+    tracker = SectionTracker()
+    chunks = []
+    usage = {}
+    stop_reason = None
+
+    resp = http_client.post(ANTHROPIC_API_URL, json_body={**payload, "stream": True},
+                            headers=build_headers(api_key), timeout=timeout, stream=True)
+    with resp:
+        resp.raise_for_status()
+        if cancel is not None:
+            cancel.add_callback(resp.abort)
+        try:
+            for line in resp.iter_lines():
+                if cancel is not None and cancel.is_set():
+                    raise StreamCancelled("Request cancelled")
+                if not line.startswith("data:"):
+                    continue
+
+                event = json.loads(line[5:].strip())
+                event_type = event.get("type")
+
+                if event_type == "content_block_delta":
+                    delta = event.get("delta", {})
+                    if delta.get("type") == "text_delta":
+                        text = delta.get("text", "")
+                        chunks.append(text)
+                        seen = len(tracker.order)
+                        tracker.feed(text)
+                        if seen == 0 and tracker.order:
+                            print(f"  First section after {tracker.sections[tracker.order[0]]}s")
+                elif event_type == "message_start":
+                    usage.update(event.get("message", {}).get("usage", {}))
+                elif event_type == "message_delta":
+                    stop_reason = event.get("delta", {}).get("stop_reason", stop_reason)
+                    usage.update(event.get("usage", {}))
+                elif event_type == "error":
+                    error = event.get("error", {})
+                    message = f"Anthropic stream error: {error.get('type')} - {error.get('message')}"
+                    if error.get("type") in RETRYABLE_STREAM_ERRORS:
+                        raise ConnectionError(message)
+                    raise RuntimeError(message)
+                # message_stop: keep reading to EOF so the connection can go back to the pool
+        except (OSError, ValueError) as e:
+            # The socket was shut down under the read
+            if cancel is not None and cancel.is_set():
+                raise StreamCancelled("Request cancelled") from e
+            raise
+        if cancel is not None and cancel.is_set():
+            raise StreamCancelled("Request cancelled")
+
+    first = tracker.order[0] if tracker.order else None
+    return {
+        "text": "".join(chunks),
+        "sections": dict(tracker.sections),
+        "first_section": tracker.sections.get(first) if first else None,
+        "stop_reason": stop_reason,
+        "usage": usage,
+        "seconds": round(time.monotonic() - tracker.started_at, 2)
+    }
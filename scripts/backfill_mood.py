@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Mood history backfill - The Litmus
+Reconstructs breadth and M/V history for a date range from CoinGecko
+/coins/{id}/market_chart/range series and writes it into the mood store.
+
+    python scripts/backfill_mood.py --from 2025-06-01 --to 2025-09-01 [--coins 100]
+                                    [--resolution hourly|daily] [--workers 4] [--dry-run]
+
+The universe is today's top --coins by market cap (from the market
+snapshot), so coins that dropped out of the top since are missing
+(survivorship bias). For every coin the range is split into chunks aligned
+to fixed 90-day (hourly) or 365-day (daily) windows - CoinGecko returns
+hourly points for ranges up to 90 days, daily beyond. Chunks are fetched
+concurrently under market_snapshot's rate limiter and cached as raw series
+under .cache/backfill/, so an interrupted or widened backfill only fetches
+what it does not have yet. A chunk fetched before its window ended is
+reused while it covers the requested range, refetched otherwise.
+
+Every series is forward-filled onto one UTC grid, giving a coins x
+timestamps matrix of prices, market caps and volumes. One vectorized pass
+then computes, per timestamp:
+- breadth: % of coins with a price above the price 24h earlier, over the
+  coins with data at both points - the top 100 for the headline (as
+  capture_mood), and per market-cap tier
+- M/V: summed market cap over summed volume of the universe (the live
+  capture uses CoinGecko's global totals, which are not available as
+  history on the public API)
+
+Points are written with source "backfill" and without market_cap/volume
+(universe sums are not comparable with the global totals). Buckets of the
+chosen resolution (hours, or days for --resolution daily) that already
+hold a point are left alone, so a backfill only fills gaps. The universe
+M/V is always kept as mv_universe, and as mv only on days without live
+captures, so it never mixes into a day's rollup with the global M/V. The
+trail file is re-exported afterwards.
+
+Requires NumPy.
+
+Configuration:
+- BACKFILL_CACHE_DIR: raw series cache (default .cache/backfill)
+- COINGECKO_RATE_PER_MIN: request rate (see market_snapshot)
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+import capture_mood
+import content_writer
+import http_client
+import market_snapshot
+import mood_store
+import retry
+import tracing
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = Path(os.environ.get("BACKFILL_CACHE_DIR", SCRIPT_DIR.parent / ".cache" / "backfill"))
+
+COINGECKO_RANGE = "https://api.coingecko.com/api/v3/coins/{coin}/market_chart/range?vs_currency=usd&from={start}&to={end}"
+
+RESOLUTIONS = {
+    # grid step, chunk length (CoinGecko granularity is picked by range length)
+    "hourly": (3600, 90 * 86400),
+    "daily": (86400, 365 * 86400),
+}
+BUCKET_KEY = {"hourly": 13, "daily": 10}  # Timestamp prefix identifying a resolution's bucket
+MAX_FILL_STEPS = 3  # Forward-fill a series over at most this many missing grid steps
+COMPLETE_AFTER = 3600  # A chunk ending at least this long before it was fetched is final
+DAY = 86400
+
+
+# ============================================================================
+# FETCH AND CACHE
+# ============================================================================
+
+def chunk_ranges(start: int, end: int, chunk: int) -> list:
+    """[(chunk_start, chunk_end)] aligned to multiples of chunk, covering start..end"""
+    first = start // chunk * chunk
+    return [(s, s + chunk) for s in range(first, end, chunk)]
+
+
+def chunk_path(coin: str, resolution: str, chunk: tuple) -> Path:
+    return CACHE_DIR / "market_chart" / coin / f"{resolution}-{chunk[0]}-{chunk[1]}.json"
+
+
+def load_chunk(path: Path, needed_to: int):
+    """Cached series if final or reaching needed_to, else None"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached if cached.get("complete") or cached.get("to", 0) >= needed_to else None
+
+
+def fetch_chunk(coin: str, resolution: str, chunk: tuple, parent) -> dict:
+    """market_chart/range for one coin and chunk, clipped to now, cached on disk"""
+    now = int(time.time())
+    end = min(chunk[1], now)
+    url = COINGECKO_RANGE.format(coin=quote(coin, safe=""), start=chunk[0], end=end)
+    with tracing.adopt(parent), tracing.span("coingecko_request", endpoint="market_chart", coin=coin) as span:
+        policy = retry.RetryPolicy(f"CoinGecko {coin}", max_attempts=4, base_delay=5, max_delay=60, budget=300)
+
+        def attempt(_):
+            waited = market_snapshot.throttle()
+            if waited:
+                span.set(rate_limited_s=round(waited, 2))
+            return http_client.get_json(url, timeout=policy.timeout(30))
+
+        data = policy.call(attempt)
+        span.set(points=len(data.get("prices", [])))
+
+    cached = {
+        "coin": coin,
+        "resolution": resolution,
+        "from": chunk[0],
+        "to": end,
+        "fetched_ts": now,
+        "complete": chunk[1] <= now - COMPLETE_AFTER,
+        "prices": data.get("prices", []),
+        "market_caps": data.get("market_caps", []),
+        "total_volumes": data.get("total_volumes", []),
+    }
+    content_writer.atomic_write(chunk_path(coin, resolution, chunk), json.dumps(cached, separators=(",", ":")).encode())
+    return cached
+
+
+def fetch_series(coins: list, resolution: str, start: int, end: int, workers: int) -> dict:
+    """{coin: [chunk, ...]} for every coin, from the cache where possible"""
+    chunks = chunk_ranges(start, end, RESOLUTIONS[resolution][1])
+    series = {coin: [] for coin in coins}
+    missing = []
+    for coin in coins:
+        for chunk in chunks:
+            cached = load_chunk(chunk_path(coin, resolution, chunk), min(chunk[1], end))
+            if cached is not None:
+                series[coin].append(cached)
+            else:
+                missing.append((coin, chunk))
+
+    print(f"  {len(coins) * len(chunks)} chunks: {len(coins) * len(chunks) - len(missing)} cached, {len(missing)} to fetch "
+          f"(~{len(missing) / (market_snapshot.COINGECKO_RATE * 60):.0f} min at {market_snapshot.COINGECKO_RATE * 60:.0f}/min)")
+    if not missing:
+        return series
+
+    parent = tracing.current()
+    failed = []
+    done = 0
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="backfill") as pool:
+        futures = {pool.submit(fetch_chunk, coin, resolution, chunk, parent): (coin, chunk) for coin, chunk in missing}
+        for future in as_completed(futures):
+            coin, chunk = futures[future]
+            try:
+                series[coin].append(future.result())
+            except Exception as e:
+                failed.append((coin, chunk))
+                print(f"  ✗ {coin} {datetime.fromtimestamp(chunk[0], timezone.utc):%Y-%m-%d}: {retry.describe(e)}")
+            with lock:
+                done += 1
+                if done % 25 == 0 or done == len(missing):
+                    print(f"  Fetched {done}/{len(missing)} chunks", flush=True)
+    if failed:
+        print(f"  Warning: {len(failed)} chunks failed - rerun to retry them (fetched chunks are cached)")
+    return series
+
+
+# ============================================================================
+# VECTORIZED COMPUTATION
+# ============================================================================
+
+def to_grid(points: list, grid: "np.ndarray", step: int) -> "np.ndarray":
+    """Forward-fill [[ms, value], ...] onto grid (epoch seconds); NaN where stale or before the first point"""
+    if not points:
+        return np.full(len(grid), np.nan)
+    data = np.array(points, dtype=float)
+    data = data[np.argsort(data[:, 0], kind="stable")]
+    times = data[:, 0] / 1000
+    idx = np.searchsorted(times, grid, side="right") - 1
+    values = np.where(idx >= 0, data[np.clip(idx, 0, None), 1], np.nan)
+    stale = (idx < 0) | (grid - times[np.clip(idx, 0, None)] > MAX_FILL_STEPS * step)
+    values[stale] = np.nan
+    return values
+
+
+def build_matrices(coins: list, series: dict, grid: "np.ndarray", step: int) -> dict:
+    """coins x timestamps matrices of prices, market caps and volumes"""
+    matrices = {}
+    for key in ("prices", "market_caps", "total_volumes"):
+        rows = []
+        for coin in coins:
+            points = [p for chunk in sorted(series[coin], key=lambda c: c["from"]) for p in chunk[key]]
+            rows.append(to_grid(points, grid, step))
+        matrices[key] = np.vstack(rows) if rows else np.empty((0, len(grid)))
+    return matrices
+
+
+def compute_mood(matrices: dict, step: int, tiers: list) -> dict:
+    """Headline breadth (top tier), tier breadth, green/valid counts and M/V for every grid column"""
+    prices = matrices["prices"]
+    lag = DAY // step
+    now_prices, then_prices = prices[:, lag:], prices[:, :-lag]
+    valid = np.isfinite(now_prices) & np.isfinite(then_prices) & (then_prices > 0)
+    green = valid & (now_prices > np.where(valid, then_prices, np.inf))
+
+    # Per-tier counts in one reduction over the coin axis (rows are in rank order)
+    starts = [first for _, first, _ in tiers]
+    green_by_tier = np.add.reduceat(green.astype(np.int64), starts, axis=0) if tiers else None
+    valid_by_tier = np.add.reduceat(valid.astype(np.int64), starts, axis=0) if tiers else None
+
+    caps = np.nansum(matrices["market_caps"][:, lag:], axis=0)
+    volumes = np.nansum(matrices["total_volumes"][:, lag:], axis=0)
+    # The headline covers the first tier (top 100) only
+    green_headline = green_by_tier[0] if tiers else green.sum(axis=0)
+    valid_headline = valid_by_tier[0] if tiers else valid.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        breadth = green_headline / valid_headline * 100
+        mv = np.where(volumes > 0, caps / volumes, np.nan)
+        tier_breadth = green_by_tier / valid_by_tier * 100 if tiers else None
+
+    return {
+        "breadth": breadth,
+        "green": green_headline,
+        "valid": valid_headline,
+        "mv": mv,
+        "tiers": {name: tier_breadth[i] for i, (name, _, _) in enumerate(tiers)} if tiers else {},
+    }
+
+
+def tier_bounds(count: int) -> list:
+    """[(tier, first row, last row)] of capture_mood.BREADTH_TIERS within count coins"""
+    bounds, start = [], 0
+    for name, end in capture_mood.BREADTH_TIERS:
+        if start >= count:
+            break
+        bounds.append((name, start, min(end, count)))
+        start = end
+    return bounds
+
+
+def mood_points(grid: "np.ndarray", mood: dict, min_coverage: float) -> list:
+    """Store points for grid columns where enough coins have data"""
+    points = []
+    total = mood["valid"].max() if len(mood["valid"]) else 0
+    for i, ts in enumerate(grid):
+        valid = int(mood["valid"][i])
+        if not total or valid < min_coverage * total or not np.isfinite(mood["mv"][i]):
+            continue
+        points.append({
+            "timestamp": mood_store.format_ts(datetime.fromtimestamp(int(ts), timezone.utc)),
+            "breadth": round(float(mood["breadth"][i]), 1),
+            "mv": round(float(mood["mv"][i]), 1),
+            "mv_universe": round(float(mood["mv"][i]), 1),
+            "green_coins": int(mood["green"][i]),
+            "total_coins": valid,
+            "breadth_tiers": {name: round(float(values[i]), 1) for name, values in mood["tiers"].items()
+                              if np.isfinite(values[i])},
+            "source": "backfill",
+        })
+    return points
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def backfill(start: datetime, end: datetime, coins: int, resolution: str, workers: int, dry_run: bool = False) -> int:
+    step = RESOLUTIONS[resolution][0]
+    first = int(start.timestamp()) // step * step
+    last = int(end.timestamp()) // step * step
+    # 24h earlier prices are needed for the first point's breadth
+    fetch_start = first - DAY
+
+    universe = [c["id"] for c in market_snapshot.get_coins_markets(limit=coins)]
+    print(f"  Universe: top {len(universe)} coins by current market cap")
+    if len(universe) < coins:
+        print(f"  Warning: the snapshot holds {len(universe)} coins (raise MARKET_SNAPSHOT_COINS for more)")
+    if dry_run:
+        chunks = chunk_ranges(fetch_start, last + step, RESOLUTIONS[resolution][1])
+        cached = sum(1 for coin in universe for chunk in chunks
+                     if load_chunk(chunk_path(coin, resolution, chunk), min(chunk[1], last + step)) is not None)
+        print(f"  Dry run: {len(universe) * len(chunks)} chunks, {cached} cached")
+        return 0
+
+    with tracing.span("backfill_fetch", coins=len(universe), resolution=resolution):
+        series = fetch_series(universe, resolution, fetch_start, last + step, workers)
+
+    with tracing.span("backfill_compute") as span:
+        grid = np.arange(fetch_start, last + step, step, dtype=float)
+        matrices = build_matrices(universe, series, grid, step)
+        mood = compute_mood(matrices, step, tier_bounds(len(universe)))
+        points = mood_points(grid[DAY // step:], mood, min_coverage=0.5)
+        span.set(columns=len(grid), points=len(points))
+    print(f"  Computed {len(points)} {resolution} points over {len(universe)} x {len(grid)} grid")
+
+    # Only fill buckets of this resolution without a stored point; universe M/V
+    # stays out of the mv rollups of days that have live (global M/V) captures
+    stored = mood_store.recent_raw(start)
+    filled = {p["timestamp"][:BUCKET_KEY[resolution]] for p in stored}
+    live_days = {p["timestamp"][:10] for p in stored if p.get("source") != "backfill"}
+    gaps = []
+    for point in points:
+        if point["timestamp"][:BUCKET_KEY[resolution]] in filled or not start <= mood_store.parse_ts(point["timestamp"]) <= end:
+            continue
+        if point["timestamp"][:10] in live_days:
+            point = {key: value for key, value in point.items() if key != "mv"}
+        gaps.append(point)
+    with tracing.span("backfill_store", points=len(gaps)):
+        added = mood_store.append_many(gaps)
+        result = mood_store.export(capture_mood.MOOD_HISTORY_FILE)
+    print(f"  Stored {added} points ({len(points) - len(gaps)} skipped where captures exist)")
+    print(f"  Saved to {result['path']}")
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill mood history from CoinGecko market_chart ranges")
+    parser.add_argument("--from", dest="start", required=True, help="first day, YYYY-MM-DD (UTC)")
+    parser.add_argument("--to", dest="end", help="last day, YYYY-MM-DD (default: now)")
+    parser.add_argument("--coins", type=int, default=100, help="universe size, top N by market cap (default 100)")
+    parser.add_argument("--resolution", choices=sorted(RESOLUTIONS), default="hourly")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true", help="show what would be fetched")
+    opts = parser.parse_args()
+
+    if np is None:
+        print("backfill_mood.py needs NumPy: pip install numpy")
+        return 1
+
+    start = parse_date(opts.start)
+    end = parse_date(opts.end) + timedelta(days=1) - timedelta(seconds=1) if opts.end else datetime.now(timezone.utc)
+    end = min(end, datetime.now(timezone.utc))
+    if start >= end:
+        print("--from must be before --to")
+        return 1
+
+    print(f"[{datetime.now(timezone.utc).isoformat()}] Backfilling {opts.resolution} mood history "
+          f"{start:%Y-%m-%d} to {end:%Y-%m-%d %H:%M} (top {opts.coins} coins)")
+    try:
+        with tracing.span("backfill", resolution=opts.resolution, coins=opts.coins):
+            backfill(start, end, opts.coins, opts.resolution, opts.workers, opts.dry_run)
+        return 0
+    except Exception as e:
+        print(f"  ✗ Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: tolerant JSON parser vs the old extraction cascade
+Replays the malformed model outputs in fixtures/malformed_responses.json.
+
+For every sample it reports whether each strategy recovered the brief, how
+many sections survived, and the median parse time.
+
+Run: python scripts/bench_json_parse.py [--runs 200] [--json results.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from generate_brief import extract_essential_fields
+from json_repair import parse_json_tolerant, format_repairs
+
+FIXTURES = Path(__file__).parent / "fixtures" / "malformed_responses.json"
+
+
+# ============================================================================
+# LEGACY CASCADE - extract_json_from_response as it was before json_repair
+# ============================================================================
+
+def legacy_clean_json_string(json_str: str) -> str:
+    json_str = re.sub(r'^```json\s*', '', json_str)
+    json_str = re.sub(r'^```\s*', '', json_str)
+    json_str = re.sub(r'\s*```$', '', json_str)
+    json_str = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', json_str)
+    json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
+    return json_str
+
+
+def legacy_fix_unescaped_quotes(json_str: str) -> str:
+    result = []
+    in_string = False
+    escape_next = False
+
+    for i, char in enumerate(json_str):
+        if escape_next:
+            result.append(char)
+            escape_next = False
+            continue
+
+        if char == '\\':
+            escape_next = True
+            result.append(char)
+            continue
+
+        if char == '"':
+            if not in_string:
+                in_string = True
+                result.append(char)
+            else:
+                rest = json_str[i+1:i+20].lstrip()
+                if rest and rest[0] in ':,}]\n':
+                    in_string = False
+                    result.append(char)
+                else:
+                    result.append('\\"')
+                    continue
+        else:
+            result.append(char)
+
+    return ''.join(result)
+
+
+def legacy_extract(text: str) -> dict:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    json_match = re.search(r'\{[\s\S]*\}', text)
+    if not json_match:
+        raise ValueError("No JSON object found in response")
+    json_str = json_match.group()
+
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        pass
+
+    cleaned = legacy_clean_json_string(json_str)
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        return json.loads(legacy_fix_unescaped_quotes(cleaned))
+    except Exception:
+        pass
+
+    return extract_essential_fields(text)
+
+
+def tolerant_extract(text: str) -> dict:
+    return parse_json_tolerant(text)[0]
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def run_strategy(fn, text: str, runs: int) -> dict:
+    """Time fn(text) and describe what it recovered"""
+    sink = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sink):
+            result = fn(text)
+    except Exception as e:
+        return {"ok": False, "error": str(e)[:80], "sections": 0, "median_us": None}
+
+    timings = []
+    with contextlib.redirect_stdout(sink):
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn(text)
+            timings.append(time.perf_counter() - started)
+
+    sections = result.get("sections", {})
+    return {
+        "ok": True,
+        "sections": len(sections),
+        "structured": all(isinstance(v, dict) for v in sections.values()),
+        "median_us": round(statistics.median(timings) * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--json", help="write results to this file")
+    opts = parser.parse_args()
+
+    with open(FIXTURES, encoding="utf-8") as f:
+        samples = json.load(f)["samples"]
+
+    rows = []
+    print(f"{'sample':<26} {'legacy':>22} {'tolerant':>22}  repairs")
+    for sample in samples:
+        text = sample["text"]
+        legacy = run_strategy(legacy_extract, text, opts.runs)
+        tolerant = run_strategy(tolerant_extract, text, opts.runs)
+        try:
+            repairs = format_repairs(parse_json_tolerant(text)[1]) or "-"
+        except ValueError:
+            repairs = "failed"
+
+        def cell(r):
+            if not r["ok"]:
+                return "FAIL"
+            shape = "" if r["structured"] else " flat"
+            return f"{r['sections']} sec{shape} {r['median_us']:>8.1f}µs"
+
+        print(f"{sample['name']:<26} {cell(legacy):>22} {cell(tolerant):>22}  {repairs}")
+        rows.append({"sample": sample["name"], "bytes": len(text), "legacy": legacy,
+                     "tolerant": tolerant, "repairs": repairs})
+
+    def total(key):
+        return sum(r[key]["median_us"] or 0 for r in rows)
+
+    print(f"\nRecovered: legacy {sum(r['legacy']['ok'] for r in rows)}/{len(rows)}, "
+          f"tolerant {sum(r['tolerant']['ok'] for r in rows)}/{len(rows)}")
+    print(f"Total median time: legacy {total('legacy'):.0f}µs, tolerant {total('tolerant'):.0f}µs")
+
+    if opts.json:
+        with open(opts.json, "w") as f:
+            json.dump({"runs": opts.runs, "results": rows}, f, indent=2)
+        print(f"Results written to {opts.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
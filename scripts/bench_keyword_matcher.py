@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: keyword matcher vs nested any() scans
+Classifies a synthetic keyword corpus against vocabularies of growing size.
+
+For every vocabulary size it checks both strategies agree (category hits and
+curated photo), then reports automaton build time and the median time to
+classify one brief's keyword list.
+
+Run: python scripts/bench_keyword_matcher.py [--lists 2000] [--sizes 50,500,5000] [--json results.json]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import string
+import sys
+import time
+
+from generate_brief import CURATED_IMAGES, IMAGE_KEYWORD_TERMS
+from keyword_matcher import KeywordMatcher
+
+KEYWORDS_PER_LIST = 5
+
+
+# ============================================================================
+# LEGACY SCANS - the classification as it was before keyword_matcher
+# ============================================================================
+
+def legacy_classify(keywords: list, categories: dict, curated: dict) -> tuple:
+    hits = []
+    for kw in keywords:
+        kw_lower = kw.lower()
+        hits.append({c for c, terms in categories.items() if any(t in kw_lower for t in terms)})
+
+    photo_id = None
+    for keyword in [k.strip().lower() for k in keywords]:
+        for word in keyword.split():
+            if word in curated:
+                photo_id = curated[word]
+                break
+        if photo_id:
+            break
+    return hits, photo_id
+
+
+def matcher_classify(matcher: KeywordMatcher, keywords: list) -> tuple:
+    result = matcher.match(keywords)
+    return result.hits, result.curated
+
+
+# ============================================================================
+# SYNTHETIC CORPUS
+# ============================================================================
+
+def synthetic_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+
+def build_vocabulary(size: int, rng: random.Random) -> tuple:
+    """Real terms plus synthetic ones, spread over the same categories"""
+    categories = {c: list(terms) for c, terms in IMAGE_KEYWORD_TERMS.items()}
+    curated = dict(CURATED_IMAGES)
+    names = list(categories)
+    for i in range(max(0, size - sum(len(t) for t in categories.values()))):
+        term = synthetic_word(rng)
+        if rng.random() < 0.3:
+            term = f"{term} {synthetic_word(rng)}"
+        categories[names[i % len(names)]].append(term)
+        if i % 4 == 0:
+            curated[synthetic_word(rng)] = f"photo-synthetic-{i}"
+    return categories, curated
+
+
+def build_corpus(lists: int, categories: dict, curated: dict, rng: random.Random) -> list:
+    """Keyword lists mixing vocabulary terms, curated words and filler"""
+    terms = [t for ts in categories.values() for t in ts]
+    words = list(curated)
+    corpus = []
+    for _ in range(lists):
+        keywords = []
+        for _ in range(KEYWORDS_PER_LIST):
+            roll = rng.random()
+            if roll < 0.4:
+                kw = rng.choice(terms)
+            elif roll < 0.6:
+                kw = f"{synthetic_word(rng)} {rng.choice(words)}"
+            else:
+                kw = f"{synthetic_word(rng)} {synthetic_word(rng)}"
+            keywords.append(kw.title() if rng.random() < 0.3 else kw)
+        corpus.append(keywords)
+    return corpus
+
+
+def median_us(fn, corpus: list) -> float:
+    timings = []
+    for keywords in corpus:
+        started = time.perf_counter()
+        fn(keywords)
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lists", type=int, default=2000, help="keyword lists per vocabulary size")
+    parser.add_argument("--sizes", default="50,500,2000,5000", help="vocabulary sizes (terms)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    opts = parser.parse_args()
+
+    rng = random.Random(opts.seed)
+    rows = []
+    print(f"{'terms':>6} {'states':>8} {'build':>9} {'legacy/list':>12} {'matcher/list':>13} {'speedup':>8}  agree")
+    for size in [int(s) for s in opts.sizes.split(",")]:
+        categories, curated = build_vocabulary(size, rng)
+        corpus = build_corpus(opts.lists, categories, curated, rng)
+
+        started = time.perf_counter()
+        matcher = KeywordMatcher(categories, curated=curated)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        agree = all(legacy_classify(kws, categories, curated) == matcher_classify(matcher, kws) for kws in corpus)
+        legacy = median_us(lambda kws: legacy_classify(kws, categories, curated), corpus)
+        fast = median_us(lambda kws: matcher_classify(matcher, kws), corpus)
+        terms = sum(len(t) for t in categories.values()) + len(curated)
+
+        print(f"{terms:>6} {matcher.size:>8} {build_ms:>7.1f}ms {legacy:>10.1f}µs {fast:>11.1f}µs "
+              f"{legacy / fast:>7.1f}x  {'yes' if agree else 'NO'}")
+        rows.append({"terms": terms, "states": matcher.size, "build_ms": round(build_ms, 2),
+                     "legacy_us": legacy, "matcher_us": fast, "agree": agree})
+
+    if opts.json:
+        with open(opts.json, "w") as f:
+            json.dump({"lists": opts.lists, "results": rows}, f, indent=2)
+        print(f"Results written to {opts.json}")
+
+    return 0 if all(r["agree"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
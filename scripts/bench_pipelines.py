@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Offline pipeline benchmark - The Litmus
+Runs generate_brief, generate_weekend, generate_audio and capture_mood end to
+end against recorded responses, with no network access.
+
+CoinGecko, Anthropic (streamed or blocking), Unsplash and ElevenLabs are
+replayed from fixtures/pipeline_responses.json by a stand-in for the shared
+http_client, with configurable per-service latency and an injected failure
+rate (HTTP 529/503, which the retry policy handles as in production).
+
+Every pipeline runs in a scratch directory from a cold cache. For each stage
+it reports wall time, CPU time (process_time) and peak traced memory
+(tracemalloc), plus per-service call counts, and writes everything to a JSON
+file tagged with the git commit so runs can be compared across commits.
+Tracing spans from the runs go to a .trace.jsonl file next to the results.
+
+Run:
+    python scripts/bench_pipelines.py [--runs 3] [--pipelines brief-morning,weekend]
+        [--latency anthropic=2.0,coingecko=0.3] [--failure-rate 0.1]
+        [--output results.json] [--compare previous.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+SCRIPT_DIR = Path(__file__).parent
+REPO_DIR = SCRIPT_DIR.parent
+FIXTURES = SCRIPT_DIR / "fixtures" / "pipeline_responses.json"
+DEFAULT_OUTPUT_DIR = REPO_DIR / ".cache" / "bench"
+
+# Seconds added to every replayed response, per service
+DEFAULT_LATENCY = {"coingecko": 0.25, "anthropic": 1.5, "unsplash": 0.3, "elevenlabs": 1.0}
+AUDIO_BYTES = 2 * 1024 * 1024
+
+# The scripts read their keys at import; any non-empty value enables the code paths
+for key in ("ANTHROPIC_API_KEY", "UNSPLASH_ACCESS_KEY", "ELEVENLABS_API_KEY"):
+    os.environ.setdefault(key, "offline-benchmark")
+
+import capture_mood
+import content_manifest
+import generate_audio
+import generate_brief
+import generate_weekend
+import http_client
+import llm_cache
+import market_snapshot
+import mood_store
+import tracing
+from standin_server import SERVICES, markets_page, message_body, sse_lines
+import unsplash
+
+
+# ============================================================================
+# FIXTURE REPLAY
+# ============================================================================
+
+class ReplayStream:
+    """Stand-in for http_client.StreamResponse over canned SSE lines"""
+
+    def __init__(self, url: str, lines: list, delay_per_line: float, status: int = 200,
+                 reason: str = "OK", headers: dict = None, body: bytes = b""):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers or {"content-type": "text/event-stream"}
+        self.ok = 200 <= status < 300
+        self._lines = lines
+        self._delay = delay_per_line
+        self._body = body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise http_client.HTTPError(self.status, self.reason, self.url, self.headers, self._body)
+        return self
+
+    def iter_lines(self):
+        for line in self._lines:
+            if self._delay and line.startswith("data:"):
+                time.sleep(self._delay)
+            yield line
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayClient:
+    """Drop-in for http_client.HttpClient that answers from fixtures
+
+    anthropic_fixture selects which recorded model output the next Anthropic
+    call returns ("morning", "evening", "week-ahead", "weekend").
+    """
+
+    def __init__(self, fixtures: dict, latency: dict, failure_rate: float, seed: int):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.anthropic_fixture = "morning"
+        self.stats = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._audio = bytes(random.Random(seed).getrandbits(8) for _ in range(4096)) * (AUDIO_BYTES // 4096)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def _record(self, service: str, failed: bool, latency: float):
+        with self._lock:
+            entry = self.stats.setdefault(service, {"calls": 0, "failures_injected": 0, "latency_s": 0.0})
+            entry["calls"] += 1
+            entry["failures_injected"] += int(failed)
+            entry["latency_s"] = round(entry["latency_s"] + latency, 3)
+
+    def request(self, method: str, url: str, params: dict = None, headers: dict = None,
+                json_body=None, data: bytes = None, timeout: float = None, stream: bool = False):
+        parts = urlsplit(url)
+        service = SERVICES.get(parts.hostname)
+        if service is None:
+            raise ConnectionError(f"No fixture for host {parts.hostname}")
+
+        latency = self.latency.get(service, 0.0)
+        with self._lock:
+            failed = self._rng.random() < self.failure_rate
+        self._record(service, failed, latency)
+
+        if failed:
+            time.sleep(min(latency, 0.2))
+            status, reason = (529, "Overloaded") if service == "anthropic" else (503, "Service Unavailable")
+            body = json.dumps({"error": {"type": "overloaded_error", "message": "Injected failure"}}).encode()
+            if stream:
+                return ReplayStream(url, [], 0.0, status, reason, {"retry-after": "0"}, body)
+            return http_client.Response(url, status, reason, {"retry-after": "0"}, body)
+
+        if service == "anthropic" and stream:
+            lines = sse_lines(self.fixtures["anthropic"][self.anthropic_fixture])
+            deltas = sum(1 for line in lines if line.startswith("data:"))
+            return ReplayStream(url, lines, latency / max(deltas, 1))
+
+        time.sleep(latency)
+        if service == "coingecko" and parts.path.endswith("/global"):
+            body = self.fixtures["coingecko"]["global"]
+        elif service == "coingecko":
+            body = markets_page(self.fixtures["coingecko"]["markets"], parts.query)
+        elif service == "unsplash":
+            body = self.fixtures["unsplash"]["search"]
+        elif service == "anthropic":
+            return http_client.Response(url, 200, "OK", {"content-type": "application/json"},
+                                        message_body(self.fixtures["anthropic"][self.anthropic_fixture]))
+        else:
+            return http_client.Response(url, 200, "OK", {"content-type": "audio/mpeg"}, self._audio)
+        return http_client.Response(url, 200, "OK", {"content-type": "application/json"},
+                                    json.dumps(body).encode())
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        pass
+
+
+# ============================================================================
+# SANDBOX + MEASUREMENT
+# ============================================================================
+
+@contextlib.contextmanager
+def sandbox():
+    """Scratch working directory with every output and cache path pointed into it"""
+    previous_cwd = os.getcwd()
+    root = Path(tempfile.mkdtemp(prefix="litmus-bench-"))
+    patched = [
+        (generate_brief, "CONTENT_DIR", root / "content"),
+        (capture_mood, "DATA_DIR", root / "data"),
+        (capture_mood, "MOOD_HISTORY_FILE", root / "data" / "mood-history.json"),
+        (capture_mood, "MOOD_CURRENT_FILE", root / "data" / "mood-current.json"),
+        (mood_store, "STORE_DIR", root / "data" / "mood-store"),
+        (mood_store, "LOCK_FILE", root / ".cache" / "mood-store.lock"),
+        (mood_store, "EXPORT_FILE", root / "data" / "mood-history.json"),
+        (market_snapshot, "SNAPSHOT_FILE", root / ".cache" / "market-snapshot.json"),
+        # A cold process starts with a full CoinGecko burst
+        (market_snapshot, "_limiter", market_snapshot.RateLimiter(market_snapshot.COINGECKO_RATE, market_snapshot.COINGECKO_BURST)),
+        (unsplash, "CACHE_FILE", root / ".cache" / "unsplash-search.json"),
+        (content_manifest, "MANIFEST_FILE", root / "content" / "index.json"),
+        # Every iteration should pay for the (fake) LLM call it is timing
+        (llm_cache, "CACHE_ENABLED", False),
+        (llm_cache, "CACHE_DIR", root / ".cache" / "llm-responses"),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patched]
+    try:
+        for module, name, value in patched:
+            setattr(module, name, value)
+        # generate_weekend and generate_audio write relative to the working directory
+        (root / "content" / "weekend").mkdir(parents=True)
+        shutil.copy(REPO_DIR / "content" / "weekend" / "magazine.json", root / "content" / "weekend" / "magazine.json")
+        os.chdir(root)
+        yield root
+    finally:
+        os.chdir(previous_cwd)
+        for module, name, value in originals:
+            setattr(module, name, value)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+class StageTimer:
+    """Wall time, CPU time and peak traced memory per named stage"""
+
+    def __init__(self, trace_memory: bool, quiet: bool):
+        self.trace_memory = trace_memory
+        self.quiet = quiet
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        sink = io.StringIO()
+        redirect = contextlib.redirect_stdout(sink) if self.quiet else contextlib.nullcontext()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            with redirect:
+                yield
+        finally:
+            self.stages[name] = {
+                "wall_ms": round((time.perf_counter() - wall) * 1000, 2),
+                "cpu_ms": round((time.process_time() - cpu) * 1000, 2),
+                "peak_kb": round(tracemalloc.get_traced_memory()[1] / 1024, 1) if self.trace_memory else None
+            }
+
+
+# ============================================================================
+# PIPELINES
+# ============================================================================
+
+def brief_pipeline(brief_type: str):
+    def run(timer: StageTimer, client: ReplayClient):
+        client.anthropic_fixture = brief_type
+        with timer.stage("market_data"):
+            market_data = generate_brief.fetch_market_data()
+        with timer.stage("generate"):
+            brief = generate_brief.generate_brief("apac", brief_type, market_data)
+        with timer.stage("save"):
+            generate_brief.save_brief(brief, "apac", brief_type)
+    return run
+
+
+def week_ahead_pipeline(timer: StageTimer, client: ReplayClient):
+    client.anthropic_fixture = "week-ahead"
+    with timer.stage("generate"):
+        brief = generate_brief.generate_week_ahead()
+    with timer.stage("save"):
+        generate_brief.save_brief(brief, "global", "week-ahead")
+
+
+def weekend_pipeline(timer: StageTimer, client: ReplayClient):
+    client.anthropic_fixture = "weekend"
+    with timer.stage("market_data"):
+        generate_weekend.fetch_weekly_market_data()
+    with timer.stage("magazine"):
+        if generate_weekend.generate_weekend_magazine() is None:
+            raise RuntimeError("generate_weekend_magazine failed")
+
+
+def audio_pipeline(timer: StageTimer, client: ReplayClient):
+    with timer.stage("audio"):
+        if not generate_audio.main():
+            raise RuntimeError("generate_audio failed")
+
+
+def mood_pipeline(timer: StageTimer, client: ReplayClient):
+    with timer.stage("market_data"):
+        market_snapshot.get_snapshot()
+    with timer.stage("capture"):
+        if capture_mood.main() not in (None, 0):
+            raise RuntimeError("capture_mood failed")
+
+
+PIPELINES = {
+    "brief-morning": brief_pipeline("morning"),
+    "brief-evening": brief_pipeline("evening"),
+    "week-ahead": week_ahead_pipeline,
+    "weekend": weekend_pipeline,
+    "audio": audio_pipeline,
+    "mood": mood_pipeline,
+}
+
+
+def run_pipeline(name: str, client: ReplayClient, trace_memory: bool, quiet: bool) -> dict:
+    """One cold run of a pipeline in its own sandbox"""
+    timer = StageTimer(trace_memory, quiet)
+    client.reset_stats()
+    error = None
+    wall, cpu = time.perf_counter(), time.process_time()
+    with sandbox():
+        try:
+            PIPELINES[name](timer, client)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return {
+        "ok": error is None,
+        "error": error,
+        "wall_ms": round((time.perf_counter() - wall) * 1000, 2),
+        "cpu_ms": round((time.process_time() - cpu) * 1000, 2),
+        "peak_kb": max((s["peak_kb"] or 0 for s in timer.stages.values()), default=0) if trace_memory else None,
+        "stages": timer.stages,
+        "http": client.stats
+    }
+
+
+def summarize(runs: list) -> dict:
+    """Median wall/CPU and max peak memory per stage across runs"""
+    def reduce(samples: list) -> dict:
+        peaks = [s["peak_kb"] for s in samples if s.get("peak_kb") is not None]
+        return {
+            "wall_ms": round(statistics.median(s["wall_ms"] for s in samples), 2),
+            "cpu_ms": round(statistics.median(s["cpu_ms"] for s in samples), 2),
+            "peak_kb": max(peaks) if peaks else None
+        }
+
+    stage_names = list(dict.fromkeys(name for run in runs for name in run["stages"]))
+    http = {}
+    for run in runs:
+        for service, entry in run["http"].items():
+            total = http.setdefault(service, {"calls": 0, "failures_injected": 0})
+            total["calls"] += entry["calls"]
+            total["failures_injected"] += entry["failures_injected"]
+    return {
+        "runs": len(runs),
+        "ok": sum(r["ok"] for r in runs),
+        "errors": [r["error"] for r in runs if r["error"]],
+        "total": reduce(runs),
+        "stages": {name: reduce([r["stages"][name] for r in runs if name in r["stages"]]) for name in stage_names},
+        "http": http
+    }
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_latency(spec: str) -> dict:
+    latency = dict(DEFAULT_LATENCY)
+    for item in filter(None, (spec or "").split(",")):
+        service, _, seconds = item.partition("=")
+        if service.strip() not in latency:
+            raise SystemExit(f"Unknown service in --latency: {service}")
+        latency[service.strip()] = float(seconds)
+    return latency
+
+
+def print_report(results: dict, baseline: dict = None):
+    print(f"\n{'pipeline / stage':<28} {'wall':>10} {'cpu':>10} {'peak':>10}  {'ok':>5}")
+    for name, summary in results["pipelines"].items():
+        total = summary["total"]
+        delta = ""
+        previous = (baseline or {}).get("pipelines", {}).get(name)
+        if previous:
+            before = previous["total"]["wall_ms"]
+            delta = f"  {(total['wall_ms'] - before) / before * 100:+.1f}% vs {baseline.get('commit', '?')}" if before else ""
+        peak = f"{total['peak_kb']:.0f}KB" if total["peak_kb"] is not None else "-"
+        print(f"{name:<28} {total['wall_ms']:>8.0f}ms {total['cpu_ms']:>8.0f}ms {peak:>10}  "
+              f"{summary['ok']}/{summary['runs']}{delta}")
+        for stage, s in summary["stages"].items():
+            peak = f"{s['peak_kb']:.0f}KB" if s["peak_kb"] is not None else "-"
+            print(f"  {stage:<26} {s['wall_ms']:>8.0f}ms {s['cpu_ms']:>8.0f}ms {peak:>10}")
+        calls = ", ".join(f"{service} {h['calls']}" + (f" ({h['failures_injected']} failed)" if h["failures_injected"] else "")
+                          for service, h in summary["http"].items())
+        print(f"  {'http calls':<26} {calls}")
+        for error in summary["errors"]:
+            print(f"  ! {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="comma-separated: " + ", ".join(PIPELINES))
+    parser.add_argument("--runs", type=int, default=3, help="cold runs per pipeline")
+    parser.add_argument("--latency", help="per-service seconds, e.g. anthropic=2.0,coingecko=0.3")
+    parser.add_argument("--no-latency", action="store_true", help="replay with zero latency (CPU-bound view)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability a replayed call fails (0-1)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows CPU-heavy stages)")
+    parser.add_argument("--output", help=f"results file (default {DEFAULT_OUTPUT_DIR}/pipelines-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff total wall time against")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline output")
+    opts = parser.parse_args()
+
+    names = [n.strip() for n in opts.pipelines.split(",") if n.strip()]
+    unknown = [n for n in names if n not in PIPELINES]
+    if unknown:
+        raise SystemExit(f"Unknown pipeline(s): {', '.join(unknown)}")
+
+    latency = {s: 0.0 for s in DEFAULT_LATENCY} if opts.no_latency else parse_latency(opts.latency)
+    with open(FIXTURES, encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    client = ReplayClient(fixtures, latency, opts.failure_rate, opts.seed)
+    previous_client = http_client.set_client(client)
+    random.seed(opts.seed)
+
+    trace_memory = not opts.no_memory
+    if trace_memory:
+        tracemalloc.start()
+
+    commit = git_commit()
+    output = Path(opts.output) if opts.output else DEFAULT_OUTPUT_DIR / f"pipelines-{commit}.json"
+    # Keep benchmark spans out of the production trace
+    tracing.TRACE_FILE = output.with_suffix(".trace.jsonl")
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {"runs": opts.runs, "latency": latency, "failure_rate": opts.failure_rate,
+                   "seed": opts.seed, "stream": generate_brief.ANTHROPIC_STREAM, "trace_memory": trace_memory},
+        "pipelines": {}
+    }
+    try:
+        for name in names:
+            print(f"Running {name} x{opts.runs}...")
+            runs = [run_pipeline(name, client, trace_memory, not opts.verbose) for _ in range(opts.runs)]
+            results["pipelines"][name] = summarize(runs)
+    finally:
+        http_client.set_client(previous_client)
+        if trace_memory:
+            tracemalloc.stop()
+
+    baseline = None
+    if opts.compare:
+        with open(opts.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output} (spans in {tracing.TRACE_FILE})")
+
+    return 0 if all(p["ok"] == p["runs"] for p in results["pipelines"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,51 +2,81 @@
 """
 Capture Market Mood Data
 Runs hourly via GitHub Actions to store real historical data for trails.
-Stores:
-- Hourly snapshots (last 24 hours) for daily trail
-- Daily snapshots (last 7 days) for weekly trail
+Each capture is appended to the mood history store (mood_store), which
+keeps the full history with hourly/daily/weekly rollups, then the trail
+file read by api/market-mood.js is re-exported from it:
+- Hourly points (last 24 hours) for daily trail
+- Daily points (last 7 days) for weekly trail
+
+Every capture carries its 9-box zone (mood_zones); a change of zone is
+appended to the store's zone transition log. Each capture also publishes
+data/mood-current.json: the full market mood response (current point,
+zone, trails, aggregates), so api/market-mood.js serves a file read
+instead of calling CoinGecko while captures are recent.
+
+Continuous mode (--watch) samples every MOOD_SAMPLE_MINUTES instead, into
+a ring buffer of the last MOOD_WINDOW_HOURS (mood_window) with running
+mean/min/max/EMA of breadth and M/V. Each sample re-exports the trail file
+with an "intraday" trail and those "aggregates"; samples are flushed to
+the store when a sample lands in a new hour. On start the buffer is warmed
+from the store's raw captures. Run it in place of the hourly job:
+
+    python scripts/capture_mood.py --watch [--interval 5]
 """
 
-import json
+import argparse
 import os
+import signal
 import sys
-from datetime import datetime, timezone
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-import urllib.request
-import urllib.error
+
+import content_writer
+import market_snapshot
+import mood_store
+import mood_window
+import mood_zones
+import tracing
+
+try:
+    import numpy as np
+except ImportError:  # the pure-Python pass gives the same numbers
+    np = None
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 DATA_DIR = SCRIPT_DIR.parent / "data"
 MOOD_HISTORY_FILE = DATA_DIR / "mood-history.json"
+MOOD_CURRENT_FILE = DATA_DIR / "mood-current.json"
 
-# CoinGecko APIs
-GLOBAL_API = "https://api.coingecko.com/api/v3/global"
-COINS_API = "https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=100&page=1&sparkline=false&price_change_percentage=24h"
-
-# Retention
-MAX_HOURLY_POINTS = 25  # ~24 hours + buffer
-MAX_DAILY_POINTS = 8    # 7 days + buffer
+# Headline breadth is over the top 100 coins, the universe api/market-mood.js falls back to
+HEADLINE_COINS = 100
+# Tier universe (top N coins by market cap, at most the snapshot's MARKET_SNAPSHOT_COINS)
+BREADTH_COINS = int(os.environ.get("MOOD_BREADTH_COINS", str(market_snapshot.SNAPSHOT_COINS)))
 
+# Market-cap tiers reported alongside the headline breadth: (name, last rank)
+BREADTH_TIERS = [("top100", HEADLINE_COINS), ("101-250", 250), ("251-500", 500), ("501-1000", 1000)]
 
-def fetch_json(url: str) -> dict:
-    """Fetch JSON from URL."""
-    req = urllib.request.Request(url, headers={"User-Agent": "TheLitmus/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as response:
-        return json.loads(response.read().decode())
+# Continuous capture (--watch)
+SAMPLE_MINUTES = int(os.environ.get("MOOD_SAMPLE_MINUTES", "5"))
+WINDOW_HOURS = int(os.environ.get("MOOD_WINDOW_HOURS", "24"))
+EMA_SAMPLES = int(os.environ.get("MOOD_EMA_SAMPLES", "12"))  # ~1 hour at 5-minute samples
 
 
-def calculate_mood_data() -> dict:
+def calculate_mood_data(max_age: int = None) -> dict:
     """Calculate current market mood metrics."""
-    # Fetch global data
-    global_data = fetch_json(GLOBAL_API)
+    # Global data and the top coins from the shared snapshot
+    snapshot = market_snapshot.get_snapshot(max_age)
+    global_data = snapshot["global"]
+    coins = snapshot["coins"][:BREADTH_COINS]
     
-    # Fetch top 100 coins
-    coins = fetch_json(COINS_API)
-    
-    # Calculate breadth (% of coins that are green)
-    green_coins = sum(1 for c in coins if (c.get("price_change_percentage_24h") or 0) > 0)
-    breadth = (green_coins / len(coins)) * 100 if coins else 50
+    # Calculate breadth (% of coins that are green) over the top 100, and per tier
+    # over the wider universe - the top100 tier is the headline's coins
+    tiers = count_green_by_tier(coins)
+    green_coins, total_coins = tiers.get("top100", (0, 0))
+    breadth = (green_coins / total_coins) * 100 if total_coins else 50
     
     # Calculate M/V ratio
     total_market_cap = global_data.get("data", {}).get("total_market_cap", {}).get("usd", 0)
@@ -54,55 +84,95 @@ def calculate_mood_data() -> dict:
     mv_ratio = total_market_cap / total_volume if total_volume > 0 else 20
     
     return {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": snapshot["fetched_at"],
         "breadth": round(breadth, 1),
         "mv": round(mv_ratio, 1),
         "market_cap": total_market_cap,
         "volume": total_volume,
         "green_coins": green_coins,
-        "total_coins": len(coins)
+        "total_coins": total_coins,
+        "breadth_tiers": {name: round(green / total * 100, 1) for name, (green, total) in tiers.items()},
+        "zone": mood_zones.zone_for(round(breadth, 1), round(mv_ratio, 1))
     }
 
 
-def load_history() -> dict:
-    """Load existing history or create new structure."""
-    if MOOD_HISTORY_FILE.exists():
-        try:
-            with open(MOOD_HISTORY_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
+def count_green_by_tier(coins: list) -> dict:
+    """{tier: (green, total)} for the BREADTH_TIERS the coin list reaches, in one pass"""
+    bounds = []
+    start = 0
+    for name, end in BREADTH_TIERS:
+        if start >= len(coins):
+            break
+        bounds.append((name, start, min(end, len(coins))))
+        start = end
+    if not bounds:
+        return {}
     
-    return {
-        "hourly": [],
-        "daily": [],
-        "last_daily_capture": None
-    }
-
-
-def save_history(history: dict):
-    """Save history to file."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(MOOD_HISTORY_FILE, "w") as f:
-        json.dump(history, f, indent=2)
+    if np is not None:
+        # Missing changes become NaN, which is never > 0
+        changes = np.array([c.get("price_change_percentage_24h") for c in coins], dtype=float)
+        green = np.add.reduceat((changes > 0).astype(np.int64), [first for _, first, _ in bounds])
+        return {name: (int(count), last - first) for (name, first, last), count in zip(bounds, green)}
+    
+    tiers = {}
+    for name, first, last in bounds:
+        green = sum(1 for c in coins[first:last] if (c.get("price_change_percentage_24h") or 0) > 0)
+        tiers[name] = (green, last - first)
+    return tiers
 
 
-def should_capture_daily(history: dict) -> bool:
-    """Check if we should capture a daily snapshot (once per day at ~00:00 UTC)."""
-    now = datetime.now(timezone.utc)
+def publish_current(current: dict, intraday: list = None, aggregates: dict = None) -> dict:
+    """Write data/mood-current.json, the response api/market-mood.js serves while it is recent"""
+    trails = mood_store.trails()
+    trail = [{"breadth": p["breadth"], "mv": p["mv"]} for p in trails["hourly"] if "breadth" in p and "mv" in p]
+    last = trail[-1] if trail else None
+    if not last or abs(last["breadth"] - current["breadth"]) > 0.5 or abs(last["mv"] - current["mv"]) > 0.5:
+        trail.append({"breadth": current["breadth"], "mv": current["mv"]})
+    trail7d = [{"breadth": p["breadth"], "mv": p["mv"]} for p in trails["daily"] if "breadth" in p and "mv" in p]
+    intraday = [{"breadth": p["breadth"], "mv": p["mv"]} for p in intraday or []]
     
-    # Capture daily if:
-    # 1. Never captured before, OR
-    # 2. Last capture was on a different day
-    last_capture = history.get("last_daily_capture")
-    if not last_capture:
-        return True
+    if aggregates and aggregates["breadth"]:
+        breadth_avg = aggregates["breadth"]["mean"]
+    else:
+        breadth_avg = sum(p["breadth"] for p in trail) / len(trail)
+    mv_7d = sum(p["mv"] for p in trail7d) / len(trail7d) if trail7d else current["mv"]
+    activity = mood_zones.mv_to_activity(current["mv"])
+    zone_info = mood_zones.get_zone_info(current["zone"], current["breadth"], activity)
+    transition = mood_store.last_transition()
     
-    try:
-        last_date = datetime.fromisoformat(last_capture.replace("Z", "+00:00")).date()
-        return now.date() > last_date
-    except (ValueError, AttributeError):
-        return True
+    mood = {
+        "success": True,
+        "source": "capture",
+        "lastUpdated": mood_store.format_ts(mood_store.parse_ts(current["timestamp"])),
+        "breadth": current["breadth"],
+        "breadthAvg24h": round(breadth_avg, 1),
+        "mvRatio24h": current["mv"],
+        "mvRatio7d": round(mv_7d, 1),
+        "zone": current["zone"],
+        "zoneTitle": zone_info["title"],
+        "zoneDescription": zone_info["description"],
+        "zoneSince": transition["timestamp"] if transition and transition["to"] == current["zone"] else None,
+        "trail": trail,
+        "trail7d": trail7d,
+        "trailIntraday": intraday,
+        "aggregates": aggregates,
+        "mvRange": {"low": mood_zones.MV_RANGE[0], "high": mood_zones.MV_RANGE[1]},
+        "dataPoints": {"hourly": len(trail), "daily": len(trail7d), "intraday": len(intraday)},
+        "raw": {
+            "totalMarketCap": current.get("market_cap"),
+            "totalVolume24h": current.get("volume"),
+            "greenCoins": current.get("green_coins"),
+            "totalCoins": current.get("total_coins"),
+        },
+    }
+    return content_writer.write_json(MOOD_CURRENT_FILE, mood, compact=True)
+
+
+def bootstrap_store():
+    """First run against an empty store: keep the points the old trail file held"""
+    if mood_store.is_empty() and MOOD_HISTORY_FILE.exists():
+        imported = mood_store.import_history(MOOD_HISTORY_FILE)
+        print(f"  Imported {imported} points from {MOOD_HISTORY_FILE} into the store")
 
 
 def main():
@@ -113,43 +183,26 @@ def main():
         current = calculate_mood_data()
         print(f"  Breadth: {current['breadth']}% ({current['green_coins']}/{current['total_coins']} green)")
         print(f"  M/V Ratio: {current['mv']}x")
+        print(f"  Tiers: {', '.join(f'{name} {value}%' for name, value in current['breadth_tiers'].items())}")
+        print(f"  Zone: {current['zone']}")
         
-        # Load history
-        history = load_history()
-        
-        # Add hourly point
-        hourly_point = {
-            "timestamp": current["timestamp"],
-            "breadth": current["breadth"],
-            "mv": current["mv"]
-        }
-        history["hourly"].append(hourly_point)
-        
-        # Trim to last 24 hours
-        history["hourly"] = history["hourly"][-MAX_HOURLY_POINTS:]
-        print(f"  Hourly points: {len(history['hourly'])}")
+        bootstrap_store()
         
-        # Check if we should add daily point
-        if should_capture_daily(history):
-            daily_point = {
-                "timestamp": current["timestamp"],
-                "breadth": current["breadth"],
-                "mv": current["mv"],
-                "market_cap": current["market_cap"],
-                "volume": current["volume"]
-            }
-            history["daily"].append(daily_point)
-            history["daily"] = history["daily"][-MAX_DAILY_POINTS:]
-            history["last_daily_capture"] = current["timestamp"]
-            print(f"  Daily snapshot captured! Total daily points: {len(history['daily'])}")
+        # Append to the store (rollups update incrementally)
+        if not mood_store.append(current):
+            print(f"  Capture at {current['timestamp']} already stored")
+        for event in mood_store.record_transitions([current]):
+            print(f"  Zone transition: {event['from']} -> {event['to']}")
         
-        # Save
-        save_history(history)
-        print(f"  Saved to {MOOD_HISTORY_FILE}")
+        # Re-export the trail file and the current mood
+        result = mood_store.export(MOOD_HISTORY_FILE)
+        print(f"  Saved to {MOOD_HISTORY_FILE} ({result['trail']['hourly']} hourly, {result['trail']['daily']} daily points)")
+        publish_current(current)
+        print(f"  Saved to {MOOD_CURRENT_FILE}")
         
         return 0
         
-    except urllib.error.URLError as e:
+    except OSError as e:
         print(f"  ERROR: Network error - {e}")
         return 1
     except Exception as e:
@@ -157,5 +210,80 @@ def main():
         return 1
 
 
+def hour_of(point: dict) -> str:
+    return point["timestamp"][:13]
+
+
+def watch(interval: int = SAMPLE_MINUTES, stop: threading.Event = None) -> int:
+    """Sample every interval minutes until stop is set"""
+    stop = stop or threading.Event()
+    window = mood_window.RollingWindow(max(1, WINDOW_HOURS * 60 // interval), EMA_SAMPLES)
+    bootstrap_store()
+    for point in mood_store.recent_raw(datetime.now(timezone.utc) - timedelta(hours=WINDOW_HOURS)):
+        if point.get("breadth") is not None and point.get("mv") is not None:
+            window.push(point)
+    print(f"[{datetime.now(timezone.utc).isoformat()}] Watching market mood every {interval} min "
+          f"({window.size}-sample window, {len(window)} warmed from the store)", flush=True)
+    
+    pending = []  # Samples not yet in the store
+    while not stop.is_set():
+        try:
+            with tracing.span("mood_sample", interval_min=interval) as span:
+                # A snapshot from the last half interval (e.g. a brief's) counts as fresh,
+                # unless it is the one the previous sample came from
+                current = mood_store.normalize(calculate_mood_data(max_age=interval * 30))
+                latest = window.latest()
+                if latest and current["timestamp"] <= latest["timestamp"]:
+                    current = mood_store.normalize(calculate_mood_data(max_age=0))
+                if latest and current["timestamp"] <= latest["timestamp"]:
+                    span.set(outcome="skipped")
+                    print(f"  No new snapshot since {latest['timestamp']}")
+                else:
+                    window.push(current)
+                    pending.append(current)
+                    if hour_of(pending[0]) != hour_of(current):
+                        stored = mood_store.append_many(pending)
+                        print(f"  Flushed {stored} samples to the store")
+                        pending = []
+                    for event in mood_store.record_transitions([current]):
+                        print(f"  Zone transition: {event['from']} -> {event['to']}")
+                    aggregates = window.aggregates()
+                    intraday = window.trail()
+                    mood_store.export(MOOD_HISTORY_FILE, extra={
+                        "intraday": intraday,
+                        "aggregates": aggregates,
+                        "sample_minutes": interval,
+                    })
+                    publish_current(current, intraday, aggregates)
+                    print(f"  {current['timestamp']}  breadth {current['breadth']}% "
+                          f"(EMA {aggregates['breadth']['ema']})  M/V {current['mv']}x (EMA {aggregates['mv']['ema']})",
+                          flush=True)
+        except Exception as e:
+            print(f"  ERROR: {e}", flush=True)
+        
+        # Sample on interval boundaries (:00, :05, ...)
+        now = time.time()
+        stop.wait(interval * 60 - now % (interval * 60))
+    
+    if pending:
+        print(f"  Flushed {mood_store.append_many(pending)} samples to the store")
+    return 0
+
+
 if __name__ == "__main__":
-    sys.exit(main())
+    parser = argparse.ArgumentParser(description="Capture market mood data")
+    parser.add_argument("--watch", action="store_true", help="sample continuously instead of once")
+    parser.add_argument("--interval", type=int, default=SAMPLE_MINUTES, help="minutes between samples (--watch)")
+    opts = parser.parse_args()
+    
+    if opts.watch:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        sys.exit(watch(max(1, opts.interval), stop))
+    
+    with tracing.span("capture") as span:
+        status = main()
+        if status:
+            span.set(outcome="error")
+    sys.exit(status)
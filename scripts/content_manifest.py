@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Content manifest - The Litmus
+Maintains content/index.json: one file describing every published artifact.
+
+Instead of fetching six regional briefs, week-ahead.json and magazine.json
+to learn what is fresh, the front end can make one conditional request for
+the manifest and fetch only the entries whose hash changed:
+
+    {
+      "updated_at": "...",
+      "artifacts": {
+        "content/apac/morning.json": {
+          "path", "hash", "bytes", "generated_at", "headline", "updated_at"
+        },
+        ...
+      }
+    }
+
+The manifest is always rebuilt from the artifacts on disk, never patched
+entry by entry, so it is a pure function of the content/ tree: a workflow
+that rebases onto another workflow's push just rebuilds it and gets the
+right index for both. The previous manifest is only consulted to keep an
+entry's updated_at while its hash is unchanged; the top-level updated_at is
+the newest entry's, so two rebuilds of the same tree give the same bytes.
+
+save_brief, the weekend magazine and the audio URL update call rebuild()
+after content_writer.write_json(). The rebuild runs under an exclusive file
+lock (fcntl, plus a thread lock for batch runs), and the manifest is only
+rewritten when it actually changed.
+
+Usage (the workflows run this after `git pull --rebase`):
+    python scripts/content_manifest.py
+
+Configuration:
+- CONTENT_MANIFEST_FILE: manifest location (default content/index.json)
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import content_writer
+
+try:
+    import fcntl
+except ImportError:  # Windows - the thread lock still serialises batch runs
+    fcntl = None
+
+SCRIPT_DIR = Path(__file__).parent
+MANIFEST_FILE = Path(os.environ.get("CONTENT_MANIFEST_FILE", SCRIPT_DIR.parent / "content" / "index.json"))
+
+_thread_lock = threading.Lock()
+
+
+def site_root() -> Path:
+    """Directory the artifact paths are relative to (the one holding content/)"""
+    return MANIFEST_FILE.resolve().parent.parent
+
+
+@contextlib.contextmanager
+def manifest_lock():
+    """Exclusive lock across threads and processes for the manifest rebuild"""
+    lock_file = site_root() / ".cache" / "content-index.lock"
+    with _thread_lock:
+        if fcntl is None:
+            yield
+            return
+        lock_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_file, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get("artifacts"), dict):
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"updated_at": None, "artifacts": {}}
+
+
+def headline_of(data: dict) -> str:
+    """Briefs carry a top-level headline; the magazine's lives under hero"""
+    return data.get("headline") or (data.get("hero") or {}).get("headline", "")
+
+
+def artifact_paths() -> list:
+    """Every published JSON under content/, the manifest itself excluded"""
+    manifest = MANIFEST_FILE.resolve()
+    return sorted(p for p in (site_root() / "content").glob("**/*.json") if p.resolve() != manifest)
+
+
+def scan(previous: dict) -> dict:
+    """Manifest entries for the artifacts on disk, keyed by path relative to the site root"""
+    now = datetime.now(timezone.utc).isoformat()
+    artifacts = {}
+    for path in artifact_paths():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  Skipping {path}: {e}")
+            continue
+        if not isinstance(data, dict):
+            continue
+        key = path.relative_to(site_root()).as_posix()
+        entry = {
+            "path": key,
+            "hash": content_writer.canonical_hash(data),
+            "bytes": path.stat().st_size,
+            "generated_at": data.get("generated_at"),
+            "headline": headline_of(data),
+        }
+        old = previous.get(key, {})
+        unchanged = all(old.get(field) == value for field, value in entry.items())
+        entry["updated_at"] = old.get("updated_at") if unchanged and old.get("updated_at") else now
+        artifacts[key] = entry
+    return artifacts
+
+
+def rebuild() -> bool:
+    """Rebuild the manifest from the content/ tree; returns True if it changed"""
+    with manifest_lock():
+        previous = load_manifest()
+        artifacts = scan(previous["artifacts"])
+        if artifacts == previous["artifacts"]:
+            return False
+        manifest = {
+            "updated_at": max((entry["updated_at"] for entry in artifacts.values()), default=None),
+            "artifacts": artifacts,
+        }
+        content_writer.write_json(MANIFEST_FILE, manifest)
+
+    changed = sorted(key for key in artifacts.keys() | previous["artifacts"].keys()
+                     if artifacts.get(key) != previous["artifacts"].get(key))
+    print(f"  Manifest updated: {', '.join(changed)}")
+    return True
+
+
+def main():
+    rebuild()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
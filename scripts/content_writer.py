@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Content writer - The Litmus
+Atomic, change-detecting JSON writes for everything the site serves.
+
+save_brief, the weekend magazine, the audio URL update and the mood history
+all go through write_json():
+
+- the payload is written to a temp file in the same directory, fsynced and
+  renamed over the live file, so a crash mid-write never leaves a truncated
+  file for the site to serve
+- if the canonical form (sorted keys, no whitespace) of the new payload
+  hashes the same as what is already on disk, nothing is written - the
+  commit step sees no diff and no redeploy is triggered
+- compact=True (or CONTENT_JSON_COMPACT=1) drops the indentation
+- minified .json.gz and .json.br siblings are written next to the file so
+  the static layer can serve precompressed bytes (brotli needs the optional
+  `brotli` package; without it only .gz is produced)
+
+Size report for everything already published:
+    python scripts/content_writer.py [--rebuild]
+
+Configuration:
+- CONTENT_JSON_COMPACT: default serialization (0 = indent=2, 1 = compact)
+- CONTENT_PRECOMPRESS=0 disables the .gz/.br siblings
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import tracing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SCRIPT_DIR = Path(__file__).parent
+REPO_DIR = SCRIPT_DIR.parent
+
+COMPACT_DEFAULT = os.environ.get("CONTENT_JSON_COMPACT", "0") == "1"
+PRECOMPRESS = os.environ.get("CONTENT_PRECOMPRESS", "1") != "0"
+
+# Published JSON covered by the size report
+PUBLISHED_GLOBS = ["content/**/*.json", "data/*.json"]
+
+_tmp_counter = 0
+_tmp_lock = threading.Lock()
+
+
+def canonical_hash(data) -> str:
+    """sha256 of the canonical serialization - independent of indentation and key order"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def serialize(data, compact: bool = None, ensure_ascii: bool = True) -> bytes:
+    compact = COMPACT_DEFAULT if compact is None else compact
+    if compact:
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=ensure_ascii)
+    else:
+        text = json.dumps(data, indent=2, ensure_ascii=ensure_ascii)
+    return text.encode("utf-8")
+
+
+def existing_hash(path: Path):
+    """Canonical hash of the JSON currently at path, or None if missing/unreadable"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return canonical_hash(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def atomic_write(path: Path, payload: bytes):
+    """Write payload to path via temp file + fsync + rename"""
+    global _tmp_counter
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _tmp_lock:
+        _tmp_counter += 1
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{_tmp_counter}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # Persist the rename itself (POSIX only)
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def sibling(path: Path, suffix: str) -> Path:
+    """content/apac/morning.json -> content/apac/morning.json.gz"""
+    return path.with_name(path.name + suffix)
+
+
+def write_precompressed(path: Path, data) -> dict:
+    """Write minified .gz (and .br if available) siblings; returns {suffix: bytes}
+
+    gzip is written with mtime=0 so identical content gives identical bytes
+    and the siblings never show up as spurious git changes.
+    """
+    minified = serialize(data, compact=True, ensure_ascii=False)
+    sizes = {".min": len(minified)}
+
+    compressed = gzip.compress(minified, compresslevel=9, mtime=0)
+    atomic_write(sibling(path, ".gz"), compressed)
+    sizes[".gz"] = len(compressed)
+
+    if brotli is not None:
+        compressed = brotli.compress(minified, mode=brotli.MODE_TEXT, quality=11)
+        atomic_write(sibling(path, ".br"), compressed)
+        sizes[".br"] = len(compressed)
+    return sizes
+
+
+def siblings_missing(path: Path) -> bool:
+    suffixes = [".gz", ".br"] if brotli is not None else [".gz"]
+    return any(not sibling(path, suffix).exists() for suffix in suffixes)
+
+
+def format_sizes(sizes: dict) -> str:
+    parts = [f"json {sizes['bytes'] / 1024:.1f}KB"]
+    for suffix, label in ((".min", "min"), (".gz", "gz"), (".br", "br")):
+        if suffix in sizes:
+            parts.append(f"{label} {sizes[suffix] / 1024:.1f}KB")
+    return ", ".join(parts)
+
+
+def write_json(path, data, compact: bool = None, ensure_ascii: bool = True,
+               precompress: bool = None) -> dict:
+    """Atomically write data as JSON unless the file already holds the same content
+
+    Returns {"path", "written", "bytes", "hash", "sizes"}; written is False
+    when the on-disk content was already identical. sizes maps ".min", ".gz"
+    and ".br" to sibling sizes when they were (re)written.
+    """
+    path = Path(path)
+    precompress = PRECOMPRESS if precompress is None else precompress
+    with tracing.span("save", path=str(path)) as span:
+        content_hash = canonical_hash(data)
+        result = {"path": path, "written": False, "hash": content_hash, "sizes": {}}
+
+        if existing_hash(path) == content_hash:
+            result["bytes"] = path.stat().st_size
+        else:
+            payload = serialize(data, compact, ensure_ascii)
+            atomic_write(path, payload)
+            result.update(written=True, bytes=len(payload))
+
+        if precompress and (result["written"] or siblings_missing(path)):
+            result["sizes"] = write_precompressed(path, data)
+            print(f"  Sizes {path.name}: {format_sizes({'bytes': result['bytes'], **result['sizes']})}")
+
+        span.set(written=result["written"], bytes_out=result["bytes"] if result["written"] else 0,
+                 **{f"bytes{suffix.replace('.', '_')}": size for suffix, size in result["sizes"].items()})
+        return result
+
+
+# ============================================================================
+# SIZE REPORT
+# ============================================================================
+
+def size_report(rebuild: bool = False) -> list:
+    """Sizes of every published JSON and its siblings, optionally rebuilding the siblings"""
+    rows = []
+    for pattern in PUBLISHED_GLOBS:
+        for path in sorted(REPO_DIR.glob(pattern)):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"  Skipping {path}: {e}")
+                continue
+            row = {"path": str(path.relative_to(REPO_DIR)), "bytes": path.stat().st_size}
+            if rebuild:
+                row.update(write_precompressed(path, data))
+            else:
+                row[".min"] = len(serialize(data, compact=True, ensure_ascii=False))
+                for suffix in (".gz", ".br"):
+                    if sibling(path, suffix).exists():
+                        row[suffix] = sibling(path, suffix).stat().st_size
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size report for published JSON and its precompressed siblings")
+    parser.add_argument("--rebuild", action="store_true", help="(re)write the .gz/.br siblings first")
+    opts = parser.parse_args()
+
+    rows = size_report(opts.rebuild)
+    print(f"{'file':<36} {'json':>9} {'min':>9} {'gz':>9} {'br':>9}")
+
+    def cell(row, key):
+        return f"{row[key] / 1024:.1f}KB" if key in row else "-"
+
+    for row in rows:
+        print(f"{row['path']:<36} {cell(row, 'bytes'):>9} {cell(row, '.min'):>9} {cell(row, '.gz'):>9} {cell(row, '.br'):>9}")
+
+    total = sum(row["bytes"] for row in rows)
+    best = sum(row.get(".br", row.get(".gz", row["bytes"])) for row in rows)
+    if total:
+        print(f"\n{len(rows)} files: {total / 1024:.1f}KB served as-is, {best / 1024:.1f}KB precompressed "
+              f"({(1 - best / total) * 100:.0f}% smaller)")
+    if brotli is None:
+        print("brotli not installed - only .gz siblings are produced (pip install brotli)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,15 +13,21 @@ Run: python scripts/generate_audio.py
 import os
 import json
 import re
-import requests
 from datetime import datetime
 from pathlib import Path
 
+import content_manifest
+import content_writer
+import http_client
+import retry
+import tracing
+
 # Configuration
 ELEVENLABS_API_KEY = os.environ.get('ELEVENLABS_API_KEY')
 ELEVENLABS_VOICE_ID = os.environ.get('ELEVENLABS_VOICE_ID', '21m00Tcm4TlvDq8ikWAM')  # Adam
 CONTENT_DIR = Path('content/weekend')
 AUDIO_DIR = CONTENT_DIR / 'audio'
+TTS_BUDGET = 600  # Seconds for the ElevenLabs call, retries included
 
 # Voice settings for FT-quality narration
 VOICE_SETTINGS = {
@@ -133,30 +139,35 @@ def generate_audio(text, output_path):
     
     print(f"🎙️ Generating audio ({len(text)} characters)...")
     
-    try:
-        response = requests.post(url, json=data, headers=headers, timeout=120)
-        
-        if response.status_code == 200:
-            # Ensure directory exists
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
-            
-            size_mb = len(response.content) / (1024 * 1024)
-            print(f"✅ Audio saved: {output_path} ({size_mb:.1f} MB)")
-            return True
-        else:
-            print(f"❌ ElevenLabs error: {response.status_code}")
-            print(response.text)
+    policy = retry.RetryPolicy("ElevenLabs", max_attempts=3, base_delay=2, budget=TTS_BUDGET)
+    
+    with tracing.span("tts", bytes_out=len(text), voice=ELEVENLABS_VOICE_ID) as span:
+        try:
+            response = policy.call(lambda _: http_client.post(
+                url, json_body=data, headers=headers, timeout=policy.timeout(120)
+            ).raise_for_status())
+            span.set(bytes_in=len(response.content), attempts=policy.attempts_made)
+                
+        except http_client.HTTPError as e:
+            print(f"❌ ElevenLabs error: {e.status}")
+            print(e.body.decode("utf-8", "replace"))
+            span.set(outcome="error", status=e.status, attempts=policy.attempts_made)
             return False
-            
-    except requests.exceptions.Timeout:
-        print("❌ Request timed out")
-        return False
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Request failed: {e}")
-        return False
+        except TimeoutError:
+            print("❌ Request timed out")
+            span.set(outcome="timeout", attempts=policy.attempts_made)
+            return False
+        except OSError as e:
+            print(f"❌ Request failed: {e}")
+            span.set(outcome="error", error=str(e), attempts=policy.attempts_made)
+            return False
+    
+    with tracing.span("save", path=str(output_path), bytes_out=len(response.content)):
+        content_writer.atomic_write(output_path, response.content)
+    
+    size_mb = len(response.content) / (1024 * 1024)
+    print(f"✅ Audio saved: {output_path} ({size_mb:.1f} MB)")
+    return True
 
 def update_magazine_json(audio_url):
     """Update magazine.json with the audio URL"""
@@ -168,8 +179,8 @@ def update_magazine_json(audio_url):
         
         data['audio_url'] = str(audio_url)
         
-        with open(magazine_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        content_writer.write_json(magazine_path, data, ensure_ascii=False)
+        content_manifest.rebuild()
         
         print(f"✅ Updated magazine.json with audio_url")
         return True
@@ -224,5 +235,8 @@ def main():
         return False
 
 if __name__ == '__main__':
-    success = main()
+    with tracing.span("audio") as span:
+        success = main()
+        if not success:
+            span.set(outcome="error")
     exit(0 if success else 1)
@@ -15,21 +15,41 @@ import sys
 import re
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-import urllib.request
-import urllib.error
-import urllib.parse
 import time
-import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import anthropic_stream
+import content_manifest
+import content_writer
+import hedging
+import http_client
+import json_repair
+import keyword_matcher
+import llm_cache
+import market_snapshot
+import retry
+import tracing
+import unsplash
 
 # Configuration
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 MODEL = "claude-opus-4-5-20251101"  # Opus 4.5 for premium editorial quality
 TEMPERATURE = 0.55  # Slightly lower for more consistent JSON output
-MAX_RETRIES = 2  # Retry on JSON parse failures
-
-# API endpoints
-COINGECKO_GLOBAL = "https://api.coingecko.com/api/v3/global"
-COINGECKO_COINS = "https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=10&page=1&sparkline=false&price_change_percentage=24h,7d"
+MAX_RETRIES = 2  # Retry on JSON parse failures and transient API errors
+SLOT_GRACE_MINUTES = 20  # A brief may land this late after its publication slot
+MIN_GENERATION_BUDGET = 240  # Seconds - floor for manual runs far from a slot
+MAX_GENERATION_BUDGET = 900  # Seconds - cap for runs started well before a slot
+ANTHROPIC_STREAM = os.environ.get("ANTHROPIC_STREAM", "1") != "0"  # Stream and abort early on broken JSON
+# A blocking request cannot be cancelled, so a losing hedge would run to completion and be billed
+HEDGE_ENABLED = hedging.HEDGE_ENABLED and ANTHROPIC_STREAM
+
+# Batch mode
+BRIEF_REGIONS = ["apac", "emea", "americas"]
+BRIEF_TYPES = ["morning", "evening"]
+BATCH_CONCURRENCY = int(os.environ.get("BRIEF_CONCURRENCY", "3"))  # Parallel briefs in one run
+BRIEF_SHARDED = os.environ.get("BRIEF_SHARDED", "0") == "1"  # Generate sections as parallel shards
+SHARD_MAX_TOKENS = 1500  # One section (or the headline + lead) fits well within this
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
@@ -138,23 +158,43 @@ FALLBACK_IMAGES = {
     "evening": "photo-1472120435266-53107fd0c44a",  # Sunset
 }
 
-# Unsplash API configuration
-UNSPLASH_ACCESS_KEY = os.environ.get("UNSPLASH_ACCESS_KEY", "")
-UNSPLASH_API_URL = "https://api.unsplash.com/search/photos"
+# Image keyword vocabulary - classified in one pass by keyword_matcher
+IMAGE_KEYWORD_TERMS = {
+    # Dark/moody terms that lead to oppressive imagery
+    "dark": ["dark", "dramatic", "storm", "night", "moody", "shadows", "noir", "fog", "mist", "overcast", "gloomy", "brooding", "atmospheric", "cold", "harsh", "blue hour"],
+    "brightness": ["bright", "sunlit", "daylight", "clear", "sunny", "golden", "light", "morning", "dawn"],
+    # Location keywords (most important for editorial feel)
+    "location": [
+        "canary wharf", "london", "city of london", "frankfurt", "dubai", "paris",
+        "hong kong", "singapore", "tokyo", "sydney", "victoria harbour", "marina bay",
+        "manhattan", "wall street", "new york", "chicago", "san francisco",
+        "financial district", "skyline", "tower", "skyscraper"
+    ],
+    # Preferred light/bright mood terms
+    "preferred_mood": [
+        "dawn", "sunrise", "morning", "golden hour", "light", "bright", "clear sky",
+        "sunny", "airy", "calm", "soft light", "blue sky"
+    ],
+    # Other acceptable mood terms
+    "mood": [
+        "dawn", "sunrise", "morning", "sunset", "dusk", "evening",
+        "golden hour", "light", "fog", "mist", "calm", "quiet", "bright", "clear"
+    ],
+    # A mood keyword with one of these already reads as light
+    "light": ["light", "bright", "sunny", "morning", "dawn", "sunrise", "clear"],
+}
+
+IMAGE_KEYWORD_MATCHER = keyword_matcher.KeywordMatcher(IMAGE_KEYWORD_TERMS, curated=CURATED_IMAGES)
 
-import random
+# Unsplash search results are cached on disk - see unsplash.py
 
 def fetch_unsplash_image(keywords: str, region: str = "", brief_type: str = "morning") -> str:
-    """Fetch image from Unsplash API with variety and regional context
+    """Fetch image from Unsplash (via the shared search cache) with variety and regional context
     
     IMPORTANT: We prefer light, bright, optimistic imagery.
     Dark, moody, dramatic images feel oppressive and don't match our editorial tone.
     """
     
-    if not UNSPLASH_ACCESS_KEY:
-        print("  Warning: UNSPLASH_ACCESS_KEY not set, using fallback")
-        return None
-    
     # Parse keywords
     query_parts = [k.strip() for k in keywords.split(",") if k.strip()]
     
@@ -162,56 +202,27 @@ def fetch_unsplash_image(keywords: str, region: str = "", brief_type: str = "mor
         print("  Warning: No keywords provided")
         return None
     
+    # Classify every keyword in one pass
+    matches = IMAGE_KEYWORD_MATCHER.match(query_parts)
+    
     # Filter out dark/moody terms that lead to oppressive imagery
-    dark_terms = ["dark", "dramatic", "storm", "night", "moody", "shadows", "noir", "fog", "mist", "overcast", "gloomy", "brooding", "atmospheric", "cold", "harsh", "blue hour"]
-    query_parts = [kw for kw in query_parts if not any(dark in kw.lower() for dark in dark_terms)]
+    query_parts = matches.keywords_not_in("dark")
+    kept_hits = [hits for hits in matches.hits if "dark" not in hits]
     
     # Always add brightness term if not present
-    brightness_terms = ["bright", "sunlit", "daylight", "clear", "sunny", "golden", "light", "morning", "dawn"]
-    has_brightness = any(any(b in kw.lower() for b in brightness_terms) for kw in query_parts)
-    if not has_brightness:
+    if not any("brightness" in hits for hits in kept_hits):
         query_parts.append("bright sunlight")
+        kept_hits.append(IMAGE_KEYWORD_MATCHER.categories_of("bright sunlight"))
     
     # Strategy: Try location-focused search first, then broaden if needed
     # Unsplash works better with 2-3 keywords than 5+
     
     # Identify location keywords (most important for editorial feel)
-    location_keywords = []
-    mood_keywords = []
-    
-    location_terms = [
-        "canary wharf", "london", "city of london", "frankfurt", "dubai", "paris",
-        "hong kong", "singapore", "tokyo", "sydney", "victoria harbour", "marina bay",
-        "manhattan", "wall street", "new york", "chicago", "san francisco",
-        "financial district", "skyline", "tower", "skyscraper"
-    ]
-    
-    # Preferred light/bright mood terms
-    preferred_mood_terms = [
-        "dawn", "sunrise", "morning", "golden hour", "light", "bright", "clear sky",
-        "sunny", "airy", "calm", "soft light", "blue sky"
-    ]
-    
-    # Other acceptable mood terms
-    mood_terms = [
-        "dawn", "sunrise", "morning", "sunset", "dusk", "evening",
-        "golden hour", "light", "fog", "mist", "calm", "quiet", "bright", "clear"
-    ]
-    
-    for kw in query_parts:
-        kw_lower = kw.lower()
-        if any(loc in kw_lower for loc in location_terms):
-            location_keywords.append(kw)
-        elif any(mood in kw_lower for mood in mood_terms):
-            mood_keywords.append(kw)
-        else:
-            mood_keywords.append(kw)
+    location_keywords = [kw for kw, hits in zip(query_parts, kept_hits) if "location" in hits]
+    mood_keywords = [kw for kw, hits in zip(query_parts, kept_hits) if "location" not in hits]
     
     # Ensure we have a brightness-related term
-    has_light_term = any(
-        any(light in kw.lower() for light in ["light", "bright", "sunny", "morning", "dawn", "sunrise", "clear"])
-        for kw in mood_keywords
-    )
+    has_light_term = any("light" in hits for hits in kept_hits if "location" not in hits)
     
     # Build search query: prioritize 1-2 location + 1 mood keyword
     search_parts = []
@@ -232,77 +243,8 @@ def fetch_unsplash_image(keywords: str, region: str = "", brief_type: str = "mor
     print(f"  Unsplash search: '{search_query}'")
     
     try:
-        # Call Unsplash API
-        params = urllib.parse.urlencode({
-            "query": search_query,
-            "per_page": 10,
-            "orientation": "landscape",
-            "content_filter": "high"
-        })
-        
-        url = f"{UNSPLASH_API_URL}?{params}"
-        req = urllib.request.Request(url, headers={
-            "Authorization": f"Client-ID {UNSPLASH_ACCESS_KEY}",
-            "User-Agent": "TheLitmus/1.0"
-        })
-        
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode())
-        
-        results = data.get("results", [])
-        
-        if not results:
-            print(f"  No Unsplash results for: {search_query}")
-            # Try a broader search with just the first keyword
-            if len(query_parts) > 1:
-                print(f"  Retrying with broader search: '{query_parts[0]}'")
-                params = urllib.parse.urlencode({
-                    "query": query_parts[0],
-                    "per_page": 10,
-                    "orientation": "landscape"
-                })
-                url = f"{UNSPLASH_API_URL}?{params}"
-                req = urllib.request.Request(url, headers={
-                    "Authorization": f"Client-ID {UNSPLASH_ACCESS_KEY}",
-                    "User-Agent": "TheLitmus/1.0"
-                })
-                with urllib.request.urlopen(req, timeout=15) as resp:
-                    data = json.loads(resp.read().decode())
-                results = data.get("results", [])
-            
-            if not results:
-                return None
-        
-        print(f"  Found {len(results)} images")
-        
-        # Pick randomly from top results (weighted toward higher quality)
-        if len(results) >= 5:
-            weights = [3, 3, 2, 2, 1, 1, 1, 1, 1, 1][:len(results)]
-            selected = random.choices(results, weights=weights, k=1)[0]
-        else:
-            selected = random.choice(results)
-        
-        # Safely get the image URL
-        if not selected:
-            print("  Error: No image selected")
-            return None
-            
-        urls = selected.get("urls")
-        if not urls:
-            print("  Error: No URLs in selected image")
-            return None
-            
-        raw_url = urls.get("raw", "")
-        if raw_url:
-            # Add Unsplash parameters for consistent sizing
-            image_url = f"{raw_url}&w=1400&h=500&fit=crop&q=80"
-            desc = selected.get('description') or selected.get('alt_description') or 'No description'
-            print(f"  Selected: {desc[:60]}...")
-            return image_url
-        
-        print("  Error: No raw URL found")
-        return None
-        
+        broad_query = query_parts[0] if len(query_parts) > 1 else None
+        return unsplash.find_image(search_query, broad_query)
     except Exception as e:
         print(f"  Unsplash API error: {e}")
         return None
@@ -321,16 +263,10 @@ def build_image_url(keywords: str, fallback: str = "default", region: str = "",
         photo_id = FALLBACK_IMAGES.get(fallback, FALLBACK_IMAGES["default"])
         return f"https://images.unsplash.com/{photo_id}?w=1400&h=500&fit=crop&q=80"
     
-    # Clean keywords
-    keyword_list = [k.strip().lower() for k in keywords.split(",")]
-    
-    # Find first matching curated image
-    for keyword in keyword_list:
-        # Check each word in multi-word keywords
-        for word in keyword.split():
-            if word in CURATED_IMAGES:
-                photo_id = CURATED_IMAGES[word]
-                return f"https://images.unsplash.com/{photo_id}?w=1400&h=500&fit=crop&q=80"
+    # Find first matching curated image (whole words, in keyword order)
+    photo_id = IMAGE_KEYWORD_MATCHER.match(keywords.split(",")).curated
+    if photo_id:
+        return f"https://images.unsplash.com/{photo_id}?w=1400&h=500&fit=crop&q=80"
     
     # No match found, use fallback
     photo_id = FALLBACK_IMAGES.get(fallback, FALLBACK_IMAGES["default"])
@@ -338,17 +274,11 @@ def build_image_url(keywords: str, fallback: str = "default", region: str = "",
 
 
 def fetch_market_data() -> dict:
-    """Fetch live market data from CoinGecko"""
+    """Fetch live market data from CoinGecko (via the shared market snapshot)"""
     try:
-        # Global data
-        req = urllib.request.Request(COINGECKO_GLOBAL, headers={"User-Agent": "TheLitmus/1.0"})
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            global_data = json.loads(resp.read().decode())
-        
-        # Top coins
-        req = urllib.request.Request(COINGECKO_COINS, headers={"User-Agent": "TheLitmus/1.0"})
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            coins = json.loads(resp.read().decode())
+        snapshot = market_snapshot.get_snapshot()
+        global_data = snapshot["global"]
+        coins = snapshot["coins"][:10]
         
         btc = next((c for c in coins if c["id"] == "bitcoin"), {})
         eth = next((c for c in coins if c["id"] == "ethereum"), {})
@@ -384,69 +314,29 @@ def fetch_market_data() -> dict:
 # ROBUST JSON EXTRACTION
 # ============================================================================
 
-def clean_json_string(json_str: str) -> str:
-    """Clean common JSON issues from AI-generated content"""
-    
-    # Remove markdown code blocks if present
-    json_str = re.sub(r'^```json\s*', '', json_str)
-    json_str = re.sub(r'^```\s*', '', json_str)
-    json_str = re.sub(r'\s*```$', '', json_str)
-    
-    # Fix common issues inside string values
-    # This is tricky - we need to handle quotes inside JSON string values
-    
-    # Remove control characters except newlines and tabs
-    json_str = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', json_str)
-    
-    # Fix trailing commas before closing brackets (common AI mistake)
-    json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
-    
-    return json_str
-
-
 def extract_json_from_response(text: str) -> dict:
-    """Safely extract JSON from AI response with multiple fallback strategies"""
+    """Safely extract JSON from AI response
+    
+    One tolerant pass (json_repair) handles code fences, trailing commas,
+    control characters, unescaped quotes and truncation; regex extraction of
+    the essential fields remains as the last resort.
+    """
     
     if not text or not text.strip():
         raise ValueError("Empty response from API")
     
-    # Strategy 1: Try direct parse (response might be pure JSON)
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-    
-    # Strategy 2: Find JSON object in response
-    json_match = re.search(r'\{[\s\S]*\}', text)
-    if not json_match:
-        raise ValueError("No JSON object found in response")
-    
-    json_str = json_match.group()
-    
-    # Strategy 3: Try parsing the extracted JSON
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        print(f"  JSON parse attempt 1 failed: {e}")
-    
-    # Strategy 4: Clean the JSON and try again
-    cleaned = clean_json_string(json_str)
     try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError as e:
-        print(f"  JSON parse attempt 2 failed: {e}")
-    
-    # Strategy 5: Try to fix unescaped quotes in string values
-    # This is a more aggressive approach
-    try:
-        # Find all string values and escape internal quotes
-        fixed = fix_unescaped_quotes(cleaned)
-        return json.loads(fixed)
-    except (json.JSONDecodeError, Exception) as e:
-        print(f"  JSON parse attempt 3 failed: {e}")
-    
-    # Strategy 6: Extract just the essential fields manually
+        data, repairs = json_repair.parse_json_tolerant(text)
+        if repairs:
+            print(f"  Repaired JSON: {json_repair.format_repairs(repairs)}")
+            tracing.current().set(repairs=json_repair.format_repairs(repairs))
+        return data
+    except ValueError as e:
+        print(f"  Tolerant JSON parse failed: {e}")
+    
+    # Last resort: extract just the essential fields manually
     try:
+        tracing.current().set(outcome="fallback")
         return extract_essential_fields(text)
     except Exception as e:
         print(f"  Essential field extraction failed: {e}")
@@ -454,44 +344,6 @@ def extract_json_from_response(text: str) -> dict:
     raise ValueError(f"Could not parse JSON after all attempts. First 500 chars: {text[:500]}")
 
 
-def fix_unescaped_quotes(json_str: str) -> str:
-    """Attempt to fix unescaped quotes inside JSON string values"""
-    result = []
-    in_string = False
-    escape_next = False
-    
-    for i, char in enumerate(json_str):
-        if escape_next:
-            result.append(char)
-            escape_next = False
-            continue
-        
-        if char == '\\':
-            escape_next = True
-            result.append(char)
-            continue
-        
-        if char == '"':
-            if not in_string:
-                in_string = True
-                result.append(char)
-            else:
-                # Check if this quote ends the string
-                # Look ahead for : , } ] which would indicate end of string
-                rest = json_str[i+1:i+20].lstrip()
-                if rest and rest[0] in ':,}]\n':
-                    in_string = False
-                    result.append(char)
-                else:
-                    # This might be an unescaped quote inside string
-                    result.append('\\"')
-                    continue
-        else:
-            result.append(char)
-    
-    return ''.join(result)
-
-
 def extract_essential_fields(text: str) -> dict:
     """Last resort: extract essential fields using regex"""
     
@@ -525,67 +377,105 @@ def extract_essential_fields(text: str) -> dict:
 
 
 
+# ============================================================================
+# PROMPT CACHING
+# ============================================================================
+# Each prompt builder returns (static_prefix, dynamic_suffix). The static
+# prefix - publication identity, mandate, structure rules, voice, image
+# guidance and JSON rules - is identical across regions and runs, so it is
+# sent as a system block marked with cache_control and read back from the
+# prompt cache on subsequent briefs. Only the suffix (region context and
+# market numbers) is billed at the full input rate.
+
+PROMPT_CACHE_STATS = {"hits": 0, "misses": 0, "uncached": 0, "read_tokens": 0, "write_tokens": 0}
+_prompt_cache_lock = threading.Lock()
+
+
+def record_prompt_cache_usage(usage: dict):
+    """Count a prompt cache hit/miss from a Messages API usage block"""
+    read_tokens = usage.get("cache_read_input_tokens") or 0
+    write_tokens = usage.get("cache_creation_input_tokens") or 0
+
+    with _prompt_cache_lock:
+        if read_tokens:
+            PROMPT_CACHE_STATS["hits"] += 1
+            outcome = "hit"
+        elif write_tokens:
+            PROMPT_CACHE_STATS["misses"] += 1
+            outcome = "miss"
+        else:
+            PROMPT_CACHE_STATS["uncached"] += 1
+            outcome = "not cached"
+        PROMPT_CACHE_STATS["read_tokens"] += read_tokens
+        PROMPT_CACHE_STATS["write_tokens"] += write_tokens
+
+    print(f"  Prompt cache {outcome} (read {read_tokens}, written {write_tokens}, uncached input {usage.get('input_tokens', 0)} tokens)")
+
+
+def build_request_prompt(prompt, attempt: int = 1) -> tuple:
+    """Split a prompt into (system blocks, user text) for the Messages API
+
+    prompt is either a plain string or a (static_prefix, dynamic_suffix) tuple.
+    """
+    if isinstance(prompt, tuple):
+        static_prefix, dynamic_suffix = prompt
+    else:
+        static_prefix, dynamic_suffix = "", prompt
+
+    # Add stronger JSON instruction on retries (kept out of the cached prefix)
+    if attempt > 1:
+        dynamic_suffix += "\n\nIMPORTANT: Previous attempt failed JSON parsing. Please ensure valid JSON with properly escaped quotes."
+
+    system = []
+    if static_prefix:
+        system.append({"type": "text", "text": static_prefix, "cache_control": {"type": "ephemeral"}})
+    return system, dynamic_suffix
+
+
 # ============================================================================
 # MORNING BRIEF PROMPT - Premium Editorial Quality
 # ============================================================================
 
-def get_morning_prompt(region: str, market_data: dict) -> str:
-    """Generate the morning brief prompt - FT quality editorial"""
-    
-    region_context = {
-        "apac": {
-            "name": "Asia-Pacific",
-            "timezone": "SGT/HKT",
-            "overnight": "US close and European session",
-            "readers": "institutional investors in Singapore, Hong Kong, Tokyo, Sydney",
-            "local_factors": "Hong Kong regulatory developments, Japan institutional flows, Korean retail sentiment, Australian macro policy, Chinese economic signals",
-            "trading_hours": "Asian trading hours with US and European markets closed",
-            "overnight_window": "18:00 SGT yesterday to 06:00 SGT today",
-            "landmarks": "Hong Kong skyline, Singapore Marina Bay, Tokyo Marunouchi, Sydney CBD, Victoria Harbour"
-        },
-        "emea": {
-            "name": "Europe, Middle East & Africa", 
-            "timezone": "GMT/CET",
-            "overnight": "US close and Asian session",
-            "readers": "institutional investors in London, Frankfurt, Zurich, Dubai",
-            "local_factors": "ECB monetary policy, MiCA regulatory implementation, UK regulatory stance, European institutional positioning, Middle Eastern sovereign wealth activity",
-            "trading_hours": "European trading hours with overlap into US open",
-            "overnight_window": "18:00 GMT yesterday to 06:00 GMT today",
-            "landmarks": "Canary Wharf, City of London, Frankfurt skyline, Dubai Marina, La Défense Paris, Swiss Alps"
-        },
-        "americas": {
-            "name": "Americas",
-            "timezone": "EST",
-            "overnight": "Asian and European sessions",
-            "readers": "institutional investors in New York, Chicago, San Francisco, Toronto",
-            "local_factors": "Federal Reserve policy signals, SEC regulatory actions, ETF flow data, US macro indicators, institutional positioning",
-            "trading_hours": "US trading hours driving global price discovery",
-            "overnight_window": "18:00 EST yesterday to 06:00 EST today",
-            "landmarks": "Manhattan skyline, Wall Street, One World Trade, Chicago Loop, San Francisco Bay"
-        }
+MORNING_REGIONS = {
+    "apac": {
+        "name": "Asia-Pacific",
+        "timezone": "SGT/HKT",
+        "overnight": "US close and European session",
+        "readers": "institutional investors in Singapore, Hong Kong, Tokyo, Sydney",
+        "local_factors": "Hong Kong regulatory developments, Japan institutional flows, Korean retail sentiment, Australian macro policy, Chinese economic signals",
+        "trading_hours": "Asian trading hours with US and European markets closed",
+        "overnight_window": "18:00 SGT yesterday to 06:00 SGT today",
+        "landmarks": "Hong Kong skyline, Singapore Marina Bay, Tokyo Marunouchi, Sydney CBD, Victoria Harbour"
+    },
+    "emea": {
+        "name": "Europe, Middle East & Africa",
+        "timezone": "GMT/CET",
+        "overnight": "US close and Asian session",
+        "readers": "institutional investors in London, Frankfurt, Zurich, Dubai",
+        "local_factors": "ECB monetary policy, MiCA regulatory implementation, UK regulatory stance, European institutional positioning, Middle Eastern sovereign wealth activity",
+        "trading_hours": "European trading hours with overlap into US open",
+        "overnight_window": "18:00 GMT yesterday to 06:00 GMT today",
+        "landmarks": "Canary Wharf, City of London, Frankfurt skyline, Dubai Marina, La Défense Paris, Swiss Alps"
+    },
+    "americas": {
+        "name": "Americas",
+        "timezone": "EST",
+        "overnight": "Asian and European sessions",
+        "readers": "institutional investors in New York, Chicago, San Francisco, Toronto",
+        "local_factors": "Federal Reserve policy signals, SEC regulatory actions, ETF flow data, US macro indicators, institutional positioning",
+        "trading_hours": "US trading hours driving global price discovery",
+        "overnight_window": "18:00 EST yesterday to 06:00 EST today",
+        "landmarks": "Manhattan skyline, Wall Street, One World Trade, Chicago Loop, San Francisco Bay"
     }
-    
-    ctx = region_context.get(region, region_context["americas"])
-    
-    return f"""You are the Chief Markets Editor at The Litmus, the publication that sophisticated crypto investors read instead of Bloomberg Terminal alerts. Your readers are {ctx['readers']} who need institutional-grade analysis, not retail noise.
+}
+
+MORNING_PROMPT_STATIC = """You are the Chief Markets Editor at The Litmus, the publication that sophisticated crypto investors read instead of Bloomberg Terminal alerts. Your readers (described in REGIONAL CONTEXT at the end) need institutional-grade analysis, not retail noise.
 
 PUBLICATION IDENTITY:
 The Litmus combines the editorial authority of the Financial Times, the analytical depth of The Economist, and the psychological insight of Rory Sutherland. We don't report markets—we decode them.
 
 Your readers cancelled their crypto news subscriptions because most "analysis" is just data with adjectives. They kept The Litmus because you give them what no algorithm can: a framework for understanding.
 
-REGIONAL CONTEXT - {ctx['name']} ({ctx['timezone']}):
-Your reader slept through the {ctx['overnight']} ({ctx['overnight_window']}). They're preparing for {ctx['trading_hours']}.
-Critical regional factors to weave in: {ctx['local_factors']}.
-
-CURRENT MARKET DATA:
-• Bitcoin: ${market_data['btc_price']:,.0f} ({market_data['btc_24h_change']:+.1f}% 24h, {market_data['btc_7d_change']:+.1f}% 7d)
-• Ethereum: ${market_data['eth_price']:,.0f} ({market_data['eth_24h_change']:+.1f}% 24h)
-• Solana: ${market_data['sol_price']:,.0f} ({market_data['sol_24h_change']:+.1f}% 24h)
-• Total Market Cap: ${market_data['total_market_cap']/1e12:.2f}T ({market_data['market_cap_change_24h']:+.1f}% 24h)
-• 24H Volume: ${market_data['total_volume']/1e9:.0f}B
-• BTC Dominance: {market_data['btc_dominance']:.1f}%
-
 YOUR MANDATE:
 Write a morning intelligence brief that sophisticated investors would forward to colleagues. This is The Litmus's shop window — the quality must convert readers.
 
@@ -597,7 +487,7 @@ The Lead does three jobs in one flowing narrative:
 • THE SETUP: Where do we start today? What are the dynamics and tensions in play?
 • THE HINGE: What's the one thing that matters most today? "Today hinges on..."
 
-Regional context must be woven throughout — this is the {ctx['name']} morning brief, not a generic global summary. Reference {ctx['local_factors']} where relevant.
+Regional context must be woven throughout — this is a regional morning brief, not a generic global summary. Reference the regional factors listed in REGIONAL CONTEXT where relevant.
 
 Write this as editorial prose, not bullet points. A reader should feel oriented to the day after reading this single section.
 
@@ -666,7 +556,7 @@ Generate 4-5 keywords for the hero image using EDITORIAL + MOOD approach (70/30
 CRITICAL: We need LIGHT, BRIGHT, EDITORIAL photography. Think Financial Times or Bloomberg Businessweek covers - professional, clean, optimistic. NOT moody, atmospheric, or dark.
 
 EDITORIAL (primary): What/where is the story happening?
-- Regional landmarks for {ctx['name']}: {ctx['landmarks']}
+- Regional landmarks listed in REGIONAL CONTEXT
 - Scenes: financial district at dawn, modern office lobby, glass towers in sunlight, aerial city view
 - Named entities if story-relevant: BlackRock, SEC building, specific companies
 
@@ -688,127 +578,116 @@ CRITICAL JSON FORMATTING RULES:
 
 OUTPUT FORMAT:
 Return ONLY valid JSON with this exact structure:
-{{
+{
     "headline": "Main 5-8 word headline capturing your core thesis",
     "image_keywords": "3-4 visual keywords, comma separated",
-    "sections": {{
-        "the_lead": {{
+    "sections": {
+        "the_lead": {
             "title": "4-8 word headline",
             "content": "200 words — overnight + setup + hinge as flowing editorial prose"
-        }},
-        "the_angle": {{
+        },
+        "the_angle": {
             "title": "4-8 word provocative headline",
             "content": "60-80 words — the Rory Sutherland reframe"
-        }},
-        "the_driver": {{
+        },
+        "the_driver": {
             "title": "4-8 word headline",
             "content": "3-4 editorial bullets, each 1-2 sentences with fact + context + insight"
-        }},
-        "the_signal": {{
+        },
+        "the_signal": {
             "title": "4-8 word headline",
             "content": "3 data points, each one sentence: [metric] — [meaning]"
-        }},
-        "the_takeaway": {{
+        },
+        "the_takeaway": {
             "title": "The Bottom Line",
             "content": "One quotable Rory-style sentence"
-        }}
-    }}
-}}
+        }
+    }
+}
 
 Return ONLY the JSON object, no other text."""
 
 
+def get_morning_context(region: str, market_data: dict) -> str:
+    """Regional context and market data - the dynamic header every morning prompt starts with"""
+    ctx = MORNING_REGIONS.get(region, MORNING_REGIONS["americas"])
+
+    return f"""REGIONAL CONTEXT - {ctx['name']} ({ctx['timezone']}):
+Your readers are {ctx['readers']}.
+Your reader slept through the {ctx['overnight']} ({ctx['overnight_window']}). They're preparing for {ctx['trading_hours']}.
+Critical regional factors to weave in: {ctx['local_factors']}.
+Regional landmarks for {ctx['name']} (hero image): {ctx['landmarks']}
+
+CURRENT MARKET DATA:
+• Bitcoin: ${market_data['btc_price']:,.0f} ({market_data['btc_24h_change']:+.1f}% 24h, {market_data['btc_7d_change']:+.1f}% 7d)
+• Ethereum: ${market_data['eth_price']:,.0f} ({market_data['eth_24h_change']:+.1f}% 24h)
+• Solana: ${market_data['sol_price']:,.0f} ({market_data['sol_24h_change']:+.1f}% 24h)
+• Total Market Cap: ${market_data['total_market_cap']/1e12:.2f}T ({market_data['market_cap_change_24h']:+.1f}% 24h)
+• 24H Volume: ${market_data['total_volume']/1e9:.0f}B
+• BTC Dominance: {market_data['btc_dominance']:.1f}%"""
+
+
+def get_morning_prompt(region: str, market_data: dict) -> tuple:
+    """Generate the morning brief prompt - FT quality editorial
+
+    Returns (static_prefix, dynamic_suffix); see PROMPT CACHING above.
+    """
+    ctx = MORNING_REGIONS.get(region, MORNING_REGIONS["americas"])
+
+    dynamic = f"""{get_morning_context(region, market_data)}
+
+Write the {ctx['name']} morning brief now. Return ONLY the JSON object, no other text."""
+
+    return MORNING_PROMPT_STATIC, dynamic
+
+
 # ============================================================================
 # EVENING BRIEF PROMPT - Regional News-Wire Editorial
 # ============================================================================
 
-def get_evening_prompt(region: str, market_data: dict) -> str:
-    """Generate the evening brief prompt - scannable but editorial quality"""
-    
-    region_context = {
-        "apac": {
-            "name": "Asia-Pacific",
-            "session_reviewed": "Asian trading session",
-            "handoff_to": "European markets",
-            "key_hours": "Hong Kong and Singapore close",
-            "sub_regions": ["East Asia", "Southeast Asia", "Oceania"],
-            "landmarks": "Hong Kong skyline, Singapore Marina Bay, Tokyo Tower, Sydney Opera House, Victoria Harbour",
-            "sub_region_factors": {
-                "East Asia": "China economic policy, Hong Kong regulatory moves, Japan institutional activity, Korean exchange developments, Taiwan semiconductor links to crypto mining",
-                "Southeast Asia": "Singapore as crypto hub, Thai regulatory stance, Vietnamese retail activity, Philippine remittance corridors, Indonesian adoption trends",
-                "Oceania": "Australian regulatory framework, New Zealand institutional positioning, regional mining operations, AUD correlation plays"
-            }
-        },
-        "emea": {
-            "name": "Europe, Middle East & Africa",
-            "session_reviewed": "European trading session",
-            "handoff_to": "US afternoon session",
-            "key_hours": "London close and US mid-day",
-            "sub_regions": ["Europe", "Middle East", "Africa"],
-            "landmarks": "Canary Wharf, Tower Bridge, Frankfurt skyline, Dubai Marina, Big Ben, Thames",
-            "sub_region_factors": {
-                "Europe": "ECB policy signals, MiCA implementation updates, UK FCA stance, Swiss institutional flows, German regulatory developments, EU stablecoin rules",
-                "Middle East": "UAE crypto hub status, Saudi Vision 2030 digital assets, Bahrain regulatory framework, sovereign wealth positioning, regional exchange launches",
-                "Africa": "Nigerian adoption despite restrictions, South African regulatory clarity, Kenyan mobile money integration, remittance corridor growth, mining operations"
-            }
-        },
-        "americas": {
-            "name": "Americas",
-            "session_reviewed": "US trading session",
-            "handoff_to": "Asian open",
-            "key_hours": "NYSE close approaching",
-            "sub_regions": ["North America", "Central America", "South America"],
-            "landmarks": "Manhattan skyline, Wall Street, Statue of Liberty, Brooklyn Bridge, Hudson River, sunset",
-            "sub_region_factors": {
-                "North America": "SEC enforcement actions, ETF flow dynamics, Fed policy impact, Canadian regulatory updates, institutional custody developments, mining energy debates",
-                "Central America": "El Salvador Bitcoin developments, Panama regulatory progress, Guatemala remittance adoption, regional dollarization dynamics",
-                "South America": "Brazil regulatory framework, Argentine peso hedge demand, Colombian exchange growth, Venezuelan adoption patterns, regional stablecoin usage"
-            }
+EVENING_REGIONS = {
+    "apac": {
+        "name": "Asia-Pacific",
+        "session_reviewed": "Asian trading session",
+        "handoff_to": "European markets",
+        "key_hours": "Hong Kong and Singapore close",
+        "sub_regions": ["East Asia", "Southeast Asia", "Oceania"],
+        "landmarks": "Hong Kong skyline, Singapore Marina Bay, Tokyo Tower, Sydney Opera House, Victoria Harbour",
+        "sub_region_factors": {
+            "East Asia": "China economic policy, Hong Kong regulatory moves, Japan institutional activity, Korean exchange developments, Taiwan semiconductor links to crypto mining",
+            "Southeast Asia": "Singapore as crypto hub, Thai regulatory stance, Vietnamese retail activity, Philippine remittance corridors, Indonesian adoption trends",
+            "Oceania": "Australian regulatory framework, New Zealand institutional positioning, regional mining operations, AUD correlation plays"
+        }
+    },
+    "emea": {
+        "name": "Europe, Middle East & Africa",
+        "session_reviewed": "European trading session",
+        "handoff_to": "US afternoon session",
+        "key_hours": "London close and US mid-day",
+        "sub_regions": ["Europe", "Middle East", "Africa"],
+        "landmarks": "Canary Wharf, Tower Bridge, Frankfurt skyline, Dubai Marina, Big Ben, Thames",
+        "sub_region_factors": {
+            "Europe": "ECB policy signals, MiCA implementation updates, UK FCA stance, Swiss institutional flows, German regulatory developments, EU stablecoin rules",
+            "Middle East": "UAE crypto hub status, Saudi Vision 2030 digital assets, Bahrain regulatory framework, sovereign wealth positioning, regional exchange launches",
+            "Africa": "Nigerian adoption despite restrictions, South African regulatory clarity, Kenyan mobile money integration, remittance corridor growth, mining operations"
+        }
+    },
+    "americas": {
+        "name": "Americas",
+        "session_reviewed": "US trading session",
+        "handoff_to": "Asian open",
+        "key_hours": "NYSE close approaching",
+        "sub_regions": ["North America", "Central America", "South America"],
+        "landmarks": "Manhattan skyline, Wall Street, Statue of Liberty, Brooklyn Bridge, Hudson River, sunset",
+        "sub_region_factors": {
+            "North America": "SEC enforcement actions, ETF flow dynamics, Fed policy impact, Canadian regulatory updates, institutional custody developments, mining energy debates",
+            "Central America": "El Salvador Bitcoin developments, Panama regulatory progress, Guatemala remittance adoption, regional dollarization dynamics",
+            "South America": "Brazil regulatory framework, Argentine peso hedge demand, Colombian exchange growth, Venezuelan adoption patterns, regional stablecoin usage"
         }
     }
-    
-    ctx = region_context.get(region, region_context["americas"])
-    
-    # Build sub-region JSON structure
-    sub_region_json = ""
-    for i, sub in enumerate(ctx['sub_regions']):
-        sub_key = sub.lower().replace(" ", "_")
-        comma = "," if i < len(ctx['sub_regions']) - 1 else ""
-        sub_region_json += f"""
-                "{sub_key}": {{
-                    "name": "{sub}",
-                    "content": "3-5 editorial bullets covering political, financial, and crypto developments"
-                }}{comma}"""
-    
-    # Add ETF section only for Americas
-    etf_section = ""
-    etf_json = ""
-    if region == "americas":
-        etf_section = """
+}
 
-ETF FLOWS DATA:
-Include specific ETF flow data in The Session. Research or estimate today's flows:
-- Today's total net flow (positive = inflows, negative = outflows)
-- Major ETFs: IBIT (BlackRock), FBTC (Fidelity), GBTC (Grayscale), ARKB (Ark)
-- Week-to-date flow pattern"""
-        
-        etf_json = """,
-        "etf_flows": {{
-            "latest": {{
-                "amount": 0,
-                "date": "today's date"
-            }},
-            "week": [
-                {{"day": "Mon", "amount": 0}},
-                {{"day": "Tue", "amount": 0}},
-                {{"day": "Wed", "amount": 0}},
-                {{"day": "Thu", "amount": 0}},
-                {{"day": "Fri", "amount": 0}}
-            ],
-            "insight": "One sentence on this week's ETF flow pattern"
-        }}"""
-    
-    return f"""You are the Chief Markets Editor at The Litmus writing the evening brief. Your {ctx['name']} readers are ending their trading day and want a clear picture of what happened in the last 12 hours.
+EVENING_PROMPT_STATIC = """You are the Chief Markets Editor at The Litmus writing the evening brief. Your regional readers (see SESSION CONTEXT at the end) are ending their trading day and want a clear picture of what happened in the last 12 hours.
 
 PUBLICATION IDENTITY - EVENING EDITION:
 The evening brief is different from morning. Morning is opinionated and thought-provoking. Evening is authoritative and informative.
@@ -818,15 +697,6 @@ Tone: Informed, not opinionated. Crisp, not cold.
 
 Your readers want to scan quickly but read quality prose. They're tired. Respect their time while respecting their intelligence.
 
-MARKET DATA:
-• Bitcoin: ${market_data['btc_price']:,.0f} ({market_data['btc_24h_change']:+.1f}% 24h)
-• Ethereum: ${market_data['eth_price']:,.0f} ({market_data['eth_24h_change']:+.1f}% 24h)
-• Solana: ${market_data['sol_price']:,.0f} ({market_data['sol_24h_change']:+.1f}% 24h)
-• Total Market Cap: ${market_data['total_market_cap']/1e12:.2f}T ({market_data['market_cap_change_24h']:+.1f}% 24h)
-• BTC Dominance: {market_data['btc_dominance']:.1f}%{etf_section}
-
-SESSION CONTEXT: {ctx['session_reviewed']} review, {ctx['key_hours']}
-
 THE STRUCTURE:
 
 1. THE SESSION (3-5 editorial bullets)
@@ -840,7 +710,7 @@ Cover:
 
 CRITICAL: These are NOT PowerPoint bullets. Each bullet is 1-2 complete sentences containing:
 • The fact (what happened)
-• The context (why it matters)  
+• The context (why it matters)
 • The insight (what it suggests)
 
 Example of what we want:
@@ -864,8 +734,7 @@ Same editorial bullet standard: fact + context + insight in each.
 3. THE REGION (3-5 bullets per sub-region)
 This is where the evening brief earns its regional value.
 
-Three sub-regions for {ctx['name']}:
-{chr(10).join([f"• {sub}: {ctx['sub_region_factors'][sub]}" for sub in ctx['sub_regions']])}
+Your region's three sub-regions and their key factors are listed in SESSION CONTEXT.
 
 For EACH sub-region, provide 3-5 editorial bullets covering:
 • Political or regulatory developments affecting crypto
@@ -900,7 +769,7 @@ Generate 4-5 keywords for the hero image using EDITORIAL + MOOD approach (70/30
 CRITICAL: Even for evening briefs, we need WARM and BRIGHT imagery. Think golden hour photography - luminous, inviting, professional. NOT dark night scenes or moody atmospheres.
 
 EDITORIAL (primary): What/where is the story happening?
-- Regional landmarks for {ctx['name']}: {ctx['landmarks']}
+- Regional landmarks listed in SESSION CONTEXT
 - Scenes: financial district at golden hour, evening cityscape with warm light, glass buildings reflecting sunset
 - Named entities if story-relevant: specific exchanges, institutions
 
@@ -915,11 +784,89 @@ FORMAT: "Manhattan skyline, golden sunset, warm light, clear sky" or "Singapore
 
 CRITICAL JSON FORMATTING RULES:
 • All string values must have quotes escaped as \\"
-• No literal newlines inside strings - use \\n instead  
+• No literal newlines inside strings - use \\n instead
 • No trailing commas
 • Avoid special characters
 • the_region MUST contain sub-region objects with "name" and "content" fields
 
+IMPORTANT: Each sub-region in the_region MUST have this structure:
+"sub_region_key": {
+    "name": "Sub-Region Name",
+    "content": "• Bullet one with fact, context, insight.\\n\\n• Bullet two..."
+}
+
+The exact OUTPUT FORMAT for your region follows the session context."""
+
+
+def get_evening_context(region: str, market_data: dict) -> str:
+    """Market data and session context - the dynamic header every evening prompt starts with"""
+    ctx = EVENING_REGIONS.get(region, EVENING_REGIONS["americas"])
+
+    # Add ETF section only for Americas
+    etf_section = ""
+    if region == "americas":
+        etf_section = """
+
+ETF FLOWS DATA:
+Include specific ETF flow data in The Session. Research or estimate today's flows:
+- Today's total net flow (positive = inflows, negative = outflows)
+- Major ETFs: IBIT (BlackRock), FBTC (Fidelity), GBTC (Grayscale), ARKB (Ark)
+- Week-to-date flow pattern"""
+
+    return f"""MARKET DATA:
+• Bitcoin: ${market_data['btc_price']:,.0f} ({market_data['btc_24h_change']:+.1f}% 24h)
+• Ethereum: ${market_data['eth_price']:,.0f} ({market_data['eth_24h_change']:+.1f}% 24h)
+• Solana: ${market_data['sol_price']:,.0f} ({market_data['sol_24h_change']:+.1f}% 24h)
+• Total Market Cap: ${market_data['total_market_cap']/1e12:.2f}T ({market_data['market_cap_change_24h']:+.1f}% 24h)
+• BTC Dominance: {market_data['btc_dominance']:.1f}%{etf_section}
+
+SESSION CONTEXT: {ctx['name']} evening brief. {ctx['session_reviewed']} review, {ctx['key_hours']}
+
+Three sub-regions for {ctx['name']}:
+{chr(10).join([f"• {sub}: {ctx['sub_region_factors'][sub]}" for sub in ctx['sub_regions']])}
+
+Regional landmarks for {ctx['name']} (hero image): {ctx['landmarks']}"""
+
+
+def get_evening_prompt(region: str, market_data: dict) -> tuple:
+    """Generate the evening brief prompt - scannable but editorial quality
+
+    Returns (static_prefix, dynamic_suffix); see PROMPT CACHING above.
+    """
+    ctx = EVENING_REGIONS.get(region, EVENING_REGIONS["americas"])
+
+    # Build sub-region JSON structure
+    sub_region_json = ""
+    for i, sub in enumerate(ctx['sub_regions']):
+        sub_key = sub.lower().replace(" ", "_")
+        comma = "," if i < len(ctx['sub_regions']) - 1 else ""
+        sub_region_json += f"""
+                "{sub_key}": {{
+                    "name": "{sub}",
+                    "content": "3-5 editorial bullets covering political, financial, and crypto developments"
+                }}{comma}"""
+
+    # ETF block only for Americas
+    etf_json = ""
+    if region == "americas":
+        etf_json = """,
+        "etf_flows": {{
+            "latest": {{
+                "amount": 0,
+                "date": "today's date"
+            }},
+            "week": [
+                {{"day": "Mon", "amount": 0}},
+                {{"day": "Tue", "amount": 0}},
+                {{"day": "Wed", "amount": 0}},
+                {{"day": "Thu", "amount": 0}},
+                {{"day": "Fri", "amount": 0}}
+            ],
+            "insight": "One sentence on this week's ETF flow pattern"
+        }}"""
+
+    dynamic = f"""{get_evening_context(region, market_data)}
+
 OUTPUT FORMAT:
 Return ONLY valid JSON:
 {{
@@ -940,103 +887,128 @@ Return ONLY valid JSON:
     }}{etf_json}
 }}
 
-IMPORTANT: Each sub-region in the_region MUST have this structure:
-"sub_region_key": {{
-    "name": "Sub-Region Name",
-    "content": "• Bullet one with fact, context, insight.\\n\\n• Bullet two..."
-}}
-
 Return ONLY the JSON object, no other text."""
 
+    return EVENING_PROMPT_STATIC, dynamic
 
-def get_publication_timestamp(region: str, brief_type: str) -> str:
-    """Generate intended publication timestamp with regional timezone"""
+
+def publication_slot(region: str, brief_type: str, now: datetime = None) -> datetime:
+    """The brief's publication slot nearest to now, as a datetime in the region's zone
+    
+    Slots are daily local times, so the nearest one is the slot a run belongs
+    to whether it starts a little early (scheduler lead) or late (cron delay).
+    The local date is taken in the region's zone: the APAC morning run at
+    22:00 UTC belongs to 06:00 +08:00 on the next UTC day.
+    """
     tz_offsets = {
-        "apac": ("+08:00", 8),
-        "emea": ("+00:00", 0),
-        "americas": ("-05:00", -5)
+        "apac": 8,
+        "emea": 0,
+        "americas": -5
     }
     
     pub_hours = {"morning": 6, "evening": 18}
     
-    tz_str, tz_hours = tz_offsets.get(region, ("+00:00", 0))
-    pub_hour = pub_hours.get(brief_type, 6)
-    
-    now_utc = datetime.now(timezone.utc)
-    target_local = now_utc.replace(
-        hour=(pub_hour - tz_hours) % 24,
-        minute=0, second=0, microsecond=0
-    )
-    
-    return target_local.strftime(f"%Y-%m-%dT{pub_hour:02d}:00:00{tz_str}")
+    zone = timezone(timedelta(hours=tz_offsets.get(region, 0)))
+    local_now = (now or datetime.now(timezone.utc)).astimezone(zone)
+    slot = local_now.replace(hour=pub_hours.get(brief_type, 6), minute=0, second=0, microsecond=0)
+    if slot - local_now > timedelta(hours=12):
+        slot -= timedelta(days=1)
+    elif local_now - slot >= timedelta(hours=12):
+        slot += timedelta(days=1)
+    return slot
+
+
+def get_publication_timestamp(region: str, brief_type: str) -> str:
+    """Generate intended publication timestamp with regional timezone"""
+    return publication_slot(region, brief_type).isoformat()
 
 
-def call_anthropic_api(prompt: str, attempt: int = 1) -> dict:
-    """Call Claude Opus 4.5 API with retry logic"""
+def call_anthropic_api(prompt, attempt: int = 1, timeout: float = 120,
+                       cancel: threading.Event = None, max_tokens: int = 4096, validate=None) -> dict:
+    """Call Claude Opus 4.5 API with retry logic
+    
+    prompt is a string or a (static_prefix, dynamic_suffix) tuple; the static
+    prefix is sent as a cached system block. With ANTHROPIC_STREAM enabled the
+    response is streamed; a structurally broken response raises immediately,
+    and the per-section completion times (seconds from request) are recorded
+    on the llm_call span. Setting cancel (a hedging.Cancel) closes a streamed
+    request's connection.
+    
+    Completions are memoized in llm_cache: a rerun with the same prompt reuses
+    the raw completion. validate(data), if given, turns the parsed response
+    into the return value; a ValueError from it rejects the completion, which
+    is then neither cached nor reused.
+    """
     if not ANTHROPIC_API_KEY:
-        raise ValueError("ANTHROPIC_API_KEY not set")
+        raise retry.PermanentError("ANTHROPIC_API_KEY not set")
     
-    # Add stronger JSON instruction on retries
-    if attempt > 1:
-        prompt += "\n\nIMPORTANT: Previous attempt failed JSON parsing. Please ensure valid JSON with properly escaped quotes."
+    system, user_text = build_request_prompt(prompt, attempt)
     
-    request_body = json.dumps({
+    payload = {
         "model": MODEL,
-        "max_tokens": 4096,
+        "max_tokens": max_tokens,
         "temperature": TEMPERATURE,
-        "messages": [{"role": "user", "content": prompt}]
-    }).encode()
-    
-    req = urllib.request.Request(
-        "https://api.anthropic.com/v1/messages",
-        data=request_body,
-        headers={
-            "Content-Type": "application/json",
-            "x-api-key": ANTHROPIC_API_KEY,
-            "anthropic-version": "2023-06-01"
-        }
-    )
-    
-    with urllib.request.urlopen(req, timeout=120) as resp:
-        response = json.loads(resp.read().decode())
+        "messages": [{"role": "user", "content": user_text}]
+    }
+    if system:
+        payload["system"] = system
+    
+    cached = llm_cache.get(payload)
+    with tracing.span("llm_call", attempt=attempt, model=MODEL, stream=ANTHROPIC_STREAM, cached=bool(cached),
+                      bytes_out=0 if cached else len(json.dumps(payload).encode())) as span:
+        if cached:
+            content, usage, stop_reason = cached["text"], cached["usage"], cached["stop_reason"]
+            print(f"  Reusing cached completion ({len(content)} chars, {(time.time() - cached['created_ts']) / 60:.0f} min old)")
+        elif ANTHROPIC_STREAM:
+            result = anthropic_stream.stream_message(payload, ANTHROPIC_API_KEY, timeout=timeout, cancel=cancel)
+            content = result["text"]
+            usage = result["usage"]
+            stop_reason = result["stop_reason"]
+            span.set(first_section_s=result["first_section"], sections=result["sections"])
+            print(f"  Streamed {len(content)} chars in {result['seconds']}s ({len(result['sections'])} sections, stop: {result['stop_reason']})")
+        else:
+            response = http_client.post(
+                anthropic_stream.ANTHROPIC_API_URL,
+                json_body=payload,
+                headers=anthropic_stream.build_headers(ANTHROPIC_API_KEY),
+                timeout=timeout
+            ).raise_for_status().json()
+            
+            content = response.get("content", [{}])[0].get("text", "")
+            usage = response.get("usage", {})
+            stop_reason = response.get("stop_reason")
+        
+        span.set(bytes_in=len(content.encode()), stop_reason=stop_reason, input_tokens=usage.get("input_tokens"),
+                 output_tokens=usage.get("output_tokens"), cache_read_tokens=usage.get("cache_read_input_tokens"))
     
-    content = response.get("content", [{}])[0].get("text", "")
+    if not cached:
+        record_prompt_cache_usage(usage)
     
     # Use robust JSON extraction
-    return extract_json_from_response(content)
+    with tracing.span("json_parse", bytes_in=len(content.encode())):
+        try:
+            data = extract_json_from_response(content)
+            if validate is not None:
+                data = validate(data)
+        except ValueError:
+            if cached:
+                llm_cache.discard(payload)
+            raise
+    
+    if not cached:
+        llm_cache.put(payload, content, usage, stop_reason)
+    return data
 
 
 # ============================================
 # WEEK AHEAD - Weekly Strategic Outlook
 # ============================================
 
-def get_week_ahead_prompt(market_data: dict) -> str:
-    """Generate prompt for Week Ahead brief - published once per week"""
-    
-    # Calculate the week dates
-    today = datetime.now(timezone.utc)
-    # Find next Monday (or today if it's Monday)
-    days_until_monday = (7 - today.weekday()) % 7
-    if days_until_monday == 0 and today.hour < 12:
-        week_start = today
-    else:
-        week_start = today + timedelta(days=days_until_monday)
-    week_end = week_start + timedelta(days=6)
-    
-    week_range = f"{week_start.strftime('%B %d')} - {week_end.strftime('%B %d, %Y')}"
-    
-    return f"""You are the senior strategist at The Litmus, a premium crypto intelligence publication. 
-Write the WEEK AHEAD outlook covering {week_range}.
+WEEK_AHEAD_PROMPT_STATIC = """You are the senior strategist at The Litmus, a premium crypto intelligence publication.
 
 This is NOT a daily brief. This is a strategic weekly preview that helps sophisticated investors 
 prepare for the week's key events, levels, and opportunities.
 
-CURRENT MARKET CONTEXT:
-• BTC: ${market_data.get('btc_price', 0):,.0f} ({market_data.get('btc_24h_change', 0):+.1f}% 24h, {market_data.get('btc_7d_change', 0):+.1f}% 7d)
-• ETH: ${market_data.get('eth_price', 0):,.0f} ({market_data.get('eth_24h_change', 0):+.1f}% 24h, {market_data.get('eth_7d_change', 0):+.1f}% 7d)
-• Total Market Cap: ${market_data.get('total_market_cap', 0)/1e12:.2f}T
-• BTC Dominance: {market_data.get('btc_dominance', 0):.1f}%
-
 WEEK AHEAD STRUCTURE (4 sections):
 
 1. THE FULCRUM (200-250 words)
@@ -1083,65 +1055,91 @@ Write a 5-8 word headline that captures the week's dominant theme.
 
 OUTPUT FORMAT:
 Return ONLY valid JSON:
-{{
+{
     "headline": "5-8 word headline for the week",
-    "sections": {{
-        "fulcrum": {{
+    "sections": {
+        "fulcrum": {
             "title": "4-8 word title for the key event",
             "content": "200-250 words on the week's fulcrum event"
-        }},
-        "levels": {{
+        },
+        "levels": {
             "title": "4-8 word title about key levels",
             "content": "150-200 words on price levels to watch"
-        }},
-        "unpriced": {{
+        },
+        "unpriced": {
             "title": "4-8 word title on the contrarian angle",
             "content": "150-200 words on what the market is missing"
-        }},
-        "underestimated": {{
+        },
+        "underestimated": {
             "title": "4-8 word title on the underappreciated risk/opportunity",
             "content": "150-200 words on what's being underestimated"
-        }}
-    }}
-}}
+        }
+    }
+}
 
 Return ONLY the JSON object, no other text."""
 
 
+def get_week_ahead_prompt(market_data: dict) -> tuple:
+    """Generate prompt for Week Ahead brief - published once per week
+    
+    Returns (static_prefix, dynamic_suffix); see PROMPT CACHING above.
+    """
+    
+    # Calculate the week dates
+    today = datetime.now(timezone.utc)
+    # Find next Monday (or today if it's Monday)
+    days_until_monday = (7 - today.weekday()) % 7
+    if days_until_monday == 0 and today.hour < 12:
+        week_start = today
+    else:
+        week_start = today + timedelta(days=days_until_monday)
+    week_end = week_start + timedelta(days=6)
+    
+    week_range = f"{week_start.strftime('%B %d')} - {week_end.strftime('%B %d, %Y')}"
+    
+    dynamic = f"""Write the WEEK AHEAD outlook covering {week_range}.
+
+CURRENT MARKET CONTEXT:
+• BTC: ${market_data.get('btc_price', 0):,.0f} ({market_data.get('btc_24h_change', 0):+.1f}% 24h, {market_data.get('btc_7d_change', 0):+.1f}% 7d)
+• ETH: ${market_data.get('eth_price', 0):,.0f} ({market_data.get('eth_24h_change', 0):+.1f}% 24h, {market_data.get('eth_7d_change', 0):+.1f}% 7d)
+• Total Market Cap: ${market_data.get('total_market_cap', 0)/1e12:.2f}T
+• BTC Dominance: {market_data.get('btc_dominance', 0):.1f}%
+
+Return ONLY the JSON object, no other text."""
+    
+    return WEEK_AHEAD_PROMPT_STATIC, dynamic
+
+
 def generate_week_ahead() -> dict:
     """Generate the Week Ahead brief"""
     print("  Fetching market data...")
     market_data = fetch_market_data()
     
-    prompt = get_week_ahead_prompt(market_data)
+    with tracing.span("prompt_build"):
+        prompt = get_week_ahead_prompt(market_data)
     
-    last_error = None
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            print(f"  Generating Week Ahead using {MODEL}... (attempt {attempt})")
-            brief_data = call_anthropic_api(prompt, attempt)
-            
-            # Transform nested structure to flat
-            transformed = transform_week_ahead_structure(brief_data)
-            
-            # Add metadata
-            transformed["region"] = "global"
-            transformed["type"] = "week-ahead"
-            transformed["generated_at"] = datetime.now(timezone.utc).isoformat()
-            transformed["btc_price"] = market_data.get("btc_price", 0)
-            transformed["eth_price"] = market_data.get("eth_price", 0)
-            transformed["total_market_cap"] = market_data.get("total_market_cap", 0)
-            transformed["btc_24h_change"] = market_data.get("btc_24h_change", 0)
-            
-            return transformed
-            
-        except Exception as e:
-            last_error = e
-            print(f"  Attempt {attempt} failed: {e}")
-            if attempt < MAX_RETRIES:
-                time.sleep(2)
+    policy = retry.RetryPolicy("Week Ahead", max_attempts=MAX_RETRIES, base_delay=2, budget=MAX_GENERATION_BUDGET)
+    
+    def attempt_generation(attempt: int) -> dict:
+        print(f"  Generating Week Ahead using {MODEL}... (attempt {attempt})")
+        brief_data = call_anthropic_api(prompt, attempt, timeout=policy.timeout(120))
+        
+        # Transform nested structure to flat
+        transformed = transform_week_ahead_structure(brief_data)
+        
+        # Add metadata
+        transformed["region"] = "global"
+        transformed["type"] = "week-ahead"
+        transformed["generated_at"] = datetime.now(timezone.utc).isoformat()
+        transformed["btc_price"] = market_data.get("btc_price", 0)
+        transformed["eth_price"] = market_data.get("eth_price", 0)
+        transformed["total_market_cap"] = market_data.get("total_market_cap", 0)
+        transformed["btc_24h_change"] = market_data.get("btc_24h_change", 0)
+        
+        return transformed
     
-    raise last_error
+    return policy.call(attempt_generation)
 
 
 def transform_week_ahead_structure(brief_data: dict) -> dict:
@@ -1203,51 +1201,256 @@ def transform_to_flat_structure(brief_data: dict) -> dict:
     return result
 
 
-def generate_brief(region: str, brief_type: str) -> dict:
-    """Generate a complete brief with retry logic"""
-    print(f"  Fetching market data...")
-    market_data = fetch_market_data()
-    
+def validate_brief(brief: dict) -> dict:
+    """Reject a parsed brief that has no headline or no sections (retryable)"""
+    if not str(brief.get("headline", "")).strip():
+        raise ValueError("Brief has no headline")
+    if not brief.get("sections"):
+        raise ValueError("Brief has no sections")
+    return brief
+
+
+# ============================================================================
+# SHARDED GENERATION
+# ============================================================================
+# With BRIEF_SHARDED=1 a morning or evening brief is written as independent
+# shards - one per section, with the headline and image keywords riding on
+# the first section, and one shard per evening sub-region. Every shard sends
+# the same cached static prefix and the same context header, so wall time
+# drops to the slowest shard and a malformed section is retried on its own.
+# The shards are assembled into the nested structure a single completion
+# returns, then flattened by transform_to_flat_structure() as usual.
+
+SHARD_PROMPT = """{context}
+
+THIS REQUEST: You are writing only {part} of the {name} {brief_type} brief. Other editors are writing the remaining sections in parallel from the same context, so do not cover their ground. Follow the voice and rules above, but ignore the full-brief OUTPUT FORMAT.
+
+Return ONLY valid JSON:
+{template}
+
+Return ONLY the JSON object, no other text."""
+
+MORNING_SHARDS = [
+    {"name": "the_lead", "part": "the headline, the hero image keywords and The Lead",
+     "fields": {"headline": "Main 5-8 word headline capturing your core thesis",
+                "image_keywords": "3-4 visual keywords, comma separated"},
+     "path": ("sections", "the_lead"),
+     "shape": {"title": "4-8 word headline", "content": "200 words — overnight + setup + hinge as flowing editorial prose"}},
+    {"name": "the_angle", "part": "The Angle", "path": ("sections", "the_angle"),
+     "shape": {"title": "4-8 word provocative headline", "content": "60-80 words — the Rory Sutherland reframe"}},
+    {"name": "the_driver", "part": "The Driver", "path": ("sections", "the_driver"),
+     "shape": {"title": "4-8 word headline", "content": "3-4 editorial bullets, each 1-2 sentences with fact + context + insight"}},
+    {"name": "the_signal", "part": "The Signal", "path": ("sections", "the_signal"),
+     "shape": {"title": "4-8 word headline", "content": "3 data points, each one sentence: [metric] — [meaning]"}},
+    {"name": "the_takeaway", "part": "The Takeaway", "path": ("sections", "the_takeaway"),
+     "shape": {"title": "The Bottom Line", "content": "One quotable Rory-style sentence"}},
+]
+
+ETF_FLOWS_SHAPE = {
+    "latest": {"amount": 0, "date": "today's date"},
+    "week": [{"day": day, "amount": 0} for day in ["Mon", "Tue", "Wed", "Thu", "Fri"]],
+    "insight": "One sentence on this week's ETF flow pattern"
+}
+
+
+def evening_shards(region: str) -> list:
+    """Session (with headline, keywords and ETF flows), macro, then one shard per sub-region"""
+    ctx = EVENING_REGIONS.get(region, EVENING_REGIONS["americas"])
+    session = {
+        "name": "the_session", "part": "the headline, the hero image keywords and The Session",
+        "fields": {"headline": "5-8 word headline capturing today's session story",
+                   "image_keywords": "3-4 visual keywords, comma separated"},
+        "path": ("sections", "the_session"),
+        "shape": {"title": "4-8 word headline", "content": "3-5 editorial bullets starting with • on global crypto action"}
+    }
+    if region == "americas":
+        session["part"] += " with the ETF flows block"
+        session["optional"] = {"etf_flows": ETF_FLOWS_SHAPE}
+
+    shards = [session, {
+        "name": "the_macro", "part": "The Macro", "path": ("sections", "the_macro"),
+        "shape": {"title": "4-8 word headline", "content": "3-5 editorial bullets starting with • on global finance/politics"}
+    }]
+    for sub in ctx["sub_regions"]:
+        sub_key = sub.lower().replace(" ", "_")
+        shards.append({
+            "name": f"the_region.{sub_key}", "part": f"the {sub} bullets of The Region",
+            "path": ("sections", "the_region", sub_key),
+            "container": {"title": f"What Moved in {ctx['name']}"},
+            "shape": {"name": sub, "content": "3-5 editorial bullets covering political, financial, and crypto developments"}
+        })
+    return shards
+
+
+def shard_template(shard: dict) -> dict:
+    """The JSON skeleton a shard is asked to return - the full brief's shape, pruned"""
+    template = {**shard.get("fields", {}), **shard.get("optional", {})}
+    node = template
+    for key in shard["path"][:-1]:
+        node = node.setdefault(key, {})
+    node[shard["path"][-1]] = shard["shape"]
+    return template
+
+
+def get_shard_prompts(region: str, brief_type: str, market_data: dict) -> list:
+    """[(shard, (static_prefix, dynamic_suffix))] for a sharded morning/evening brief"""
     if brief_type == "evening":
-        prompt = get_evening_prompt(region, market_data)
+        static, context = EVENING_PROMPT_STATIC, get_evening_context(region, market_data)
+        shards, name = evening_shards(region), EVENING_REGIONS.get(region, EVENING_REGIONS["americas"])["name"]
     else:
-        prompt = get_morning_prompt(region, market_data)
+        static, context = MORNING_PROMPT_STATIC, get_morning_context(region, market_data)
+        shards, name = MORNING_SHARDS, MORNING_REGIONS.get(region, MORNING_REGIONS["americas"])["name"]
+
+    return [(shard, (static, SHARD_PROMPT.format(
+        context=context, part=shard["part"], name=name, brief_type=brief_type,
+        template=json.dumps(shard_template(shard), indent=4, ensure_ascii=False)
+    ))) for shard in shards]
+
+
+def extract_shard(data: dict, shard: dict) -> dict:
+    """The fields a shard was asked for; raises ValueError (retryable) if any is missing"""
+    part = {}
+    for key in shard.get("fields", {}):
+        if not str(data.get(key) or "").strip():
+            raise ValueError(f"Shard {shard['name']} has no {key}")
+        part[key] = data[key]
+    for key in shard.get("optional", {}):
+        if data.get(key):
+            part[key] = data[key]
+
+    section = data
+    for key in shard["path"]:
+        section = section.get(key) if isinstance(section, dict) else None
+    content = section.get("content") if isinstance(section, dict) else section
+    if not str(content or "").strip():
+        raise ValueError(f"Shard {shard['name']} has no content")
+    part["section"] = section
+    return part
+
+
+def assemble_shards(shards: list, parts: dict) -> dict:
+    """Merge shard results, in plan order, into the nested single-completion structure"""
+    brief_data = {"headline": "", "image_keywords": "", "sections": {}}
+    for shard in shards:
+        part = dict(parts[shard["name"]])
+        section = part.pop("section")
+        brief_data.update(part)
+
+        node = brief_data
+        for key in shard["path"][:-1]:
+            if key not in node:
+                node[key] = dict(shard.get("container", {}))
+            node = node[key]
+        node[shard["path"][-1]] = section
+    return brief_data
+
+
+def run_attempt(policy: retry.RetryPolicy, attempt: int, request):
+    """request(attempt, cancel) directly, or raced against a hedge when BRIEF_HEDGE=1 (streaming only)"""
+    if HEDGE_ENABLED:
+        # The hedge request gets the stricter retry prompt
+        return hedging.race(policy.name,
+                            lambda hedge, cancel: request(attempt + hedge - 1, cancel),
+                            hedging.hedge_delay(policy.remaining()))
+    return request(attempt)
+
+
+def generate_shards(label: str, shard_prompts: list, deadline: float) -> dict:
+    """Run every shard concurrently, each with its own retries under the brief's deadline"""
+    parent = tracing.current()
+    started = time.monotonic()
+
+    def run_shard(shard: dict, prompt: tuple) -> dict:
+        policy = retry.RetryPolicy(f"{label} {shard['name']}", max_attempts=MAX_RETRIES,
+                                   base_delay=2, deadline=deadline)
+        
+        def request_shard(attempt: int, cancel: threading.Event = None) -> dict:
+            return call_anthropic_api(prompt, attempt, timeout=policy.timeout(120), cancel=cancel,
+                                      max_tokens=SHARD_MAX_TOKENS, validate=lambda data: extract_shard(data, shard))
+        
+        with tracing.adopt(parent), tracing.span("shard", shard=shard["name"]):
+            part = policy.call(lambda attempt: run_attempt(policy, attempt, request_shard))
+        print(f"  Shard {shard['name']} done after {time.monotonic() - started:.1f}s"
+              f"{f' ({policy.attempts_made} attempts)' if policy.attempts_made > 1 else ''}")
+        return part
+
+    with ThreadPoolExecutor(max_workers=len(shard_prompts), thread_name_prefix="shard") as pool:
+        futures = {shard["name"]: pool.submit(run_shard, shard, prompt) for shard, prompt in shard_prompts}
+        parts = {name: future.result() for name, future in futures.items()}
+
+    return assemble_shards([shard for shard, _ in shard_prompts], parts)
+
+
+def generation_deadline(region: str, brief_type: str) -> float:
+    """time.monotonic() deadline for a brief, derived from its publication slot
     
-    last_error = None
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            print(f"  Generating {brief_type} brief for {region.upper()} using {MODEL}... (attempt {attempt})")
-            brief_data = call_anthropic_api(prompt, attempt)
-            
-            # Transform structure
-            transformed = transform_to_flat_structure(brief_data)
-            
-            # Build hero image URL from keywords (using Unsplash API with regional context)
-            keywords = transformed.get("image_keywords", "")
-            fallback = "morning" if brief_type == "morning" else "evening"
+    Scheduled runs start at their slot, so the budget is the slot plus
+    SLOT_GRACE_MINUTES, clamped to [MIN_GENERATION_BUDGET, MAX_GENERATION_BUDGET].
+    """
+    slot = publication_slot(region, brief_type)
+    seconds_left = (slot + timedelta(minutes=SLOT_GRACE_MINUTES) - datetime.now(timezone.utc)).total_seconds()
+    budget = min(max(seconds_left, MIN_GENERATION_BUDGET), MAX_GENERATION_BUDGET)
+    return time.monotonic() + budget
+
+
+def generate_brief(region: str, brief_type: str, market_data: dict = None, sharded: bool = None) -> dict:
+    """Generate a complete brief with retry logic
+    
+    Pass market_data to reuse a snapshot shared across a batch run, and
+    sharded=True (default: BRIEF_SHARDED) to generate the sections as
+    parallel shards instead of one completion.
+    """
+    sharded = BRIEF_SHARDED if sharded is None else sharded
+    
+    if market_data is None:
+        print(f"  Fetching market data...")
+        market_data = fetch_market_data()
+    
+    with tracing.span("prompt_build", region=region, brief_type=brief_type, sharded=sharded):
+        if sharded:
+            shard_prompts = get_shard_prompts(region, brief_type, market_data)
+        elif brief_type == "evening":
+            prompt = get_evening_prompt(region, market_data)
+        else:
+            prompt = get_morning_prompt(region, market_data)
+    
+    policy = retry.RetryPolicy(f"{region.upper()} {brief_type}", max_attempts=MAX_RETRIES,
+                               base_delay=2, deadline=generation_deadline(region, brief_type))
+    
+    def finish_brief(transformed: dict) -> dict:
+        # Build hero image URL from keywords (using Unsplash API with regional context)
+        keywords = transformed.get("image_keywords", "")
+        fallback = "morning" if brief_type == "morning" else "evening"
+        with tracing.span("image_lookup", keywords=keywords) as span:
             transformed["image_url"] = build_image_url(keywords, fallback, region, brief_type)
-            print(f"  Image keywords: {keywords}")
-            
-            # Add metadata
-            transformed["region"] = region
-            transformed["type"] = brief_type
-            transformed["generated_at"] = get_publication_timestamp(region, brief_type)
-            transformed["btc_price"] = market_data["btc_price"]
-            transformed["eth_price"] = market_data["eth_price"]
-            transformed["total_market_cap"] = market_data["total_market_cap"]
-            transformed["btc_24h_change"] = market_data["btc_24h_change"]
-            
-            return transformed
-            
-        except Exception as e:
-            last_error = e
-            print(f"  Attempt {attempt} failed: {e}")
-            if attempt < MAX_RETRIES:
-                print(f"  Retrying in 5 seconds...")
-                time.sleep(5)
+            span.set(image_url=transformed["image_url"])
+        print(f"  Image keywords: {keywords}")
+        
+        # Add metadata
+        transformed["region"] = region
+        transformed["type"] = brief_type
+        transformed["generated_at"] = get_publication_timestamp(region, brief_type)
+        transformed["btc_price"] = market_data["btc_price"]
+        transformed["eth_price"] = market_data["eth_price"]
+        transformed["total_market_cap"] = market_data["total_market_cap"]
+        transformed["btc_24h_change"] = market_data["btc_24h_change"]
+        
+        return transformed
+    
+    if sharded:
+        print(f"  Generating {brief_type} brief for {region.upper()} as {len(shard_prompts)} shards using {MODEL}... ({policy.remaining():.0f}s budget left)")
+        brief_data = generate_shards(policy.name, shard_prompts, policy.deadline)
+        return finish_brief(validate_brief(transform_to_flat_structure(brief_data)))
+    
+    def request_brief(attempt: int, cancel: threading.Event = None) -> dict:
+        return call_anthropic_api(prompt, attempt, timeout=policy.timeout(120), cancel=cancel,
+                                  validate=lambda data: validate_brief(transform_to_flat_structure(data)))
+    
+    def attempt_generation(attempt: int) -> dict:
+        print(f"  Generating {brief_type} brief for {region.upper()} using {MODEL}... (attempt {attempt}, {policy.remaining():.0f}s budget left)")
+        return finish_brief(run_attempt(policy, attempt, request_brief))
     
-    # All retries failed
-    raise last_error
+    return policy.call(attempt_generation)
 
 
 def save_brief(brief: dict, region: str, brief_type: str):
@@ -1260,19 +1463,119 @@ def save_brief(brief: dict, region: str, brief_type: str):
         region_dir.mkdir(parents=True, exist_ok=True)
         output_file = region_dir / f"{brief_type}.json"
     
-    with open(output_file, "w") as f:
-        json.dump(brief, f, indent=2)
+    result = content_writer.write_json(output_file, brief)
+    if result["written"]:
+        print(f"  Saved to {output_file} ({result['bytes']} bytes)")
+    else:
+        print(f"  Unchanged, kept {output_file}")
+    content_manifest.rebuild()
+
+
+def run_batch(regions: list, brief_types: list, concurrency: int = BATCH_CONCURRENCY) -> dict:
+    """Generate several briefs concurrently from a single market snapshot
+    
+    Jobs are submitted earliest publication slot first, so with a concurrency
+    cap below the job count the most urgent briefs get a worker first. A slow
+    or failing brief never blocks the others.
+    
+    Returns {(region, brief_type): {"ok": bool, "headline"/"error": str, "seconds": float}}
+    """
+    jobs = sorted(
+        [(region, brief_type) for brief_type in brief_types for region in regions],
+        key=lambda job: publication_slot(*job)
+    )
+    
+    print(f"  Fetching market data (shared by {len(jobs)} briefs)...")
+    market_data = fetch_market_data()
+    
+    started = {}
     
-    print(f"  Saved to {output_file}")
+    def run_job(region: str, brief_type: str) -> dict:
+        started[(region, brief_type)] = time.monotonic()
+        with tracing.span("brief", region=region, brief_type=brief_type, batch=True):
+            brief = generate_brief(region, brief_type, market_data)
+            save_brief(brief, region, brief_type)
+        return brief
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(run_job, region, brief_type): (region, brief_type) for region, brief_type in jobs}
+        
+        for future in as_completed(futures):
+            job = futures[future]
+            elapsed = round(time.monotonic() - started[job], 1)
+            try:
+                brief = future.result()
+                results[job] = {"ok": True, "headline": brief.get("headline", ""), "seconds": elapsed}
+                print(f"  ✓ {job[0].upper()} {job[1]} ({elapsed}s): {brief.get('headline', '')}")
+            except Exception as e:
+                results[job] = {"ok": False, "error": str(e), "seconds": elapsed}
+                print(f"  ✗ {job[0].upper()} {job[1]} ({elapsed}s): {e}")
+    
+    return results
+
+
+def print_batch_report(results: dict):
+    """Print per-brief outcome of a batch run"""
+    succeeded = sum(1 for r in results.values() if r["ok"])
+    print(f"\nBatch complete: {succeeded}/{len(results)} briefs generated")
+    stats = PROMPT_CACHE_STATS
+    print(f"  Prompt cache: {stats['hits']} hits, {stats['misses']} misses, {stats['uncached']} uncached ({stats['read_tokens']} tokens read from cache)")
+    if HEDGE_ENABLED:
+        print(f"  Hedging: {hedging.format_stats()}")
+    if llm_cache.CACHE_ENABLED:
+        print(f"  LLM cache: {llm_cache.format_stats()}")
+    for (region, brief_type), result in sorted(results.items()):
+        status = "✓" if result["ok"] else "✗"
+        detail = result.get("headline") if result["ok"] else result.get("error")
+        print(f"  {status} {region:<9} {brief_type:<8} {result['seconds']:>6.1f}s  {detail}")
+
+
+def parse_list(value: str, allowed: list, label: str) -> list:
+    """Parse a comma separated CLI list and validate against allowed values"""
+    items = [v.strip().lower() for v in value.split(",") if v.strip()]
+    invalid = [v for v in items if v not in allowed]
+    if invalid or not items:
+        print(f"Invalid {label}: {', '.join(invalid) or value!r} (choose from {', '.join(allowed)})")
+        sys.exit(1)
+    return items
+
+
+def main_batch(args: list) -> int:
+    """Batch entry point: --all | --regions apac,emea --types morning [--concurrency N]"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="generate_brief.py", description="Generate several briefs in one run")
+    parser.add_argument("--all", action="store_true", help="all regions, morning and evening")
+    parser.add_argument("--regions", default=",".join(BRIEF_REGIONS))
+    parser.add_argument("--types", default=",".join(BRIEF_TYPES))
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    opts = parser.parse_args(args)
+    
+    if opts.all:
+        regions, brief_types = BRIEF_REGIONS, BRIEF_TYPES
+    else:
+        regions = parse_list(opts.regions, BRIEF_REGIONS, "regions")
+        brief_types = parse_list(opts.types, BRIEF_TYPES, "types")
+    
+    print(f"\n[{datetime.now(timezone.utc).isoformat()}] Batch: {', '.join(r.upper() for r in regions)} × {', '.join(brief_types)} (concurrency {opts.concurrency})")
+    
+    results = run_batch(regions, brief_types, opts.concurrency)
+    print_batch_report(results)
+    return 0 if all(r["ok"] for r in results.values()) else 1
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1].startswith("--"):
+        return main_batch(sys.argv[1:])
+    
     if len(sys.argv) < 2:
         print("Usage: python generate_brief.py <region> <type>")
         print("  region: apac, emea, americas, global")
         print("  type: morning, evening, week-ahead")
         print("")
         print("For week-ahead: python generate_brief.py global week-ahead")
+        print("Batch: python generate_brief.py --all | --regions apac,emea --types morning [--concurrency N]")
         sys.exit(1)
     
     region = sys.argv[1].lower()
@@ -1292,12 +1595,17 @@ def main():
     print(f"\n[{datetime.now(timezone.utc).isoformat()}] Generating {region.upper()} {brief_type} brief")
     
     try:
-        if brief_type == "week-ahead":
-            brief = generate_week_ahead()
-        else:
-            brief = generate_brief(region, brief_type)
-        save_brief(brief, region, brief_type)
+        with tracing.span("brief", region=region, brief_type=brief_type):
+            if brief_type == "week-ahead":
+                brief = generate_week_ahead()
+            else:
+                brief = generate_brief(region, brief_type)
+            save_brief(brief, region, brief_type)
         print(f"  ✓ Complete: {brief['headline']}")
+        if HEDGE_ENABLED:
+            print(f"  Hedging: {hedging.format_stats()}")
+        if llm_cache.CACHE_ENABLED:
+            print(f"  LLM cache: {llm_cache.format_stats()}")
         return 0
     except Exception as e:
         print(f"  ✗ Error: {e}")
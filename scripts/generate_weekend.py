@@ -17,12 +17,26 @@ Sections:
 
 import os
 import json
-import re
 from datetime import datetime, timedelta
-import requests
+
+import anthropic_stream
+import content_manifest
+import content_writer
+import http_client
+import json_repair
+import keyword_matcher
+import llm_cache
+import market_snapshot
+import mood_query
+import mood_zones
+import retry
+import tracing
+import unsplash
 
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
-COINGECKO_API = "https://api.coingecko.com/api/v3"
+ANTHROPIC_STREAM = os.environ.get("ANTHROPIC_STREAM", "1") != "0"
+GENERATION_BUDGET = 900  # Seconds for the magazine call, retries included
+TRAIL_DAYS = 7  # Daily points in the market mood trail
 
 # ============================================
 # DYNAMIC HERO IMAGES - Keyword-based with curated fallbacks
@@ -79,23 +93,32 @@ FALLBACK_IMAGES = {
     "weekend": "photo-1507003211169-0a1dd7228f2d",
 }
 
+CURATED_MATCHER = keyword_matcher.KeywordMatcher({}, curated=CURATED_IMAGES)
+
 def build_image_url(keywords: str, fallback: str = "default") -> str:
-    """Build Unsplash URL from AI-generated keywords using curated images"""
+    """Build Unsplash URL from AI-generated keywords
+    
+    Uses the Unsplash search cache shared with the briefs, falling back to
+    curated images.
+    """
+    
+    search_parts = [k.strip() for k in (keywords or "").split(",") if k.strip()][:3]
+    if search_parts:
+        try:
+            api_url = unsplash.find_image(" ".join(search_parts), search_parts[0] if len(search_parts) > 1 else None)
+            if api_url:
+                return api_url
+        except Exception as e:
+            print(f"   Unsplash API error: {e}")
     
     if not keywords:
         photo_id = FALLBACK_IMAGES.get(fallback, FALLBACK_IMAGES["default"])
         return f"https://images.unsplash.com/{photo_id}?w=1400&h=500&fit=crop&q=80"
     
-    # Clean keywords
-    keyword_list = [k.strip().lower() for k in keywords.split(",")]
-    
-    # Find first matching curated image
-    for keyword in keyword_list:
-        # Check each word in multi-word keywords
-        for word in keyword.split():
-            if word in CURATED_IMAGES:
-                photo_id = CURATED_IMAGES[word]
-                return f"https://images.unsplash.com/{photo_id}?w=1400&h=500&fit=crop&q=80"
+    # Find first matching curated image (whole words, in keyword order)
+    photo_id = CURATED_MATCHER.match(keywords.split(",")).curated
+    if photo_id:
+        return f"https://images.unsplash.com/{photo_id}?w=1400&h=500&fit=crop&q=80"
     
     # No match found, use fallback
     photo_id = FALLBACK_IMAGES.get(fallback, FALLBACK_IMAGES["default"])
@@ -246,39 +269,26 @@ def fetch_weekly_market_data():
     }
     
     try:
-        # Global data
-        global_resp = requests.get(f"{COINGECKO_API}/global", timeout=10)
-        if global_resp.ok:
-            global_data = global_resp.json().get("data", {})
-            data["total_market_cap"] = global_data.get("total_market_cap", {}).get("usd", 0)
-            data["btc_dominance"] = global_data.get("market_cap_percentage", {}).get("btc", 0)
-            data["eth_dominance"] = global_data.get("market_cap_percentage", {}).get("eth", 0)
-            data["market_cap_change_24h"] = global_data.get("market_cap_change_percentage_24h_usd", 0)
+        # Global data and top coins with 7d and 30d data, from the shared snapshot
+        snapshot = market_snapshot.get_snapshot()
         
-        # Top coins with 7d and 30d data
-        coins_resp = requests.get(
-            f"{COINGECKO_API}/coins/markets",
-            params={
-                "vs_currency": "usd",
-                "order": "market_cap_desc",
-                "per_page": 20,
-                "sparkline": False,
-                "price_change_percentage": "24h,7d,30d"
-            },
-            timeout=10
-        )
-        if coins_resp.ok:
-            for coin in coins_resp.json():
-                data["top_coins"].append({
-                    "id": coin.get("id"),
-                    "symbol": coin.get("symbol", "").upper(),
-                    "name": coin.get("name"),
-                    "price": coin.get("current_price", 0),
-                    "market_cap": coin.get("market_cap", 0),
-                    "change_24h": coin.get("price_change_percentage_24h", 0),
-                    "change_7d": coin.get("price_change_percentage_7d_in_currency", 0),
-                    "change_30d": coin.get("price_change_percentage_30d_in_currency", 0)
-                })
+        global_data = snapshot["global"].get("data", {})
+        data["total_market_cap"] = global_data.get("total_market_cap", {}).get("usd", 0)
+        data["btc_dominance"] = global_data.get("market_cap_percentage", {}).get("btc", 0)
+        data["eth_dominance"] = global_data.get("market_cap_percentage", {}).get("eth", 0)
+        data["market_cap_change_24h"] = global_data.get("market_cap_change_percentage_24h_usd", 0)
+        
+        for coin in snapshot["coins"][:20]:
+            data["top_coins"].append({
+                "id": coin.get("id"),
+                "symbol": coin.get("symbol", "").upper(),
+                "name": coin.get("name"),
+                "price": coin.get("current_price", 0),
+                "market_cap": coin.get("market_cap", 0),
+                "change_24h": coin.get("price_change_percentage_24h", 0),
+                "change_7d": coin.get("price_change_percentage_7d_in_currency", 0),
+                "change_30d": coin.get("price_change_percentage_30d_in_currency", 0)
+            })
         
         # Segment performance - matches UI categories
         segments = {
@@ -310,10 +320,37 @@ def fetch_weekly_market_data():
 
 
 def calculate_market_mood(market_data):
-    """Calculate market mood for the 9-box grid"""
-    top_coins = market_data.get("top_coins", [])
+    """Calculate market mood for the 9-box grid
     
-    if not top_coins:
+    Uses the captured mood history (capture_mood.py) when there is any: the
+    latest hourly point for the current position and the daily points of the
+    past week for the trail. Falls back to estimates from the coin data.
+    """
+    top_coins = market_data.get("top_coins", [])
+    latest = mood_query.latest()
+    history = [p for p in mood_query.daily(TRAIL_DAYS) if p.get("breadth") is not None and p.get("mv") is not None]
+    
+    if latest and latest.get("mv") is not None:
+        breadth = latest["breadth"]
+        volume_ratio = mood_zones.mv_to_activity(latest["mv"])
+        source = "history"
+    elif top_coins:
+        # Calculate breadth (% coins green over 7d)
+        green_coins = sum(1 for c in top_coins if c.get("change_7d", 0) > 0)
+        breadth = (green_coins / len(top_coins)) * 100
+        
+        # Approximate volume ratio from market cap change (proxy for activity)
+        # Higher absolute change = more activity
+        activity_proxy = abs(market_data.get("market_cap_change_24h", 0))
+        # Scale: 0-2% change = quiet (20-40), 2-5% = normal (40-60), 5%+ = frenzied (60-80)
+        if activity_proxy < 2:
+            volume_ratio = 25 + (activity_proxy / 2) * 15  # 25-40
+        elif activity_proxy < 5:
+            volume_ratio = 40 + ((activity_proxy - 2) / 3) * 20  # 40-60
+        else:
+            volume_ratio = 60 + min((activity_proxy - 5) / 5, 1) * 20  # 60-80
+        source = "estimate"
+    else:
         return {
             "current": {"breadth": 50, "volume_ratio": 50, "zone": "consolidation"},
             "trail": [],
@@ -321,30 +358,22 @@ def calculate_market_mood(market_data):
             "description": "Market data unavailable."
         }
     
-    # Calculate breadth (% coins green over 7d)
-    green_coins = sum(1 for c in top_coins if c.get("change_7d", 0) > 0)
-    breadth = (green_coins / len(top_coins)) * 100
-    
-    # Approximate volume ratio from market cap change (proxy for activity)
-    # Higher absolute change = more activity
-    activity_proxy = abs(market_data.get("market_cap_change_24h", 0))
-    # Scale: 0-2% change = quiet (20-40), 2-5% = normal (40-60), 5%+ = frenzied (60-80)
-    if activity_proxy < 2:
-        volume_ratio = 25 + (activity_proxy / 2) * 15  # 25-40
-    elif activity_proxy < 5:
-        volume_ratio = 40 + ((activity_proxy - 2) / 3) * 20  # 40-60
-    else:
-        volume_ratio = 60 + min((activity_proxy - 5) / 5, 1) * 20  # 60-80
-    
     # Determine zone based on position
-    zone = determine_zone(breadth, volume_ratio)
-    
-    # Generate 7-day trail (simulated from current + variance for now)
-    # In production, you'd fetch actual historical data
-    trail = generate_7day_trail(breadth, volume_ratio, top_coins)
+    zone = mood_zones.determine_zone(breadth, volume_ratio)
+    
+    # 7-day trail from the stored daily points, simulated without enough history
+    if len(history) >= 2:
+        trail = [{
+            "date": p["start"][:10],
+            "breadth": round(p["breadth"], 1),
+            "volume_ratio": round(mood_zones.mv_to_activity(p["mv"]), 1),
+            "mv": round(p["mv"], 1)
+        } for p in history]
+    else:
+        trail = generate_7day_trail(breadth, volume_ratio, top_coins)
     
     # Get zone title and description
-    zone_info = get_zone_info(zone, breadth, volume_ratio)
+    zone_info = mood_zones.get_zone_info(zone, breadth, volume_ratio)
     
     return {
         "current": {
@@ -353,41 +382,14 @@ def calculate_market_mood(market_data):
             "zone": zone
         },
         "trail": trail,
+        "source": source,
         "title": zone_info["title"],
         "description": zone_info["description"]
     }
 
 
-def determine_zone(breadth, volume_ratio):
-    """Determine which of the 9 zones based on breadth and volume"""
-    # Breadth: 0-33 = left, 33-66 = middle, 66-100 = right
-    # Volume: 0-33 = bottom, 33-66 = middle, 66-100 = top
-    
-    if volume_ratio >= 66:  # Frenzied (top row)
-        if breadth < 33:
-            return "concentration"
-        elif breadth < 66:
-            return "leadership"
-        else:
-            return "strong-rally"
-    elif volume_ratio >= 33:  # Normal (middle row)
-        if breadth < 33:
-            return "rotation"
-        elif breadth < 66:
-            return "consolidation"
-        else:
-            return "steady-advance"
-    else:  # Quiet (bottom row)
-        if breadth < 33:
-            return "capitulation"
-        elif breadth < 66:
-            return "drift"
-        else:
-            return "weak-rally"
-
-
 def generate_7day_trail(current_breadth, current_volume, top_coins):
-    """Generate 7-day trail points based on historical coin performance"""
+    """Simulate 7-day trail points from coin performance (no mood history stored)"""
     trail = []
     
     # Use 7d vs 24h changes to infer historical movement
@@ -419,53 +421,6 @@ def generate_7day_trail(current_breadth, current_volume, top_coins):
     return trail
 
 
-def get_zone_info(zone, breadth, volume_ratio):
-    """Get title and description for a zone"""
-    zone_descriptions = {
-        "strong-rally": {
-            "title": "Strong Rally",
-            "description": f"Broad participation with high conviction. The market is moving decisively higher with strong volume confirmation."
-        },
-        "leadership": {
-            "title": "Leadership",
-            "description": f"Large caps leading with elevated activity. {int(breadth)}% of coins positive, suggesting selective but powerful momentum."
-        },
-        "concentration": {
-            "title": "Concentration",
-            "description": "High volume but narrow participation. Capital is concentrating in select assets while most lag behind."
-        },
-        "steady-advance": {
-            "title": "Steady Advance",
-            "description": f"Healthy breadth at {int(breadth)}% with measured volume. The kind of sustainable advance institutional investors prefer."
-        },
-        "consolidation": {
-            "title": "Consolidation",
-            "description": "Mixed signals with moderate activity. Market is digesting recent moves, direction unclear."
-        },
-        "rotation": {
-            "title": "Rotation",
-            "description": "Sector rotation underway with elevated volume. Capital is moving, but direction is unclear."
-        },
-        "weak-rally": {
-            "title": "Weak Rally",
-            "description": f"Broad but unconvincing. {int(breadth)}% green but low volume suggests lack of conviction."
-        },
-        "drift": {
-            "title": "Drift",
-            "description": "Quiet market with no clear direction. Low participation and low activity - summer doldrums or calm before storm."
-        },
-        "capitulation": {
-            "title": "Capitulation",
-            "description": "Broad weakness with elevated selling pressure. Risk-off sentiment dominates across the board."
-        }
-    }
-    
-    return zone_descriptions.get(zone, {
-        "title": "Unknown",
-        "description": "Market conditions unclear."
-    })
-
-
 def get_key_dates_for_week():
     """Generate key dates for the coming week"""
     # This could be enhanced to pull from a calendar API or database
@@ -704,33 +659,80 @@ def call_anthropic_api(prompt):
         ]
     }
     
-    try:
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=payload,
-            timeout=120
-        )
-        
-        if response.ok:
-            content = response.json()["content"][0]["text"]
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{[\s\S]*\}', content)
-            if json_match:
-                return json.loads(json_match.group())
+    policy = retry.RetryPolicy("Magazine", max_attempts=3, base_delay=5, budget=GENERATION_BUDGET)
+    
+    def request_magazine(attempt: int) -> dict:
+        if attempt > 1:
+            print(f"   Attempt {attempt} ({policy.remaining():.0f}s budget left)")
+        cached = llm_cache.get(payload)
+        with tracing.span("llm_call", attempt=attempt, model=payload["model"], stream=ANTHROPIC_STREAM, cached=bool(cached),
+                          bytes_out=0 if cached else len(json.dumps(payload).encode())) as span:
+            if cached:
+                content = cached["text"]
+                usage, stop_reason = cached.get("usage"), cached.get("stop_reason")
+                print(f"   Reusing cached completion ({len(content)} chars)")
+            elif ANTHROPIC_STREAM:
+                # Streaming aborts early if the magazine JSON goes structurally wrong
+                result = anthropic_stream.stream_message(payload, ANTHROPIC_API_KEY, timeout=policy.timeout(120))
+                content = result["text"]
+                usage, stop_reason = result["usage"], result["stop_reason"]
+                span.set(first_section_s=result["first_section"], sections=result["sections"],
+                         stop_reason=result["stop_reason"])
+                print(f"   Streamed {len(content)} chars in {result['seconds']}s")
+                for section, seconds in result["sections"].items():
+                    print(f"   {section:<16} done at {seconds}s")
             else:
-                print("Warning: Could not extract JSON from response")
-                return {"error": "Could not parse response"}
-        else:
-            print(f"API Error: {response.status_code} - {response.text}")
-            return {"error": f"API error: {response.status_code}"}
-            
+                response = http_client.post(
+                    anthropic_stream.ANTHROPIC_API_URL,
+                    headers=headers,
+                    json_body=payload,
+                    timeout=policy.timeout(120)
+                )
+                
+                if not response.ok:
+                    print(f"API Error: {response.status} - {response.text}")
+                body = response.raise_for_status().json()
+                content = body["content"][0]["text"]
+                usage, stop_reason = body.get("usage"), body.get("stop_reason")
+            span.set(bytes_in=len(content.encode()))
+        
+        # Extract JSON from response, repairing common model mistakes
+        with tracing.span("json_parse", bytes_in=len(content.encode())) as span:
+            try:
+                magazine, repairs = json_repair.parse_json_tolerant(content)
+                if repairs:
+                    print(f"   Repaired JSON: {json_repair.format_repairs(repairs)}")
+                    span.set(repairs=json_repair.format_repairs(repairs))
+                validate_magazine(magazine, stop_reason)
+            except ValueError:  # JSONRepairError included
+                if cached:
+                    llm_cache.discard(payload)
+                raise
+        if not cached:
+            llm_cache.put(payload, content, usage, stop_reason)
+        return magazine
+    
+    try:
+        return policy.call(request_magazine)
+    except json_repair.JSONRepairError as e:
+        print(f"Warning: Could not extract JSON from response: {e}")
+        return {"error": "Could not parse response"}
     except Exception as e:
         print(f"Error calling Anthropic API: {e}")
         return {"error": str(e)}
 
 
+def validate_magazine(magazine, stop_reason: str = None) -> dict:
+    """Reject a truncated completion or a magazine without the sections generate_weekend_magazine uses (retryable)"""
+    if stop_reason == "max_tokens":
+        raise ValueError("Magazine was cut off at max_tokens")
+    if not isinstance(magazine, dict):
+        raise ValueError("Magazine is not a JSON object")
+    if not isinstance(magazine.get("hero"), dict) or not str(magazine["hero"].get("headline", "")).strip():
+        raise ValueError("Magazine has no hero")
+    return magazine
+
+
 def generate_weekend_magazine():
     """Generate the complete weekend magazine"""
     print("=" * 60)
@@ -749,7 +751,8 @@ def generate_weekend_magazine():
     
     # Generate magazine content
     print("\n📝 Generating magazine content...")
-    prompt = get_magazine_prompt(market_data, mechanism)
+    with tracing.span("prompt_build"):
+        prompt = get_magazine_prompt(market_data, mechanism)
     magazine_content = call_anthropic_api(prompt)
     
     if "error" in magazine_content:
@@ -758,7 +761,9 @@ def generate_weekend_magazine():
     
     # Process hero image from keywords
     hero_keywords = magazine_content.get("hero", {}).get("image_keywords", "")
-    hero_image_url = build_image_url(hero_keywords, "weekend")
+    with tracing.span("image_lookup", keywords=hero_keywords) as span:
+        hero_image_url = build_image_url(hero_keywords, "weekend")
+        span.set(image_url=hero_image_url)
     magazine_content["hero"]["image_url"] = hero_image_url
     print(f"\n🖼️  Hero image keywords: {hero_keywords}")
     
@@ -776,7 +781,8 @@ def generate_weekend_magazine():
     print("\n📈 Calculating market mood...")
     market_mood = calculate_market_mood(market_data)
     magazine_content["market_mood"] = market_mood
-    print(f"   Zone: {market_mood['title']} (breadth: {market_mood['current']['breadth']}%)")
+    print(f"   Zone: {market_mood['title']} (breadth: {market_mood['current']['breadth']}%, "
+          f"{len(market_mood['trail'])}-point trail, {market_mood.get('source', 'estimate')})")
     
     # Add metadata
     magazine_content["generated_at"] = datetime.now().isoformat()
@@ -795,13 +801,14 @@ def generate_weekend_magazine():
     
     # Save to file
     output_dir = "content/weekend"
-    os.makedirs(output_dir, exist_ok=True)
-    
     output_path = os.path.join(output_dir, "magazine.json")
-    with open(output_path, "w") as f:
-        json.dump(magazine_content, f, indent=2)
+    result = content_writer.write_json(output_path, magazine_content)
+    content_manifest.rebuild()
     
-    print(f"\n✅ Magazine saved to {output_path}")
+    if result["written"]:
+        print(f"\n✅ Magazine saved to {output_path} ({result['bytes']} bytes)")
+    else:
+        print(f"\n✅ Magazine unchanged, kept {output_path}")
     print(f"   Hero: {magazine_content.get('hero', {}).get('headline', 'N/A')}")
     print(f"   Keywords: {hero_keywords}")
     print(f"   Mechanism: {magazine_content.get('mechanism', {}).get('topic', 'N/A')}")
@@ -814,4 +821,6 @@ if __name__ == "__main__":
         print("Error: ANTHROPIC_API_KEY environment variable not set")
         exit(1)
     
-    generate_weekend_magazine()
+    with tracing.span("weekend") as span:
+        if generate_weekend_magazine() is None:
+            span.set(outcome="error")
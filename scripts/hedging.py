@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Hedged requests - The Litmus
+Opt-in racing of a second LLM request against a slow or failing first one.
+
+Sequential retries make a bad brief cost up to two full generations plus
+backoff: attempt 2 only starts once attempt 1 has failed. With hedging on,
+race() starts the primary request, and if it has not produced a usable
+result after HEDGE_DELAY seconds (immediately when the slot is close to its
+deadline, or as soon as the primary fails) it fires a hedge request. The
+first result that passes parsing and validation wins; the loser's Cancel
+is set, which runs its close callbacks: a streamed request registers one
+that shuts its socket down, so even a stalled stream stops (and stops being
+billed) at once. Blocking requests cannot be interrupted, so the generators
+only hedge when streaming is on.
+
+    brief = hedging.race("APAC morning", lambda request, cancel: fetch(request, cancel),
+                         hedging.hedge_delay(policy.remaining()))
+
+HEDGE_STATS counts races, hedges fired and which request won, so the extra
+token spend can be weighed against the latency saved; each race is also a
+"hedge_race" span in the trace.
+
+Configuration:
+- BRIEF_HEDGE=1 enables hedging (off by default - it can double LLM spend)
+- BRIEF_HEDGE_DELAY: seconds before the hedge fires (default 60)
+- BRIEF_HEDGE_URGENT: hedge immediately when less than this many seconds
+  of the generation budget remain (default 180, below the 240s minimum
+  budget so only runs already close to their slot hedge straight away)
+"""
+
+import os
+import queue
+import threading
+import time
+
+import retry
+import tracing
+
+HEDGE_ENABLED = os.environ.get("BRIEF_HEDGE", "0") == "1"
+HEDGE_DELAY = float(os.environ.get("BRIEF_HEDGE_DELAY", "60"))
+HEDGE_URGENT = float(os.environ.get("BRIEF_HEDGE_URGENT", "180"))
+
+PRIMARY, HEDGE = 1, 2
+
+HEDGE_STATS = {"races": 0, "hedged": 0, "primary_wins": 0, "hedge_wins": 0, "cancelled": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+
+def hedge_delay(remaining: float) -> float:
+    """Seconds to wait before hedging, given the generation budget left"""
+    return 0.0 if remaining < HEDGE_URGENT else HEDGE_DELAY
+
+
+def count(**increments):
+    with _stats_lock:
+        for key, value in increments.items():
+            HEDGE_STATS[key] += value
+
+
+def format_stats() -> str:
+    stats = HEDGE_STATS
+    return (f"{stats['races']} races, {stats['hedged']} hedged, wins primary {stats['primary_wins']} / "
+            f"hedge {stats['hedge_wins']}, {stats['cancelled']} cancelled, {stats['failed']} failed")
+
+
+class Cancel(threading.Event):
+    """Event that also runs close callbacks when set, to interrupt a blocked request"""
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """Run callback when the event is set - right away if it already is"""
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def set(self):
+        with self._callbacks_lock:
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+
+def race(name: str, fn, delay: float):
+    """Run fn(request, cancel) as primary, hedge after delay; return the first success
+
+    request is PRIMARY or HEDGE; cancel is a Cancel the callee should honour,
+    ideally by registering a callback that closes its connection. Raises the last failure if every launched request fails, or a
+    non-retryable failure straight away.
+    """
+    results = queue.Queue()
+    cancels = {}
+
+    def run(request: int, cancel: threading.Event, parent):
+        with tracing.adopt(parent), tracing.span("hedge_request", request=request) as span:
+            try:
+                value = fn(request, cancel)
+            except Exception as e:
+                span.set(outcome="cancelled" if cancel.is_set() else "failed", failure=retry.describe(e))
+                results.put((request, False, e))
+                return
+            results.put((request, True, value))
+
+    def launch(request: int):
+        cancels[request] = Cancel()
+        threading.Thread(target=run, args=(request, cancels[request], span), daemon=True,
+                         name=f"hedge-{request}").start()
+
+    count(races=1)
+    with tracing.span("hedge_race", policy=name, hedge_delay=delay) as span:
+        started = time.monotonic()
+        launch(PRIMARY)
+        pending = {PRIMARY}
+        error = None
+
+        while pending:
+            wait = None if HEDGE in cancels else max(0.0, started + delay - time.monotonic())
+            try:
+                request, ok, value = results.get(timeout=wait)
+            except queue.Empty:
+                print(f"  {name}: no result after {delay:.0f}s, firing hedge request")
+                count(hedged=1)
+                launch(HEDGE)
+                pending.add(HEDGE)
+                continue
+
+            pending.discard(request)
+            label = "primary" if request == PRIMARY else "hedge"
+            if ok:
+                for other in pending:
+                    cancels[other].set()
+                count(cancelled=len(pending), **{f"{label}_wins": 1})
+                span.set(hedged=HEDGE in cancels, winner=label, seconds=round(time.monotonic() - started, 1))
+                if HEDGE in cancels:
+                    print(f"  {name}: {label} request won after {time.monotonic() - started:.0f}s")
+                return value
+
+            error = value
+            print(f"  {name}: {label} request failed ({retry.describe(value)})")
+            if not retry.is_retryable(value):
+                for other in pending:
+                    cancels[other].set()
+                break
+            if HEDGE not in cancels:
+                # Primary failed before the hedge fired - start it now instead of after a backoff
+                count(hedged=1)
+                launch(HEDGE)
+                pending.add(HEDGE)
+
+        count(failed=1)
+        span.set(hedged=HEDGE in cancels, winner=None)
+        raise error
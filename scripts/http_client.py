@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client - The Litmus
+Keep-alive connection pools for every outbound call made by scripts/.
+
+Standard library only (http.client), so capture_mood keeps running on a bare
+Python install. One process-wide client holds a small pool of persistent
+connections per (scheme, host, port): repeated calls to api.coingecko.com,
+api.unsplash.com, api.anthropic.com and api.elevenlabs.io reuse the TLS
+session instead of paying a handshake each time.
+
+Centralised here:
+- timeouts (HTTP_TIMEOUT, default 30s; callers may override per request)
+- User-Agent (TheLitmus/1.0)
+- gzip/deflate response decoding
+- streaming responses (SSE) with early close
+- a tracing span per request (status, bytes in/out)
+- the transport: LITMUS_TRANSPORT=live (default) talks to the real services,
+  record additionally saves every 2xx response under .cache/recordings (see
+  recordings.py), replay sends every request to the local stand-in server
+  (standin_server.py) instead, so generators run with no network access
+"""
+
+import gzip
+import http.client
+import json
+import os
+import queue
+import socket
+import ssl
+import threading
+import time
+import zlib
+from urllib.parse import urlencode, urlsplit
+
+import recordings
+import tracing
+
+USER_AGENT = "TheLitmus/1.0"
+DEFAULT_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "30"))
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get("HTTP_POOL_SIZE", "4"))
+
+TRANSPORTS = ("live", "record", "replay")
+TRANSPORT = os.environ.get("LITMUS_TRANSPORT", "live")
+STANDIN_URL = os.environ.get("LITMUS_STANDIN_URL", "http://127.0.0.1:8750")
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class HTTPError(OSError):
+    """Non-2xx response, raised by Response.raise_for_status()"""
+
+    def __init__(self, status: int, reason: str, url: str, headers: dict = None, body: bytes = b""):
+        super().__init__(f"HTTP {status} {reason} for {url}")
+        self.status = status
+        self.reason = reason
+        self.url = url
+        self.headers = headers or {}
+        self.body = body
+
+
+def decode_body(body: bytes, encoding: str) -> bytes:
+    """Undo Content-Encoding"""
+    encoding = (encoding or "").lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+class Response:
+    """Fully read response"""
+
+    def __init__(self, url: str, status: int, reason: str, headers: dict, body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content.decode("utf-8"))
+
+    def raise_for_status(self) -> "Response":
+        if not self.ok:
+            raise HTTPError(self.status, self.reason, self.url, self.headers, self.content)
+        return self
+
+
+class StreamResponse:
+    """Response whose body is consumed incrementally (e.g. SSE)
+
+    Use as a context manager. Closing before the body is exhausted drops the
+    connection, which is how callers abort an in-flight generation.
+    """
+
+    def __init__(self, client, key, conn, resp, url: str):
+        self._client = client
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self.url = url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = {k.lower(): v for k, v in resp.getheaders()}
+        self.recorder = None  # record mode: called with every line once the stream is fully read
+        self._lines = []
+        self._aborted = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def raise_for_status(self) -> "StreamResponse":
+        if not self.ok:
+            body = self._resp.read()
+            self.close()
+            raise HTTPError(self.status, self.reason, self.url, self.headers, body)
+        return self
+
+    def iter_lines(self):
+        """Yield decoded lines without trailing newline"""
+        while True:
+            line = self._resp.readline()
+            if not line:
+                break
+            line = line.decode("utf-8").rstrip("\r\n")
+            if self.recorder is not None:
+                self._lines.append(line)
+            yield line
+
+    def abort(self):
+        """Shut the socket down from another thread, waking a read blocked on a stalled stream
+
+        The reading thread sees EOF or a socket error; its close() then drops
+        the connection instead of pooling it.
+        """
+        self._aborted = True
+        conn = self._conn
+        sock = conn.sock if conn is not None else None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        if self._conn is None:
+            return
+        if self.recorder is not None and self.ok and self._resp.isclosed() and not self._aborted:
+            self.recorder(self._lines)
+        if self._resp.isclosed() and not self._resp.will_close and not self._aborted:
+            self._client._release(self._key, self._conn)
+        else:
+            self._resp.close()
+            self._conn.close()
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HttpClient:
+    """Thread-safe client with per-host keep-alive connection pools"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, max_per_host: int = MAX_CONNECTIONS_PER_HOST,
+                 user_agent: str = USER_AGENT, transport: str = None, standin_url: str = None):
+        transport = transport or TRANSPORT
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport {transport!r} (choose from {', '.join(TRANSPORTS)})")
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.user_agent = user_agent
+        self.transport = transport
+        self.standin_url = (standin_url or STANDIN_URL).rstrip("/")
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def _pool(self, key) -> queue.LifoQueue:
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = queue.LifoQueue(maxsize=self.max_per_host)
+            return self._pools[key]
+
+    def _new_connection(self, key, timeout: float):
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self, key, timeout: float):
+        """Return (connection, reused)"""
+        try:
+            conn = self._pool(key).get_nowait()
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            conn.timeout = timeout
+            return conn, True
+        except queue.Empty:
+            return self._new_connection(key, timeout), False
+
+    def _drain(self, key):
+        """Close every idle connection pooled for key"""
+        pool = self._pool(key)
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _release(self, key, conn):
+        try:
+            self._pool(key).put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method: str, url: str, params: dict = None, headers: dict = None,
+                json_body=None, data: bytes = None, timeout: float = None, stream: bool = False):
+        """Send a request; returns Response, or StreamResponse when stream=True"""
+        upstream = urlsplit(url)
+        if self.transport == "replay":
+            # The stand-in serves every host under /<host>/<path>
+            url = f"{self.standin_url}/{upstream.hostname}{upstream.path or '/'}"
+            if upstream.query:
+                url = f"{url}?{upstream.query}"
+        parts = urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+
+        path = parts.path or "/"
+        query = parts.query
+        if params:
+            query = f"{query}&{urlencode(params)}" if query else urlencode(params)
+        if query:
+            path = f"{path}?{query}"
+
+        all_headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": "identity" if stream else "gzip, deflate",
+        }
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            all_headers["Content-Type"] = "application/json"
+        all_headers.update(headers or {})
+
+        timeout = self.timeout if timeout is None else timeout
+
+        with tracing.span("http", method=method, host=upstream.hostname, path=upstream.path,
+                          bytes_out=len(data) if data else 0, stream=stream, transport=self.transport) as span:
+            started = time.monotonic()
+            response = self._send(key, method, path, data, all_headers, timeout, url, stream)
+            span.set(status=response.status)
+            if not stream:
+                span.set(bytes_in=len(response.content))
+            if not response.ok:
+                span.set(outcome="http_error")
+            if self.transport == "record" and response.ok:
+                self._record(method, upstream.hostname, upstream.path or "/", query, data, response, started)
+            return response
+
+    def _record(self, method: str, host: str, path: str, query: str, data: bytes, response, started: float):
+        """Save a 2xx response; streams are saved once fully read"""
+        def save(content: bytes = None, lines: list = None):
+            try:
+                recordings.save(method, host, path, query, data, response.status, response.reason,
+                                response.headers, content=content, lines=lines,
+                                elapsed=time.monotonic() - started)
+            except OSError as e:
+                print(f"  Warning: Could not record {method} {host}{path}: {e}")
+
+        if isinstance(response, StreamResponse):
+            response.recorder = lambda lines: save(lines=lines)
+        else:
+            save(content=response.content)
+
+    def _send(self, key, method: str, path: str, data: bytes, headers: dict, timeout: float,
+              url: str, stream: bool):
+        retried = False
+        while True:
+            conn, reused = (self._new_connection(key, timeout), False) if retried else self._acquire(key, timeout)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                tracing.current().set(reused_connection=reused)
+                break
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                # A pooled connection the server already closed - the others pooled for
+                # the host idled as long, so drop them and retry once on a fresh one
+                if not reused or retried:
+                    raise
+                self._drain(key)
+                retried = True
+            except Exception:
+                conn.close()
+                raise
+
+        if stream:
+            return StreamResponse(self, key, conn, resp, url)
+
+        try:
+            body = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        response_headers = {k.lower(): v for k, v in resp.getheaders()}
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        body = decode_body(body, response_headers.get("content-encoding"))
+        return Response(url, resp.status, resp.reason, response_headers, body)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Process-wide shared client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def set_client(client) -> HttpClient:
+    """Swap the process-wide client (e.g. a fixture replay client); returns the previous one"""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+        return previous
+
+
+def get(url: str, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def post(url: str, **kwargs):
+    return get_client().post(url, **kwargs)
+
+
+def get_json(url: str, **kwargs):
+    """GET and decode JSON, raising HTTPError on non-2xx"""
+    return get(url, **kwargs).raise_for_status().json()
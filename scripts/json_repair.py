@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Tolerant JSON parser - The Litmus
+Single-pass recovering parser for the JSON objects Claude writes.
+
+Replaces the old cascade (json.loads, greedy regex, clean_json_string regex
+passes, fix_unescaped_quotes rebuild, json.loads again...) with one
+recursive-descent scan that repairs as it goes:
+
+- prose or ```json code fences before/after the object
+- trailing commas before } or ]
+- control characters inside strings (newlines/tabs escaped, others dropped)
+- unescaped quotes inside string values
+- missing commas between members
+- output truncated mid-object (open structures are closed)
+
+Well-formed output (optionally fenced) is handed straight to json.loads;
+only text that fails that is scanned. Every repair is reported so callers
+can log what the model got wrong.
+
+Benchmark against the old cascade: python scripts/bench_json_parse.py
+"""
+
+import json
+import re
+
+# Runs of ordinary string characters (no quote, backslash or control char)
+_STRING_RUN = re.compile(r'[^"\\\x00-\x1f]+')
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_CONTROL_ESCAPES = {'\n': '\n', '\t': '\t', '\r': '\r'}
+_LITERALS = (("true", True), ("false", False), ("null", None))
+
+
+class JSONRepairError(ValueError):
+    """The text could not be recovered into a JSON object"""
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.end = len(text)
+        self.repairs = {}
+        self.containers = []      # '{' / '[' for the structures being parsed
+
+    def repaired(self, what: str):
+        self.repairs[what] = self.repairs.get(what, 0) + 1
+
+    def skip_ws(self):
+        self.pos = _WHITESPACE.match(self.text, self.pos).end()
+
+    def peek(self) -> str:
+        return self.text[self.pos] if self.pos < self.end else ""
+
+    def fail(self, message: str):
+        raise JSONRepairError(f"{message} at char {self.pos}")
+
+    # ------------------------------------------------------------------
+    def parse_value(self):
+        self.skip_ws()
+        char = self.peek()
+        if char == '{':
+            return self.parse_object()
+        if char == '[':
+            return self.parse_array()
+        if char == '"':
+            return self.parse_string(is_key=False)
+        if char in '-0123456789':
+            match = _NUMBER.match(self.text, self.pos)
+            if match:
+                self.pos = match.end()
+                number = match.group()
+                return float(number) if any(c in number for c in '.eE') else int(number)
+        for word, value in _LITERALS:
+            if self.text.startswith(word, self.pos):
+                self.pos += len(word)
+                return value
+        if not char:
+            self.fail("Unexpected end of input")
+        self.fail(f"Unexpected character {char!r}")
+
+    def parse_object(self) -> dict:
+        self.containers.append('{')
+        try:
+            return self._parse_object()
+        finally:
+            self.containers.pop()
+
+    def _parse_object(self) -> dict:
+        self.pos += 1
+        result = {}
+        while True:
+            self.skip_ws()
+            char = self.peek()
+            if char == '}':
+                self.pos += 1
+                return result
+            if not char:
+                self.repaired("closed truncated object")
+                return result
+            if char == ',':
+                # Leading/duplicate comma, or trailing comma before }
+                self.pos += 1
+                self.skip_ws()
+                if self.peek() == '}':
+                    self.repaired("trailing comma")
+                else:
+                    self.repaired("stray comma")
+                continue
+            if char != '"':
+                self.fail(f"Expected object key, found {char!r}")
+
+            key = self.parse_string(is_key=True)
+            self.skip_ws()
+            if self.peek() != ':':
+                if not self.peek():
+                    self.repaired("closed truncated object")
+                    return result
+                self.fail(f"Expected ':' after key {key!r}")
+            self.pos += 1
+            self.skip_ws()
+            if not self.peek():
+                self.repaired("closed truncated object")
+                return result
+            result[key] = self.parse_value()
+
+            self.skip_ws()
+            char = self.peek()
+            if char == ',':
+                self.pos += 1
+                self.skip_ws()
+                if self.peek() == '}':
+                    self.repaired("trailing comma")
+            elif char == '"':
+                self.repaired("missing comma")
+            elif char and char != '}':
+                self.fail(f"Expected ',' or '}}', found {char!r}")
+
+    def parse_array(self) -> list:
+        self.containers.append('[')
+        try:
+            return self._parse_array()
+        finally:
+            self.containers.pop()
+
+    def _parse_array(self) -> list:
+        self.pos += 1
+        result = []
+        while True:
+            self.skip_ws()
+            char = self.peek()
+            if char == ']':
+                self.pos += 1
+                return result
+            if not char:
+                self.repaired("closed truncated array")
+                return result
+            if char == ',':
+                self.pos += 1
+                self.skip_ws()
+                if self.peek() == ']':
+                    self.repaired("trailing comma")
+                else:
+                    self.repaired("stray comma")
+                continue
+
+            result.append(self.parse_value())
+
+            self.skip_ws()
+            char = self.peek()
+            if char == ',':
+                self.pos += 1
+                self.skip_ws()
+                if self.peek() == ']':
+                    self.repaired("trailing comma")
+            elif char in '"{[':
+                self.repaired("missing comma")
+            elif char and char != ']':
+                self.fail(f"Expected ',' or ']', found {char!r}")
+
+    def closes_string(self, quote_pos: int, is_key: bool) -> bool:
+        """Decide whether the quote at quote_pos ends the string
+
+        A closing quote must be followed by what JSON allows next: ':' for a
+        key; ',', '}' or ']' for a value (and after ',' something that can
+        start the next member). Anything else means the model forgot to
+        escape a quote inside the text.
+        """
+        nxt = _WHITESPACE.match(self.text, quote_pos + 1).end()
+        if nxt >= self.end:
+            return True
+        char = self.text[nxt]
+        if is_key:
+            return char == ':'
+        if char in '}]':
+            return True
+        if char == ',':
+            after = _WHITESPACE.match(self.text, nxt + 1).end()
+            if after >= self.end:
+                return True
+            if self.containers and self.containers[-1] == '{':
+                # Inside an object the next member must start with a key
+                return self.text[after] in '"}'
+            return self._starts_value(after) or self.text[after] == ']'
+        if char == '"':
+            # Adjacent string: accept as a missing comma only if it looks like a key
+            return self._looks_like_key(nxt)
+        return False
+
+    def _starts_value(self, pos: int) -> bool:
+        char = self.text[pos]
+        if char in '"{[-0123456789':
+            return True
+        return any(self.text.startswith(word, pos) for word, _ in _LITERALS)
+
+    def _looks_like_key(self, quote_pos: int) -> bool:
+        close = self.text.find('"', quote_pos + 1)
+        if close == -1 or close - quote_pos > 80:
+            return False
+        after = _WHITESPACE.match(self.text, close + 1).end()
+        return after < self.end and self.text[after] == ':'
+
+    def parse_string(self, is_key: bool) -> str:
+        self.pos += 1
+        chunks = []
+        text = self.text
+        while True:
+            match = _STRING_RUN.match(text, self.pos)
+            if match:
+                chunks.append(match.group())
+                self.pos = match.end()
+            if self.pos >= self.end:
+                self.repaired("closed truncated string")
+                return "".join(chunks)
+
+            char = text[self.pos]
+            if char == '"':
+                if self.closes_string(self.pos, is_key):
+                    self.pos += 1
+                    return "".join(chunks)
+                self.repaired("unescaped quote")
+                chunks.append('"')
+                self.pos += 1
+            elif char == '\\':
+                esc = text[self.pos + 1:self.pos + 2]
+                if esc in _ESCAPES:
+                    chunks.append(_ESCAPES[esc])
+                    self.pos += 2
+                elif esc == 'u' and re.fullmatch(r'[0-9a-fA-F]{4}', text[self.pos + 2:self.pos + 6]):
+                    chunks.append(chr(int(text[self.pos + 2:self.pos + 6], 16)))
+                    self.pos += 6
+                else:
+                    # Invalid escape such as \$ - keep the character literally
+                    self.repaired("invalid escape")
+                    chunks.append(esc)
+                    self.pos += 2
+            else:
+                # Raw control character inside a string
+                if char in _CONTROL_ESCAPES:
+                    chunks.append(_CONTROL_ESCAPES[char])
+                    self.repaired("raw control character")
+                else:
+                    self.repaired("dropped control character")
+                self.pos += 1
+
+
+def parse_json_tolerant(text: str) -> tuple:
+    """Parse the first JSON object in text, repairing common model mistakes
+
+    Returns (data, repairs) where repairs maps repair name -> count (empty if
+    the text was valid JSON). Raises JSONRepairError if nothing recoverable.
+    """
+    if not text or not text.strip():
+        raise JSONRepairError("Empty response")
+
+    start = text.find('{')
+    if start == -1:
+        raise JSONRepairError("No JSON object found in response")
+
+    parser = _Parser(text)
+    if text[:start].strip():
+        parser.repaired("code fence" if '```' in text[:start] else "leading text")
+
+    # Well-formed JSON (possibly fenced) is the common case - let the C parser
+    # have it before falling back to the recovering scan
+    end = text.rfind('}') + 1
+    try:
+        data = json.loads(text[start:end])
+        if text[end:].strip():
+            parser.repaired("code fence" if '```' in text[end:] else "trailing text")
+        return data, parser.repairs
+    except json.JSONDecodeError:
+        pass
+
+    parser.pos = start
+
+    data = parser.parse_object()
+
+    parser.skip_ws()
+    if parser.pos < parser.end:
+        parser.repaired("code fence" if '```' in text[parser.pos:] else "trailing text")
+
+    return data, parser.repairs
+
+
+def format_repairs(repairs: dict) -> str:
+    return ", ".join(f"{name} x{count}" if count > 1 else name for name, count in repairs.items())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Keyword matcher - The Litmus
+Aho-Corasick automaton for classifying image keywords.
+
+The generators classify every image keyword against several term lists
+(dark, brightness, location, mood...) and then look its words up in
+CURATED_IMAGES. With nested `any(term in keyword ...)` scans the cost grows
+with keywords x terms; the automaton is built once at import and finds
+every term in one pass over the keyword list, whatever the vocabulary size.
+
+- category terms match as substrings, like `term in keyword.lower()`
+- curated terms match whole words only, like `word in CURATED_IMAGES` over
+  `keyword.split()`; the best photo is the first match in keyword order
+
+Benchmark on a synthetic corpus: python scripts/bench_keyword_matcher.py
+"""
+
+from collections import deque
+
+# Keywords are joined with this before scanning; no term can contain it
+_SEPARATOR = "\n"
+
+
+class KeywordMatches:
+    """Result of one scan: category hits per keyword and the best curated photo"""
+
+    __slots__ = ("keywords", "hits", "curated")
+
+    def __init__(self, keywords: list):
+        self.keywords = keywords
+        self.hits = [set() for _ in keywords]   # keyword index -> categories hit
+        self.curated = None                      # photo id of the first curated word
+
+    def any_hit(self, category: str) -> bool:
+        return any(category in hits for hits in self.hits)
+
+    def keywords_in(self, category: str) -> list:
+        return [kw for kw, hits in zip(self.keywords, self.hits) if category in hits]
+
+    def keywords_not_in(self, category: str) -> list:
+        return [kw for kw, hits in zip(self.keywords, self.hits) if category not in hits]
+
+
+class KeywordMatcher:
+    """Multi-pattern matcher over category term lists and a curated word map
+
+    categories: {category: [terms]}  - substring matches
+    curated:    {word: photo_id}     - whole-word matches
+    """
+
+    def __init__(self, categories: dict, curated: dict = None):
+        self.goto = [{}]        # state -> {char: next state}
+        self.fail = [0]
+        self.output = [[]]      # state -> [(length, category or None, photo_id or None)]
+
+        for category, terms in categories.items():
+            for term in terms:
+                self._add(term.lower(), (len(term), category, None))
+        for word, photo_id in (curated or {}).items():
+            self._add(word.lower(), (len(word), None, photo_id))
+        self._build_failure_links()
+
+    def _add(self, term: str, payload: tuple):
+        if not term or _SEPARATOR in term:
+            raise ValueError(f"Invalid keyword term: {term!r}")
+        state = 0
+        for char in term:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append(payload)
+
+    def _build_failure_links(self):
+        """Breadth-first: each state's failure link is its longest proper suffix in the trie"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                if self.fail[nxt] == nxt:
+                    self.fail[nxt] = 0
+                # Inherit matches ending here via the suffix
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    @property
+    def size(self) -> int:
+        return len(self.goto)
+
+    def match(self, keywords: list) -> KeywordMatches:
+        """Scan keywords once, recording category hits and the first curated word"""
+        result = KeywordMatches(keywords)
+        text = _SEPARATOR.join(kw.lower() for kw in keywords)
+        goto, fail, output = self.goto, self.fail, self.output
+        best_curated = None     # (start position, photo_id)
+
+        index = 0
+        state = 0
+        for pos, char in enumerate(text):
+            if char == _SEPARATOR:
+                index += 1
+                state = 0
+                continue
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+
+            for length, category, photo_id in output[state]:
+                if category is not None:
+                    result.hits[index].add(category)
+                    continue
+                start = pos - length + 1
+                if best_curated and best_curated[0] <= start:
+                    continue
+                # Whole words only, as in keyword.split()
+                before = text[start - 1] if start > 0 else " "
+                after = text[pos + 1] if pos + 1 < len(text) else " "
+                if before.isspace() and after.isspace():
+                    best_curated = (start, photo_id)
+
+        if best_curated:
+            result.curated = best_curated[1]
+        return result
+
+    def categories_of(self, keyword: str) -> set:
+        return self.match([keyword]).hits[0]
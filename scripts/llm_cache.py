@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+LLM response cache - The Litmus
+Content-addressed cache of raw model completions, so a rerun after a failure
+downstream of the LLM call (image lookup, save, a missing key) reuses the
+completion instead of paying for another 60-120s generation.
+
+The key is a hash of model, temperature, max_tokens and the prompt (system
+blocks and messages). Prompts embed the market snapshot, so a rerun hits
+the cache while it reuses the same snapshot (MARKET_SNAPSHOT_TTL) and
+misses once fresh market data changes the prompt.
+
+- one JSON file per completion under .cache/llm-responses/
+- only completions that parsed are stored; a cached completion that no
+  longer parses is dropped and the call goes to the API
+- entries expire after LLM_CACHE_TTL seconds (default 6 hours)
+- bounded to LLM_CACHE_SIZE entries and LLM_CACHE_MAX_MB, least recently
+  used evicted first
+
+Configuration:
+- LLM_CACHE=0 disables the cache
+- LLM_CACHE_DIR: cache location (default .cache/llm-responses)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import content_writer
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = Path(os.environ.get("LLM_CACHE_DIR", SCRIPT_DIR.parent / ".cache" / "llm-responses"))
+CACHE_ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", str(6 * 3600)))
+CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "64"))
+CACHE_MAX_BYTES = int(float(os.environ.get("LLM_CACHE_MAX_MB", "32")) * 1024 * 1024)
+
+LLM_CACHE_STATS = {"hits": 0, "misses": 0, "stored": 0, "discarded": 0}
+_lock = threading.Lock()
+
+
+def prompt_hash(payload: dict) -> str:
+    prompt = {"system": payload.get("system"), "messages": payload.get("messages")}
+    return hashlib.sha256(json.dumps(prompt, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def cache_key(payload: dict) -> str:
+    """Hash of model, temperature, max_tokens and the prompt hash"""
+    parts = [payload.get("model"), payload.get("temperature"), payload.get("max_tokens"), prompt_hash(payload)]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:32]
+
+
+def entry_path(key: str) -> Path:
+    return CACHE_DIR / f"{key}.json"
+
+
+def count(field: str):
+    with _lock:
+        LLM_CACHE_STATS[field] += 1
+
+
+def get(payload: dict):
+    """Cached {"text", "usage", "stop_reason", "created_ts", ...} for a request payload, or None"""
+    if not CACHE_ENABLED:
+        return None
+    path = entry_path(cache_key(payload))
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        count("misses")
+        return None
+
+    if time.time() - entry.get("created_ts", 0) > CACHE_TTL:
+        discard(payload)
+        count("misses")
+        return None
+
+    # mtime doubles as the last-used time for eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    count("hits")
+    return entry
+
+
+def put(payload: dict, text: str, usage: dict = None, stop_reason: str = None):
+    """Store a completion that parsed; never fails the caller"""
+    if not CACHE_ENABLED:
+        return
+    entry = {
+        "key": cache_key(payload),
+        "model": payload.get("model"),
+        "temperature": payload.get("temperature"),
+        "max_tokens": payload.get("max_tokens"),
+        "prompt_sha256": prompt_hash(payload),
+        "text": text,
+        "usage": usage or {},
+        "stop_reason": stop_reason,
+        "created_ts": time.time(),
+    }
+    try:
+        content_writer.atomic_write(entry_path(entry["key"]), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        count("stored")
+        evict()
+    except OSError as e:
+        print(f"  Warning: Could not cache completion: {e}")
+
+
+def discard(payload: dict):
+    """Drop a cached completion (expired, or it no longer parses)"""
+    try:
+        entry_path(cache_key(payload)).unlink()
+        count("discarded")
+    except OSError:
+        pass
+
+
+def evict():
+    """Remove expired entries, then least recently used beyond CACHE_SIZE / CACHE_MAX_BYTES"""
+    with _lock:
+        entries = []
+        for path in CACHE_DIR.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(reverse=True)  # most recently used first
+
+        now = time.time()
+        kept, total = 0, 0
+        for mtime, size, path in entries:
+            # Entries are never used after expiry, so a stale mtime means an expired entry
+            expired = now - mtime > CACHE_TTL
+            if expired or kept >= CACHE_SIZE or total + size > CACHE_MAX_BYTES:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                continue
+            kept += 1
+            total += size
+
+
+def format_stats() -> str:
+    stats = LLM_CACHE_STATS
+    return f"{stats['hits']} hits, {stats['misses']} misses, {stats['stored']} stored"
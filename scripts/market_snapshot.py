@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Shared CoinGecko market snapshot - The Litmus
+One on-disk copy of /global and /coins/markets shared by every generator.
+
+capture_mood, generate_brief and generate_weekend all need the same two
+responses. The snapshot fetches a superset once (the top MARKET_SNAPSHOT_COINS
+coins with 24h, 7d and 30d changes) and serves it to any caller within the
+freshness window, so back-to-back runs cost one set of CoinGecko requests
+instead of one set per script.
+
+/global and the /coins/markets pages (250 coins each, CoinGecko's maximum)
+are fetched concurrently, each with its own retries under one shared
+budget, through a token-bucket rate limiter shared by the whole process. A
+1000-coin universe is five requests in about the wall time of one.
+
+Configuration:
+- MARKET_SNAPSHOT_TTL: seconds a snapshot stays fresh (default 600, 0 disables)
+- MARKET_SNAPSHOT_MAX_STALE: oldest snapshot used when CoinGecko fails
+  (default 10800 - 3 hours; older and the fetch error propagates)
+- MARKET_SNAPSHOT_FILE: snapshot location (default .cache/market-snapshot.json)
+- MARKET_SNAPSHOT_COINS: coins fetched - 100, 250 (default), 500 or 1000
+- COINGECKO_RATE_PER_MIN: request rate allowed after the initial burst (default 30)
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import http_client
+import retry
+import tracing
+
+# CoinGecko APIs - superset of what the generators need
+COINGECKO_GLOBAL = "https://api.coingecko.com/api/v3/global"
+COINGECKO_COINS = "https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page={per_page}&page={page}&sparkline=false&price_change_percentage=24h,7d,30d"
+COINGECKO_PAGE_SIZE = 250  # per_page maximum
+SNAPSHOT_COINS = int(os.environ.get("MARKET_SNAPSHOT_COINS", "250"))
+COINGECKO_RATE = float(os.environ.get("COINGECKO_RATE_PER_MIN", "30")) / 60  # Requests per second
+COINGECKO_BURST = 5  # /global plus four 250-coin pages go out at once
+
+# Paths
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = SCRIPT_DIR.parent / ".cache"
+SNAPSHOT_FILE = Path(os.environ.get("MARKET_SNAPSHOT_FILE", CACHE_DIR / "market-snapshot.json"))
+
+SNAPSHOT_TTL = int(os.environ.get("MARKET_SNAPSHOT_TTL", "600"))
+MAX_STALE = int(os.environ.get("MARKET_SNAPSHOT_MAX_STALE", str(3 * 3600)))
+FETCH_BUDGET = 60  # Seconds for both CoinGecko calls, retries included
+
+# Serialises refreshes when several briefs run in one process
+_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Token bucket: burst requests at once, then rate per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may go out; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_limiter = RateLimiter(COINGECKO_RATE, COINGECKO_BURST)
+
+
+def throttle() -> float:
+    """Wait for the process-wide CoinGecko rate limit; returns seconds waited"""
+    return _limiter.acquire()
+
+
+def load_snapshot() -> dict:
+    """Load the snapshot from disk, or None if missing/corrupt"""
+    try:
+        with open(SNAPSHOT_FILE, "r") as f:
+            snapshot = json.load(f)
+        if "global" in snapshot and "coins" in snapshot:
+            return snapshot
+    except (OSError, json.JSONDecodeError):
+        pass
+    return None
+
+
+def save_snapshot(snapshot: dict):
+    """Write the snapshot atomically so concurrent readers never see a partial file"""
+    SNAPSHOT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = SNAPSHOT_FILE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_file, SNAPSHOT_FILE)
+
+
+def snapshot_age(snapshot: dict) -> float:
+    """Seconds since the snapshot was fetched"""
+    return time.time() - snapshot.get("fetched_ts", 0)
+
+
+def page_urls(coins: int = None) -> list:
+    """/coins/markets URLs covering the top coins, one per page"""
+    coins = coins or SNAPSHOT_COINS
+    per_page = min(coins, COINGECKO_PAGE_SIZE)
+    return [COINGECKO_COINS.format(per_page=per_page, page=page) for page in range(1, math.ceil(coins / per_page) + 1)]
+
+
+def fetch_json(name: str, url: str, deadline: float, parent):
+    """GET one CoinGecko endpoint with retries, on a worker thread traced under parent"""
+    with tracing.adopt(parent), tracing.span("coingecko_request", endpoint=name) as span:
+        policy = retry.RetryPolicy(f"CoinGecko {name}", max_attempts=3, base_delay=2, deadline=deadline)
+        
+        def attempt(_):
+            waited = throttle()
+            if waited:
+                span.set(rate_limited_s=round(waited, 2))
+            return http_client.get_json(url, timeout=policy.timeout(30))
+        
+        return policy.call(attempt)
+
+
+def fetch_snapshot() -> dict:
+    """Fetch a fresh snapshot from CoinGecko and persist it"""
+    deadline = time.monotonic() + FETCH_BUDGET
+    parent = tracing.current()
+    urls = page_urls()
+    with ThreadPoolExecutor(max_workers=len(urls) + 1, thread_name_prefix="coingecko") as pool:
+        global_future = pool.submit(fetch_json, "global", COINGECKO_GLOBAL, deadline, parent)
+        page_futures = [pool.submit(fetch_json, f"markets p{page}", url, deadline, parent)
+                        for page, url in enumerate(urls, 1)]
+        global_data = global_future.result()
+        pages = [future.result() for future in page_futures]
+    
+    # Rankings can shift between page requests: keep each coin's first appearance
+    coins, seen = [], set()
+    for page in pages:
+        for coin in page:
+            if coin.get("id") not in seen:
+                seen.add(coin.get("id"))
+                coins.append(coin)
+    
+    now = datetime.now(timezone.utc)
+    snapshot = {
+        "fetched_at": now.isoformat(),
+        "fetched_ts": now.timestamp(),
+        "coins_requested": SNAPSHOT_COINS,
+        "global": global_data,
+        "coins": coins[:SNAPSHOT_COINS]
+    }
+    try:
+        save_snapshot(snapshot)
+    except OSError as e:
+        print(f"  Warning: Could not save market snapshot: {e}")
+    return snapshot
+
+
+def get_snapshot(max_age: int = None) -> dict:
+    """Return a snapshot no older than max_age seconds, fetching if needed
+
+    If the network fails and a snapshot at most MAX_STALE seconds old exists
+    it is returned with a warning; otherwise the network error propagates,
+    so nothing publishes market data older than that.
+    """
+    max_age = SNAPSHOT_TTL if max_age is None else max_age
+
+    with _lock, tracing.span("market_fetch") as span:
+        cached = load_snapshot()
+        # A snapshot from a smaller universe (e.g. before MARKET_SNAPSHOT_COINS grew) is refetched
+        fresh = cached and cached.get("coins_requested", 100) >= SNAPSHOT_COINS and snapshot_age(cached) <= max_age
+        if fresh and max_age > 0:
+            print(f"  Using market snapshot from {cached['fetched_at']} ({snapshot_age(cached):.0f}s old)")
+            span.set(source="cache", age_s=round(snapshot_age(cached)))
+            return cached
+
+        try:
+            snapshot = fetch_snapshot()
+            span.set(source="network")
+            return snapshot
+        except Exception as e:
+            if cached and snapshot_age(cached) <= MAX_STALE:
+                print(f"  Warning: CoinGecko fetch failed ({e}), using stale snapshot from {cached['fetched_at']}")
+                span.set(source="stale", outcome="fallback", age_s=round(snapshot_age(cached)))
+                return cached
+            if cached:
+                print(f"  CoinGecko fetch failed and the cached snapshot from {cached['fetched_at']} is "
+                      f"{snapshot_age(cached) / 3600:.1f}h old (MARKET_SNAPSHOT_MAX_STALE {MAX_STALE / 3600:.1f}h)")
+            raise
+
+
+def get_global_data(max_age: int = None) -> dict:
+    """CoinGecko /global response (with its top-level "data" key)"""
+    return get_snapshot(max_age)["global"]
+
+
+def get_coins_markets(limit: int = SNAPSHOT_COINS, max_age: int = None) -> list:
+    """Top coins by market cap from /coins/markets, truncated to limit"""
+    return get_snapshot(max_age)["coins"][:limit]
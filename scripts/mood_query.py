@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Mood history queries - The Litmus
+Time-range reads over the mood store's hourly and daily rollups, for
+generators that want real mood history (the weekend magazine's 7-day
+trail) without a network call.
+
+    mood_query.daily(7)      # daily points for the last 7 days, today included
+    mood_query.hourly(24)
+    mood_query.between("daily", start, end)
+    mood_query.latest()      # newest hourly bucket if captured in the last 3 hours
+
+Each partition file is parsed once into a sorted index of bucket start
+timestamps and kept in memory while its mtime and size are unchanged, so
+repeated queries in one process cost two bisects per partition they touch.
+Only partitions overlapping the range are opened. The open (current)
+bucket comes from state.json, indexed the same way.
+
+A point is a bucket's close values plus its mean and count:
+
+    {"start": "2025-12-02T00:00:00Z", "timestamp": <last capture>, "count": 24,
+     "breadth": 81.0, "mv": 17.8, "breadth_mean": 79.6, "mv_mean": 18.4, ...}
+
+With an empty store (a checkout with only the trail file) queries fall
+back to the points in data/mood-history.json.
+
+Usage:
+    python scripts/mood_query.py daily 7
+    python scripts/mood_query.py hourly 24
+"""
+
+import argparse
+import json
+import sys
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+import mood_store
+
+_indexes = {}  # (path, level) -> ((mtime_ns, size), Index)
+_lock = threading.Lock()
+
+
+class Index:
+    """Points sorted by bucket start, bisectable by ISO timestamp"""
+
+    def __init__(self, points: list):
+        points = sorted(points, key=lambda p: p["start"])
+        self.keys = [p["start"] for p in points]
+        self.points = points
+
+    def between(self, start: str, end: str) -> list:
+        """Points with start <= bucket start < end (Z-format timestamps sort as strings)"""
+        return self.points[bisect_left(self.keys, start):bisect_left(self.keys, end)]
+
+
+def to_point(bucket: dict) -> dict:
+    point = {"start": bucket["start"], "timestamp": bucket["last_ts"], "count": bucket["count"]}
+    for metric in mood_store.METRICS:
+        agg = bucket.get(metric)
+        if agg:
+            point[metric] = agg["close"]
+            point[f"{metric}_mean"] = round(agg["sum"] / agg["n"], 2)
+    return point
+
+
+def cached_index(path, level: str, build) -> Index:
+    """Index of a file's level points, rebuilt only when its mtime or size changed"""
+    try:
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        signature = None
+    with _lock:
+        cached = _indexes.get((path, level))
+        if cached and cached[0] == signature:
+            return cached[1]
+    index = Index(build(path) if signature else [])
+    with _lock:
+        _indexes[(path, level)] = (signature, index)
+    return index
+
+
+def partition_points(path) -> list:
+    return [to_point(bucket) for bucket in mood_store.read_lines(path) if bucket.get("last_ts")]
+
+
+def open_points(level: str):
+    def build(path) -> list:
+        bucket = mood_store.load_state()["open"].get(level)
+        return [to_point(bucket)] if bucket and bucket.get("last_ts") else []
+    return build
+
+
+def export_points(level: str):
+    def build(path) -> list:
+        try:
+            with open(path, encoding="utf-8") as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            return []
+        points = []
+        for point in history.get(level, []):
+            if point.get("timestamp"):
+                start = mood_store.bucket_start(level, mood_store.parse_ts(point["timestamp"]))
+                points.append({**point, "start": mood_store.format_ts(start)})
+        return points
+    return build
+
+
+def between(level: str, start: datetime, end: datetime) -> list:
+    """Points of level ("hourly" or "daily") whose bucket starts in [start, end), oldest first"""
+    lo, hi = mood_store.format_ts(start), mood_store.format_ts(end)
+    files = [p for p in mood_store.partitions(level) if mood_store.partition_end(level, p) > start]
+    state_file = mood_store.STORE_DIR / "state.json"
+    if not files and not state_file.exists():
+        return cached_index(mood_store.EXPORT_FILE, level, export_points(level)).between(lo, hi)
+
+    points = []
+    for path in files:
+        points.extend(cached_index(path, level, partition_points).between(lo, hi))
+    current = cached_index(state_file, level, open_points(level)).between(lo, hi)
+    # The open bucket is never in a partition yet, but guard against a stale state.json
+    return points + [p for p in current if not points or p["start"] > points[-1]["start"]]
+
+
+def daily(days: int, now: datetime = None) -> list:
+    """Daily points for the last days days, today's open bucket included"""
+    today = mood_store.bucket_start("daily", now or datetime.now(timezone.utc))
+    return between("daily", today - timedelta(days=days - 1), today + timedelta(days=1))
+
+
+def hourly(hours: int, now: datetime = None) -> list:
+    """Hourly points for the last hours hours, the current hour included"""
+    hour = mood_store.bucket_start("hourly", now or datetime.now(timezone.utc))
+    return between("hourly", hour - timedelta(hours=hours - 1), hour + timedelta(hours=1))
+
+
+def latest(max_age: float = 3 * 3600):
+    """Newest hourly point captured within max_age seconds, or None"""
+    now = datetime.now(timezone.utc)
+    points = between("hourly", now - timedelta(seconds=max_age + 3600), now + timedelta(hours=1))
+    if points and (now - mood_store.parse_ts(points[-1]["timestamp"])).total_seconds() <= max_age:
+        return points[-1]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query mood history")
+    parser.add_argument("level", choices=("hourly", "daily"))
+    parser.add_argument("count", type=int, help="hours or days back, the current one included")
+    opts = parser.parse_args()
+    points = hourly(opts.count) if opts.level == "hourly" else daily(opts.count)
+    for point in points:
+        print(json.dumps(point))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Mood history store - The Litmus
+Append-only, date-partitioned time series of market mood captures (breadth,
+M/V ratio, market cap, volume) with hourly, daily and weekly rollups.
+
+capture_mood used to rewrite one JSON file holding the last 25 hourly and 8
+daily points. The store keeps every capture instead, at a cost per capture
+that does not grow with history:
+
+    data/mood-store/
+      raw/2025/2025-12-02.jsonl     one line per capture, a file per day
+      hourly/2025-12.jsonl          closed hourly buckets, a file per month
+      daily/2025.jsonl              closed daily buckets, a file per year
+      weekly/2025.jsonl             closed weekly buckets (Monday start)
+      state.json                    open buckets and the recent closed ones
+      zone-transitions.jsonl        capture_mood's log of zone changes
+
+append() writes the capture's raw line and folds it into the open bucket of
+every level; a bucket is appended to its level's partition once a capture
+lands in the next period. A bucket holds, per metric, open/close/min/max
+and sum/n (mean = sum / n), count, first/last capture timestamps and the
+mood zone (mood_zones) of its close values.
+
+export() regenerates data/mood-history.json - the small trail file
+api/market-mood.js reads - from state.json alone: the last TRAIL_HOURLY
+hourly and TRAIL_DAILY daily buckets (closed ones plus the open one), as
+their close values.
+
+Captures arrive in time order. Older points (an import, a backfill) go
+through append_many(), which merges them into their raw partitions and
+rebuilds the rollups from the earliest affected week.
+
+Partitions older than their level's retention are deleted when the raw
+partition rolls over to a new day.
+
+Usage:
+    python scripts/mood_store.py stats
+    python scripts/mood_store.py export
+    python scripts/mood_store.py import data/mood-history.json
+    python scripts/mood_store.py rebuild
+
+Configuration:
+- MOOD_STORE_DIR: store location (default data/mood-store)
+- MOOD_RETENTION_RAW_DAYS: raw captures kept (default 365)
+- MOOD_RETENTION_HOURLY_DAYS: hourly buckets kept (default 3650)
+- MOOD_RETENTION_DAILY_DAYS / MOOD_RETENTION_WEEKLY_DAYS: default 0 (forever)
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import content_writer
+import mood_zones
+
+try:
+    import fcntl
+except ImportError:  # Windows - the thread lock still serialises captures in one process
+    fcntl = None
+
+SCRIPT_DIR = Path(__file__).parent
+STORE_DIR = Path(os.environ.get("MOOD_STORE_DIR", SCRIPT_DIR.parent / "data" / "mood-store"))
+EXPORT_FILE = SCRIPT_DIR.parent / "data" / "mood-history.json"
+LOCK_FILE = SCRIPT_DIR.parent / ".cache" / "mood-store.lock"
+TRANSITIONS_FILE = "zone-transitions.jsonl"  # Under STORE_DIR
+
+METRICS = ("breadth", "mv", "market_cap", "volume")
+LEVELS = ("hourly", "daily", "weekly")
+
+# Points in the exported trail file (closed buckets plus the open one)
+TRAIL_HOURLY = 25  # ~24 hours + the current hour
+TRAIL_DAILY = 8    # 7 days + today
+
+RETENTION_DAYS = {
+    "raw": int(os.environ.get("MOOD_RETENTION_RAW_DAYS", "365")),
+    "hourly": int(os.environ.get("MOOD_RETENTION_HOURLY_DAYS", "3650")),
+    "daily": int(os.environ.get("MOOD_RETENTION_DAILY_DAYS", "0")),
+    "weekly": int(os.environ.get("MOOD_RETENTION_WEEKLY_DAYS", "0")),
+}
+
+_thread_lock = threading.RLock()
+
+
+# ============================================================================
+# TIME AND PARTITIONS
+# ============================================================================
+
+def parse_ts(value: str) -> datetime:
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def format_ts(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def bucket_start(level: str, ts: datetime) -> datetime:
+    ts = ts.astimezone(timezone.utc)
+    if level == "hourly":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if level == "daily":
+        return day
+    return day - timedelta(days=day.weekday())
+
+
+def partition_path(level: str, ts: datetime) -> Path:
+    """raw: a file per day, hourly: per month, daily and weekly: per year"""
+    if level == "raw":
+        return STORE_DIR / "raw" / f"{ts:%Y}" / f"{ts:%Y-%m-%d}.jsonl"
+    if level == "hourly":
+        return STORE_DIR / "hourly" / f"{ts:%Y-%m}.jsonl"
+    return STORE_DIR / level / f"{ts:%Y}.jsonl"
+
+
+def partition_end(level: str, path: Path) -> datetime:
+    """First instant after everything a partition can hold"""
+    parts = [int(p) for p in path.stem.split("-")]
+    if level == "raw":
+        return datetime(*parts, tzinfo=timezone.utc) + timedelta(days=1)
+    if level == "hourly":
+        year, month = parts
+        return datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    # A weekly bucket starting in late December runs into the next year
+    return datetime(parts[0] + 1, 1, 1, tzinfo=timezone.utc) + timedelta(days=7 if level == "weekly" else 0)
+
+
+def partitions(level: str) -> list:
+    """Partition files of a level, oldest first"""
+    return sorted((STORE_DIR / level).glob("**/*.jsonl"), key=lambda p: p.stem)
+
+
+def read_lines(path: Path) -> list:
+    records = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # a torn last line from an interrupted append
+    except OSError:
+        pass
+    return records
+
+
+def append_line(path: Path, record: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def write_lines(path: Path, records: list):
+    if not records:
+        path.unlink(missing_ok=True)
+        return
+    payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+    content_writer.atomic_write(path, payload.encode("utf-8"))
+
+
+# ============================================================================
+# BUCKETS AND STATE
+# ============================================================================
+
+def new_bucket(start: datetime) -> dict:
+    return {"start": format_ts(start), "count": 0, "first_ts": None, "last_ts": None}
+
+
+def fold(bucket: dict, point: dict):
+    """Add one capture to a bucket's aggregates"""
+    bucket["count"] += 1
+    bucket["first_ts"] = bucket["first_ts"] or point["timestamp"]
+    bucket["last_ts"] = point["timestamp"]
+    for metric in METRICS:
+        value = point.get(metric)
+        if value is None:
+            continue
+        agg = bucket.get(metric)
+        if agg is None:
+            bucket[metric] = {"open": value, "close": value, "min": value, "max": value, "sum": value, "n": 1}
+        else:
+            agg["close"] = value
+            agg["min"] = min(agg["min"], value)
+            agg["max"] = max(agg["max"], value)
+            agg["sum"] += value
+            agg["n"] += 1
+    zone = mood_zones.zone_for(bucket.get("breadth", {}).get("close"), bucket.get("mv", {}).get("close"))
+    if zone:
+        bucket["zone"] = zone
+
+
+def bucket_mean(bucket: dict, metric: str):
+    agg = bucket.get(metric)
+    return agg["sum"] / agg["n"] if agg else None
+
+
+def empty_state() -> dict:
+    return {"version": 1, "last_ts": None, "open": {}, "recent": {"hourly": [], "daily": []}}
+
+
+def load_state() -> dict:
+    try:
+        with open(STORE_DIR / "state.json", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == 1:
+            return state
+    except (OSError, ValueError):
+        pass
+    return empty_state()
+
+
+def save_state(state: dict):
+    content_writer.atomic_write(STORE_DIR / "state.json", json.dumps(state, separators=(",", ":")).encode("utf-8"))
+
+
+def recent_limit(level: str) -> int:
+    return (TRAIL_HOURLY if level == "hourly" else TRAIL_DAILY) - 1
+
+
+def close_bucket(state: dict, level: str, bucket: dict):
+    append_line(partition_path(level, parse_ts(bucket["start"])), bucket)
+    if level in state["recent"]:
+        recent = state["recent"][level]
+        recent.append(bucket)
+        del recent[:-recent_limit(level)]
+
+
+def ingest(state: dict, point: dict, levels=LEVELS):
+    """Fold a capture newer than every stored one into the open buckets"""
+    ts = parse_ts(point["timestamp"])
+    for level in levels:
+        start = format_ts(bucket_start(level, ts))
+        bucket = state["open"].get(level)
+        if bucket is None or bucket["start"] != start:
+            if bucket is not None:
+                close_bucket(state, level, bucket)
+            bucket = state["open"][level] = new_bucket(parse_ts(start))
+        fold(bucket, point)
+    state["last_ts"] = point["timestamp"]
+
+
+@contextlib.contextmanager
+def store_lock():
+    """Exclusive lock across threads and processes for appends"""
+    with _thread_lock:
+        if fcntl is None:
+            yield
+            return
+        LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(LOCK_FILE, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# ============================================================================
+# APPEND
+# ============================================================================
+
+def normalize(point: dict) -> dict:
+    """Capture fields kept in the store; timestamp is required"""
+    record = {"timestamp": format_ts(parse_ts(point["timestamp"]))}
+    for key, value in point.items():
+        if key != "timestamp" and value is not None:
+            record[key] = value
+    return record
+
+
+def append(point: dict) -> bool:
+    """Store one capture; False if one with the same timestamp is already stored"""
+    return append_many([point]) == 1
+
+
+def append_many(points: list) -> int:
+    """Store captures in any order; returns how many were new
+
+    Captures newer than the latest stored one are appended and folded in
+    directly. Older ones are merged into their raw partitions and the
+    rollups are rebuilt from the earliest affected week.
+    """
+    points = sorted((normalize(p) for p in points), key=lambda p: p["timestamp"])
+    with store_lock():
+        state = load_state()
+        last = state["last_ts"]
+        older = [p for p in points if last is not None and p["timestamp"] <= last]
+        newer = [p for p in points if last is None or p["timestamp"] > last]
+
+        added = merge_raw(older) if older else 0
+        if added:
+            rebuild_rollups(state, since=parse_ts(older[0]["timestamp"]))
+
+        previous_day = parse_ts(state["last_ts"]).date() if state["last_ts"] else None
+        seen = set()
+        for point in newer:
+            if point["timestamp"] in seen:
+                continue
+            seen.add(point["timestamp"])
+            append_line(partition_path("raw", parse_ts(point["timestamp"])), point)
+            ingest(state, point)
+            added += 1
+
+        save_state(state)
+        if newer and previous_day is not None and parse_ts(state["last_ts"]).date() != previous_day:
+            prune(parse_ts(state["last_ts"]))
+    return added
+
+
+def merge_raw(points: list) -> int:
+    """Merge out-of-order captures into their raw day partitions; returns how many were new"""
+    by_path = {}
+    for point in points:
+        by_path.setdefault(partition_path("raw", parse_ts(point["timestamp"])), []).append(point)
+    added = 0
+    for path, new_points in by_path.items():
+        existing = {p["timestamp"]: p for p in read_lines(path)}
+        for point in new_points:
+            if point["timestamp"] not in existing:
+                existing[point["timestamp"]] = point
+                added += 1
+        write_lines(path, [existing[ts] for ts in sorted(existing)])
+    return added
+
+
+def rebuild_rollups(state: dict = None, since: datetime = None) -> dict:
+    """Recompute rollups from raw captures at or after since (default: all)
+
+    Closed buckets before since are kept, so levels retained longer than raw
+    captures survive a rebuild.
+    """
+    state = state if state is not None else load_state()
+    floors = {level: bucket_start(level, since) if since else None for level in LEVELS}
+    for level in LEVELS:
+        truncate_level(level, floors[level])
+        state["open"].pop(level, None)
+    state["recent"] = {level: [] for level in state["recent"]}
+    state["last_ts"] = None
+
+    replay_from = floors["weekly"]
+    for path in partitions("raw"):
+        if replay_from and partition_end("raw", path) <= replay_from:
+            continue
+        for point in sorted(read_lines(path), key=lambda p: p["timestamp"]):
+            ts = parse_ts(point["timestamp"])
+            if replay_from and ts < replay_from:
+                continue
+            levels = [level for level in LEVELS if floors[level] is None or bucket_start(level, ts) >= floors[level]]
+            ingest(state, point, levels)
+
+    for level in state["recent"]:
+        state["recent"][level] = recent_closed(level, recent_limit(level), before=state["open"].get(level))
+    return state
+
+
+def truncate_level(level: str, floor: datetime = None):
+    """Drop closed buckets starting at or after floor (all of them without one)"""
+    for path in partitions(level):
+        if floor is None:
+            path.unlink()
+        elif partition_end(level, path) > floor:
+            write_lines(path, [b for b in read_lines(path) if parse_ts(b["start"]) < floor])
+
+
+def recent_closed(level: str, n: int, before: dict = None) -> list:
+    """Last n closed buckets of a level, oldest first"""
+    found = []
+    for path in reversed(partitions(level)):
+        buckets = [b for b in read_lines(path) if before is None or b["start"] < before["start"]]
+        found = buckets + found
+        if len(found) >= n:
+            break
+    return found[-n:] if n else []
+
+
+def prune(now: datetime):
+    """Delete partitions past their level's retention"""
+    for level, days in RETENTION_DAYS.items():
+        if days <= 0:
+            continue
+        cutoff = now - timedelta(days=days)
+        for path in partitions(level):
+            if partition_end(level, path) <= cutoff:
+                path.unlink(missing_ok=True)
+                print(f"  Pruned {path.relative_to(STORE_DIR)}")
+
+
+# ============================================================================
+# EXPORT AND IMPORT
+# ============================================================================
+
+def trail_point(bucket: dict, metrics: tuple) -> dict:
+    point = {"timestamp": bucket["last_ts"]}
+    for metric in metrics:
+        if bucket.get(metric):
+            point[metric] = bucket[metric]["close"]
+    if bucket.get("zone"):
+        point["zone"] = bucket["zone"]
+    return point
+
+
+def trails(state: dict = None) -> dict:
+    """{"hourly", "daily"}: trail points of the recent closed buckets plus the open one"""
+    state = state if state is not None else load_state()
+    result = {}
+    for level, metrics in (("hourly", ("breadth", "mv")), ("daily", METRICS)):
+        buckets = state["recent"][level] + ([state["open"][level]] if level in state["open"] else [])
+        result[level] = [trail_point(b, metrics) for b in buckets]
+    return result
+
+
+def export(path: Path = None, state: dict = None, extra: dict = None) -> dict:
+    """Regenerate the trail file api/market-mood.js reads
+
+    extra adds keys to the file (capture_mood --watch adds its intraday
+    trail). Returns the write_json result plus "trail": points per level.
+    """
+    state = state if state is not None else load_state()
+    points = trails(state)
+    today = state["open"].get("daily")
+    history = {
+        "hourly": points["hourly"],
+        "daily": points["daily"],
+        "last_daily_capture": today["first_ts"] if today else None,
+        **(extra or {}),
+    }
+    result = content_writer.write_json(path or EXPORT_FILE, history, compact=True)
+    result["trail"] = {level: len(level_points) for level, level_points in points.items()}
+    return result
+
+
+def last_transition():
+    """Newest line of the zone transition log, or None"""
+    try:
+        with open(STORE_DIR / TRANSITIONS_FILE, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue  # a torn last line, or the cut first one
+    return None
+
+
+def record_transitions(points: list) -> list:
+    """Log every capture whose zone differs from the zone before it; returns the new events
+
+    Captures at or before the last logged transition are ignored, so
+    replays and backfills do not rewrite the log.
+    """
+    with store_lock():
+        last = last_transition()
+        zone = last["to"] if last else None
+        events = []
+        for point in sorted((normalize(p) for p in points), key=lambda p: p["timestamp"]):
+            if not point.get("zone") or point["zone"] == zone or (last and point["timestamp"] <= last["timestamp"]):
+                continue
+            event = {"timestamp": point["timestamp"], "from": zone, "to": point["zone"],
+                     "breadth": point.get("breadth"), "mv": point.get("mv")}
+            append_line(STORE_DIR / TRANSITIONS_FILE, event)
+            events.append(event)
+            zone = point["zone"]
+        return events
+
+
+def recent_raw(since: datetime) -> list:
+    """Raw captures at or after since, oldest first"""
+    points = []
+    for path in partitions("raw"):
+        if partition_end("raw", path) > since:
+            points.extend(p for p in read_lines(path) if parse_ts(p["timestamp"]) >= since)
+    return sorted(points, key=lambda p: p["timestamp"])
+
+
+def is_empty() -> bool:
+    return load_state()["last_ts"] is None
+
+
+def import_history(path: Path) -> int:
+    """Load the points of a mood-history.json-style file ({"hourly", "daily"}) into the store"""
+    with open(path, encoding="utf-8") as f:
+        history = json.load(f)
+    points = {}
+    for point in history.get("daily", []) + history.get("hourly", []):
+        if point.get("timestamp"):
+            points.setdefault(point["timestamp"], {}).update(point)
+    return append_many(list(points.values()))
+
+
+def stats() -> dict:
+    state = load_state()
+    levels = {}
+    for level in ("raw",) + LEVELS:
+        files = partitions(level)
+        levels[level] = {
+            "partitions": len(files),
+            "bytes": sum(p.stat().st_size for p in files),
+            "records": sum(1 for p in files for _ in open(p, encoding="utf-8")),
+            "oldest": files[0].stem if files else None,
+        }
+    return {"last_ts": state["last_ts"], "levels": levels}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mood history store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="partitions and records per level")
+    sub.add_parser("export", help="regenerate data/mood-history.json")
+    sub.add_parser("rebuild", help="recompute every rollup from raw captures")
+    import_parser = sub.add_parser("import", help="load a mood-history.json-style file")
+    import_parser.add_argument("file")
+    opts = parser.parse_args()
+
+    if opts.command == "stats":
+        result = stats()
+        print(f"Store {STORE_DIR} (latest capture {result['last_ts']})")
+        for level, info in result["levels"].items():
+            print(f"  {level:<7} {info['records']:>8} records  {info['partitions']:>4} partitions  "
+                  f"{info['bytes'] / 1024:>9.1f} KB  oldest {info['oldest']}")
+    elif opts.command == "export":
+        result = export()
+        print(f"  {'Wrote' if result['written'] else 'Unchanged'} {result['path']} ({result['bytes']} bytes)")
+    elif opts.command == "rebuild":
+        with store_lock():
+            state = rebuild_rollups()
+            save_state(state)
+        print(f"  Rebuilt rollups up to {state['last_ts']}")
+    elif opts.command == "import":
+        print(f"  Imported {import_history(Path(opts.file))} new captures from {opts.file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Rolling mood window - The Litmus
+Fixed-size ring buffer of mood samples (breadth, M/V) with running
+aggregates, used by capture_mood --watch.
+
+Every aggregate updates in O(1) per sample (amortised for min/max), however
+large the window:
+- mean: running sum over the samples in the window
+- min / max: monotonic deques of (sequence, value)
+- EMA: exponential moving average over EMA_SAMPLES samples, not bounded by
+  the window
+
+    window = RollingWindow(size=288, ema_samples=12)
+    window.push({"timestamp": ..., "breadth": 61.0, "mv": 28.3})
+    window.aggregates()  # {"breadth": {"mean", "min", "max", "ema", "last"}, ...}
+
+The window counts samples, not time: a capture gap shortens the period it
+covers rather than leaving holes.
+"""
+
+from collections import deque
+
+METRICS = ("breadth", "mv")
+
+
+class RunningMetric:
+    """Windowed sum, min and max plus an unbounded EMA of one metric"""
+
+    def __init__(self, size: int, alpha: float):
+        self.size = size
+        self.alpha = alpha
+        self.total = 0.0
+        self.ema = None
+        self.last = None
+        self._min = deque()  # (seq, value), values increasing
+        self._max = deque()  # (seq, value), values decreasing
+
+    def add(self, seq: int, value: float, evicted: float = None):
+        if evicted is not None:
+            self.total -= evicted
+        self.total += value
+        self.ema = value if self.ema is None else self.alpha * value + (1 - self.alpha) * self.ema
+        self.last = value
+
+        oldest = seq - self.size + 1
+        for extremes, beaten in ((self._min, lambda v: v >= value), (self._max, lambda v: v <= value)):
+            while extremes and beaten(extremes[-1][1]):
+                extremes.pop()
+            extremes.append((seq, value))
+            while extremes[0][0] < oldest:
+                extremes.popleft()
+
+    def summary(self, count: int) -> dict:
+        if not count:
+            return {}
+        return {"mean": round(self.total / count, 2), "min": self._min[0][1], "max": self._max[0][1],
+                "ema": round(self.ema, 2), "last": self.last}
+
+
+class RollingWindow:
+    """Ring buffer of the last size samples with O(1) aggregates"""
+
+    def __init__(self, size: int, ema_samples: int = 12):
+        self.size = size
+        self.samples = [None] * size
+        self.seq = -1  # Sequence number of the newest sample
+        self.metrics = {metric: RunningMetric(size, 2 / (ema_samples + 1)) for metric in METRICS}
+
+    def __len__(self):
+        return min(self.seq + 1, self.size)
+
+    def push(self, sample: dict):
+        """Add a sample, overwriting the oldest once the buffer is full"""
+        self.seq += 1
+        slot = self.seq % self.size
+        evicted = self.samples[slot]
+        self.samples[slot] = sample
+        for metric, running in self.metrics.items():
+            running.add(self.seq, sample[metric], evicted[metric] if evicted else None)
+
+    def latest(self):
+        return self.samples[self.seq % self.size] if self.seq >= 0 else None
+
+    def trail(self, metrics: tuple = ("timestamp",) + METRICS) -> list:
+        """Samples oldest first"""
+        count = len(self)
+        first = self.seq - count + 1
+        return [{key: self.samples[i % self.size][key] for key in metrics} for i in range(first, self.seq + 1)]
+
+    def aggregates(self) -> dict:
+        count = len(self)
+        return {"samples": count, **{metric: running.summary(count) for metric, running in self.metrics.items()}}
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Mood zones - The Litmus
+The 9-box market mood grid: breadth (% of coins green) across, activity
+down. Activity is the M/V ratio (total market cap / 24h volume) mapped
+onto 0-100 over MV_RANGE, low M/V (heavy volume) being frenzied.
+
+                 breadth < 33     33-66            66+
+    frenzied     concentration    leadership       strong-rally
+    normal       rotation         consolidation    steady-advance
+    quiet        capitulation     drift            weak-rally
+
+capture_mood stores the zone of every capture (and mood_store of every
+bucket) and publishes the current one; generate_weekend places the
+magazine's mood box with it. app.js draws the same grid client-side.
+"""
+
+MV_RANGE = (10, 45)  # M/V at the frenzied and quiet ends, as api/market-mood.js
+
+
+def mv_to_activity(mv):
+    """Map an M/V ratio onto the 0-100 activity axis (low M/V = frenzied = high)"""
+    low, high = MV_RANGE
+    return max(0, min(100, (high - mv) / (high - low) * 100))
+
+
+def determine_zone(breadth, volume_ratio):
+    """Determine which of the 9 zones based on breadth and volume"""
+    # Breadth: 0-33 = left, 33-66 = middle, 66-100 = right
+    # Volume: 0-33 = bottom, 33-66 = middle, 66-100 = top
+    
+    if volume_ratio >= 66:  # Frenzied (top row)
+        if breadth < 33:
+            return "concentration"
+        elif breadth < 66:
+            return "leadership"
+        else:
+            return "strong-rally"
+    elif volume_ratio >= 33:  # Normal (middle row)
+        if breadth < 33:
+            return "rotation"
+        elif breadth < 66:
+            return "consolidation"
+        else:
+            return "steady-advance"
+    else:  # Quiet (bottom row)
+        if breadth < 33:
+            return "capitulation"
+        elif breadth < 66:
+            return "drift"
+        else:
+            return "weak-rally"
+
+
+def zone_for(breadth, mv):
+    """Zone of a breadth / M/V pair, or None if either is missing"""
+    if breadth is None or mv is None:
+        return None
+    return determine_zone(breadth, mv_to_activity(mv))
+
+
+def get_zone_info(zone, breadth, volume_ratio):
+    """Get title and description for a zone"""
+    zone_descriptions = {
+        "strong-rally": {
+            "title": "Strong Rally",
+            "description": f"Broad participation with high conviction. The market is moving decisively higher with strong volume confirmation."
+        },
+        "leadership": {
+            "title": "Leadership",
+            "description": f"Large caps leading with elevated activity. {int(breadth)}% of coins positive, suggesting selective but powerful momentum."
+        },
+        "concentration": {
+            "title": "Concentration",
+            "description": "High volume but narrow participation. Capital is concentrating in select assets while most lag behind."
+        },
+        "steady-advance": {
+            "title": "Steady Advance",
+            "description": f"Healthy breadth at {int(breadth)}% with measured volume. The kind of sustainable advance institutional investors prefer."
+        },
+        "consolidation": {
+            "title": "Consolidation",
+            "description": "Mixed signals with moderate activity. Market is digesting recent moves, direction unclear."
+        },
+        "rotation": {
+            "title": "Rotation",
+            "description": "Sector rotation underway with elevated volume. Capital is moving, but direction is unclear."
+        },
+        "weak-rally": {
+            "title": "Weak Rally",
+            "description": f"Broad but unconvincing. {int(breadth)}% green but low volume suggests lack of conviction."
+        },
+        "drift": {
+            "title": "Drift",
+            "description": "Quiet market with no clear direction. Low participation and low activity - summer doldrums or calm before storm."
+        },
+        "capitulation": {
+            "title": "Capitulation",
+            "description": "Broad weakness with elevated selling pressure. Risk-off sentiment dominates across the board."
+        }
+    }
+    
+    return zone_descriptions.get(zone, {
+        "title": "Unknown",
+        "description": "Market conditions unclear."
+    })
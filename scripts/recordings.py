@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Recordings - The Litmus
+On-disk captures of external API responses, written in record mode and
+served back by the stand-in server in replay mode.
+
+One JSON file per distinct request under RECORDINGS_DIR/<host>/:
+
+    {"request": {"method", "host", "path", "query", "key", "hint", "body_bytes"},
+     "response": {"status", "reason", "headers", "body" | "body_base64" | "lines"},
+     "stream": bool, "elapsed_s": float, "recorded_at": str}
+
+Request headers are never stored (they carry API keys); response headers
+are reduced to the few the scripts read. Streamed (SSE) responses are
+stored line by line.
+
+Matching a request, most specific first:
+1. key - method, host, path, query and a hash of the body
+2. hint - same endpoint and the same prompt family (the cached system
+   prompt, or the opening of the first message), so a morning brief gets a
+   recorded morning brief even though the market numbers changed
+3. endpoint - any recording for method, host and path, round-robin
+
+Standard library only, like http_client.
+
+Configuration:
+- LITMUS_RECORDINGS: recordings directory (default .cache/recordings)
+"""
+
+import base64
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode
+
+SCRIPT_DIR = Path(__file__).parent
+RECORDINGS_DIR = Path(os.environ.get("LITMUS_RECORDINGS", SCRIPT_DIR.parent / ".cache" / "recordings"))
+
+# Response headers worth replaying
+KEPT_HEADERS = {"content-type", "retry-after"}
+HINT_CHARS = 120
+
+_write_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    return urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def request_key(method: str, host: str, path: str, query: str, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.upper(), host, path, normalize_query(query or "")):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(body or b"")
+    return digest.hexdigest()[:16]
+
+
+def request_hint(body: bytes):
+    """Prompt family of a JSON request body: its system prompt, else the opening of the first message"""
+    try:
+        payload = json.loads(body or b"")
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    basis = payload.get("system")
+    if not basis and payload.get("messages"):
+        content = payload["messages"][0].get("content")
+        basis = content[:HINT_CHARS] if isinstance(content, str) else content
+    if not basis:
+        return None
+    return hashlib.sha256(json.dumps(basis, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def is_stream_request(body: bytes) -> bool:
+    try:
+        payload = json.loads(body or b"")
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and payload.get("stream") is True
+
+
+def recording_path(directory: Path, method: str, host: str, path: str, key: str) -> Path:
+    slug = re.sub(r"[^a-z0-9]+", "-", path.lower()).strip("-")[:60] or "root"
+    return Path(directory) / host / f"{method.lower()}-{slug}-{key}.json"
+
+
+def save(method: str, host: str, path: str, query: str, body: bytes, status: int, reason: str,
+         headers: dict, content: bytes = None, lines: list = None, elapsed: float = None,
+         directory: Path = None) -> Path:
+    """Write one recording; content for buffered responses, lines for streams"""
+    key = request_key(method, host, path, query, body)
+    response = {
+        "status": status,
+        "reason": reason,
+        "headers": {k: v for k, v in headers.items() if k.lower() in KEPT_HEADERS},
+    }
+    if lines is not None:
+        response["lines"] = lines
+    else:
+        try:
+            response["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            response["body_base64"] = base64.b64encode(content).decode("ascii")
+
+    record = {
+        "request": {"method": method.upper(), "host": host, "path": path, "query": normalize_query(query or ""),
+                    "key": key, "hint": request_hint(body), "body_bytes": len(body or b"")},
+        "response": response,
+        "stream": lines is not None,
+        "elapsed_s": round(elapsed, 3) if elapsed is not None else None,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+    }
+    target = recording_path(directory or RECORDINGS_DIR, method, host, path, key)
+    with _write_lock:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, target)
+    return target
+
+
+def response_body(record: dict) -> bytes:
+    response = record["response"]
+    if "body_base64" in response:
+        return base64.b64decode(response["body_base64"])
+    if "lines" in response:
+        return "\n".join(response["lines"]).encode("utf-8")
+    return response.get("body", "").encode("utf-8")
+
+
+class RecordingIndex:
+    """Recordings loaded from disk, matched by key, then hint, then endpoint"""
+
+    def __init__(self, records: list = None):
+        self.by_key = {}
+        self.by_hint = {}
+        self.by_endpoint = {}
+        self._cycles = {}
+        self._lock = threading.Lock()
+        for record in records or []:
+            self.add(record)
+
+    @classmethod
+    def load(cls, directory: Path = None) -> "RecordingIndex":
+        records = []
+        for path in sorted(Path(directory or RECORDINGS_DIR).glob("*/*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    records.append(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"  Skipping recording {path}: {e}")
+        return cls(records)
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def add(self, record: dict):
+        request = record["request"]
+        endpoint = (request["method"], request["host"], request["path"])
+        self.by_key[request["key"]] = record
+        self.by_endpoint.setdefault(endpoint, []).append(record)
+        if request.get("hint"):
+            self.by_hint.setdefault(endpoint + (request["hint"],), []).append(record)
+
+    def _next(self, bucket_key, bucket: list) -> dict:
+        with self._lock:
+            if bucket_key not in self._cycles:
+                self._cycles[bucket_key] = itertools.cycle(bucket)
+            return next(self._cycles[bucket_key])
+
+    def match(self, method: str, host: str, path: str, query: str, body: bytes):
+        """Best recording for a request, or None"""
+        record = self.by_key.get(request_key(method, host, path, query, body))
+        if record is not None:
+            return record
+        endpoint = (method.upper(), host, path)
+        hint = request_hint(body)
+        if hint and endpoint + (hint,) in self.by_hint:
+            return self._next(endpoint + (hint,), self.by_hint[endpoint + (hint,)])
+        if endpoint in self.by_endpoint:
+            return self._next(endpoint, self.by_endpoint[endpoint])
+        return None
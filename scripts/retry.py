@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Retry policy - The Litmus
+Deadline-aware retries for every external call (Anthropic, CoinGecko,
+Unsplash, ElevenLabs).
+
+- exponential backoff with jitter instead of fixed sleeps
+- honours Retry-After on 429/503/529 responses
+- classifies failures: rate limits, overload, 5xx, timeouts, dropped
+  connections and unusable model output are retried; auth errors, bad
+  requests and PermanentError are not
+- carries a total time budget: a retry whose wait would overrun the
+  deadline is not attempted, and callers can size request timeouts from
+  the time remaining
+
+Usage:
+    policy = RetryPolicy("CoinGecko", max_attempts=3, budget=60)
+    data = policy.call(lambda attempt: http_client.get_json(url, timeout=policy.timeout(30)))
+"""
+
+import http.client
+import random
+import socket
+import ssl
+import time
+from datetime import datetime, timezone
+
+import http_client
+import tracing
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504, 529}
+
+
+class PermanentError(RuntimeError):
+    """A failure that no amount of retrying will fix (e.g. missing API key)"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The policy's time budget ran out before the call succeeded"""
+
+
+def retry_after_seconds(error: Exception):
+    """Seconds requested by a Retry-After header, or None"""
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = datetime.strptime(value, "%a, %d %b %Y %H:%M:%S GMT").replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except ValueError:
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Classify a failure as worth retrying"""
+    if isinstance(error, PermanentError):
+        return False
+    if isinstance(error, http_client.HTTPError):
+        return error.status in RETRYABLE_STATUS
+    if isinstance(error, (TimeoutError, ConnectionError, http.client.HTTPException, socket.gaierror, ssl.SSLError)):
+        return True
+    # Unusable model output (JSON parse failures, aborted streams, missing keys)
+    if isinstance(error, (ValueError, KeyError)):
+        return True
+    return False
+
+
+def describe(error: Exception) -> str:
+    if isinstance(error, http_client.HTTPError):
+        return f"HTTP {error.status}"
+    return f"{type(error).__name__}: {error}"
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter under a total time budget"""
+
+    def __init__(self, name: str, max_attempts: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 30.0, budget: float = None, deadline: float = None):
+        """budget is seconds from now; deadline is an absolute time.monotonic() value"""
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        if deadline is None and budget is not None:
+            deadline = time.monotonic() + budget
+        self.deadline = deadline
+        self.attempts_made = 0
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (inf if unbounded)"""
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time.monotonic()
+
+    def timeout(self, preferred: float) -> float:
+        """Request timeout that does not overrun the deadline"""
+        return max(1.0, min(preferred, self.remaining()))
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before the attempt after `attempt`: half fixed, half jitter"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def call(self, fn):
+        """Run fn(attempt) until it succeeds, fails permanently or the budget runs out"""
+        attempt = 0
+        while True:
+            attempt += 1
+            self.attempts_made = attempt
+            if self.remaining() <= 0:
+                raise DeadlineExceeded(f"{self.name}: time budget exhausted before attempt {attempt}")
+            try:
+                with tracing.span("attempt", attempt=attempt, policy=self.name):
+                    return fn(attempt)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= self.max_attempts:
+                    print(f"  {self.name} attempt {attempt} failed ({describe(e)}); giving up")
+                    raise
+
+                delay = self.backoff(attempt)
+                requested = retry_after_seconds(e)
+                if requested is not None:
+                    delay = max(delay, requested)
+
+                if delay >= self.remaining():
+                    print(f"  {self.name} attempt {attempt} failed ({describe(e)}); "
+                          f"{delay:.1f}s wait exceeds remaining budget of {self.remaining():.0f}s")
+                    raise
+
+                print(f"  {self.name} attempt {attempt} failed ({describe(e)}); retrying in {delay:.1f}s")
+                time.sleep(delay)
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Scheduler daemon - The Litmus
+One long-running process that runs every scheduled job in-process, in place
+of a cold script invocation per cron slot.
+
+Jobs (times UTC):
+- six briefs, each due at its publication slot (get_publication_timestamp's
+  region/type offsets: APAC 22:00/10:00, EMEA 06:00/18:00, Americas
+  11:00/23:00 for morning/evening)
+- week-ahead, Sunday 20:00
+- weekend magazine, Friday 23:00, and its audio, Saturday 09:00
+- capture_mood, hourly
+
+Everything a cold start pays for once per job is kept between jobs: the
+pooled HTTP connections in http_client, the market snapshot, the Unsplash
+search cache, compiled keyword patterns and imported modules.
+
+Each job starts before it is due by its lead time: the p90 of its recent
+durations (the job's root span in the trace file - "brief", "weekend",
+"audio", "capture" - whether it ran under cron or here) times
+SCHEDULER_LEAD_FACTOR plus SCHEDULER_LEAD_MARGIN, capped at
+SCHEDULER_MAX_LEAD. Jobs without enough history use a per-job default.
+
+A missed occurrence (daemon down, machine asleep, job failed) is caught up
+as soon as the daemon notices, provided it is less than
+SCHEDULER_CATCHUP_HOURS old and came due after the daemon's last recorded
+status - on a first start nothing is caught up. A run recorded in the trace
+file or an output file's generated_at (cron, a manual run) counts as done.
+A newer occurrence supersedes an older one, so a job never runs twice to
+catch up. Failed jobs are retried after SCHEDULER_RETRY_DELAY, up to
+SCHEDULER_JOB_ATTEMPTS per occurrence.
+
+Job status (next due and start time, lead, running, last outcome) is
+written to .cache/scheduler-status.json after every change:
+
+    python scripts/scheduler.py             # run the daemon
+    python scripts/scheduler.py --plan      # next start times, then exit
+    python scripts/scheduler.py --status    # print the daemon's status file
+    python scripts/scheduler.py --jobs apac-morning,capture-mood
+
+Publishing stays outside the generators: SCHEDULER_AFTER_JOB, if set, is a
+shell command run after each successful job with LITMUS_JOB set to the job
+name (e.g. a script that commits and pushes the updated content).
+
+Configuration:
+- SCHEDULER_STATUS_FILE: status location (default .cache/scheduler-status.json)
+- SCHEDULER_WORKERS: jobs that may run at once (default 3)
+- SCHEDULER_LEAD_FACTOR / SCHEDULER_LEAD_MARGIN: lead = p90 * factor + margin
+  (default 1.25 and 30s)
+- SCHEDULER_MAX_LEAD: upper bound on a lead in seconds (default 900)
+- SCHEDULER_CATCHUP_HOURS: oldest missed occurrence still caught up (default 6)
+- SCHEDULER_JOB_ATTEMPTS / SCHEDULER_RETRY_DELAY: per-occurrence attempts
+  (default 2) and the wait between them (default 300s)
+- SCHEDULER_AFTER_JOB: command run after each successful job
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import capture_mood
+import content_writer
+import generate_audio
+import generate_brief
+import generate_weekend
+import tracing
+
+SCRIPT_DIR = Path(__file__).parent
+REPO_DIR = SCRIPT_DIR.parent
+STATUS_FILE = Path(os.environ.get("SCHEDULER_STATUS_FILE", REPO_DIR / ".cache" / "scheduler-status.json"))
+
+WORKERS = int(os.environ.get("SCHEDULER_WORKERS", "3"))
+LEAD_FACTOR = float(os.environ.get("SCHEDULER_LEAD_FACTOR", "1.25"))
+LEAD_MARGIN = float(os.environ.get("SCHEDULER_LEAD_MARGIN", "30"))
+MAX_LEAD = float(os.environ.get("SCHEDULER_MAX_LEAD", "900"))
+CATCHUP_WINDOW = float(os.environ.get("SCHEDULER_CATCHUP_HOURS", "6")) * 3600
+JOB_ATTEMPTS = int(os.environ.get("SCHEDULER_JOB_ATTEMPTS", "2"))
+RETRY_DELAY = float(os.environ.get("SCHEDULER_RETRY_DELAY", "300"))
+AFTER_JOB = os.environ.get("SCHEDULER_AFTER_JOB", "")
+
+HISTORY_RUNS = 20  # Durations kept per job for the lead estimate
+HISTORY_BYTES = 4 * 1024 * 1024  # Most of the trace read back for them (newest first)
+MIN_HISTORY = 3    # Fewer durations than this and the default lead applies
+MAX_SLEEP = 60     # Re-plan at least this often (clock changes, suspend)
+
+HOUR, DAY, WEEK = 3600, 86400, 7 * 86400
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+# ============================================================================
+# JOBS
+# ============================================================================
+
+def run_brief(region: str, brief_type: str):
+    with tracing.span("brief", region=region, brief_type=brief_type, scheduled=True):
+        if brief_type == "week-ahead":
+            brief = generate_brief.generate_week_ahead()
+        else:
+            brief = generate_brief.generate_brief(region, brief_type)
+        generate_brief.save_brief(brief, region, brief_type)
+    print(f"  ✓ Complete: {brief['headline']}")
+
+
+def run_weekend():
+    with tracing.span("weekend", scheduled=True):
+        if generate_weekend.generate_weekend_magazine() is None:
+            raise RuntimeError("weekend magazine generation failed")
+
+
+def run_audio():
+    with tracing.span("audio", scheduled=True):
+        if not generate_audio.main():
+            raise RuntimeError("weekend audio generation failed")
+
+
+def run_capture():
+    with tracing.span("capture", scheduled=True):
+        if capture_mood.main():
+            raise RuntimeError("mood capture failed")
+
+
+class Job:
+    """One scheduled job: when it is due, how to run it and how its runs are traced"""
+
+    def __init__(self, name: str, run, minute: int = 0, hour: int = None, weekday: int = None,
+                 span: dict = None, default_lead: float = 300, output: Path = None):
+        self.name = name
+        self.run = run
+        self.minute = minute
+        self.hour = hour
+        self.weekday = weekday
+        self.span = span  # {"name": ..., attribute: value} identifying the job's root span
+        self.default_lead = default_lead
+        self.output = output  # JSON file whose generated_at the job updates
+        self.period = HOUR if hour is None else (DAY if weekday is None else WEEK)
+
+        self.durations = deque(maxlen=HISTORY_RUNS)
+        self.last_success_at = None  # End of the latest successful run, from the trace
+        self.last_done = None        # Latest occurrence completed by this daemon
+        self.occurrence = None       # Occurrence the attempts below refer to
+        self.attempts = 0
+        self.last_attempt_at = None
+        self.running = False
+        self.last = None             # {"due", "started", "seconds", "ok", "error"}
+        self._generated = (None, None)  # ((mtime_ns, size), generated_at) of the output file
+
+    def describe(self) -> str:
+        if self.hour is None:
+            return f"hourly at :{self.minute:02d}"
+        when = f"{self.hour:02d}:{self.minute:02d} UTC"
+        return f"daily {when}" if self.weekday is None else f"{WEEKDAYS[self.weekday]} {when}"
+
+    def latest_due(self, now: datetime) -> datetime:
+        """Most recent due time at or before now"""
+        due = now.replace(minute=self.minute, second=0, microsecond=0)
+        if self.hour is not None:
+            due = due.replace(hour=self.hour)
+        if self.weekday is not None:
+            due -= timedelta(days=(due.weekday() - self.weekday) % 7)
+        if due > now:
+            due -= timedelta(seconds=self.period)
+        return due
+
+    def lead(self) -> float:
+        """Seconds before the due time to start, from the job's recent durations"""
+        if len(self.durations) < MIN_HISTORY:
+            return min(self.default_lead, MAX_LEAD)
+        ordered = sorted(self.durations)
+        p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+        return min(p90 * LEAD_FACTOR + LEAD_MARGIN, MAX_LEAD, self.period / 2)
+
+    def target(self, now: datetime) -> datetime:
+        """Occurrence the job should be working towards now (may still be ahead of now)"""
+        return self.latest_due(now + timedelta(seconds=self.lead()))
+
+    def generated_at(self):
+        """generated_at of the job's output file, re-read only when the file changes"""
+        try:
+            stat = self.output.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except (AttributeError, OSError):
+            return None
+        if self._generated[0] != signature:
+            generated = None
+            try:
+                with open(self.output, encoding="utf-8") as f:
+                    generated = datetime.fromisoformat(json.load(f)["generated_at"])
+                # generate_weekend stamps local time without an offset
+                generated = generated if generated.tzinfo else generated.astimezone()
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            self._generated = (signature, generated)
+        return self._generated[1]
+
+    def done(self, due: datetime) -> bool:
+        if self.last_done is not None and self.last_done >= due:
+            return True
+        # A successful run recorded only in the trace or in the output file
+        # (cron, a manual run) from after this occurrence's start time covers it as well
+        start = due - timedelta(seconds=self.lead())
+        if self.last_success_at is not None and self.last_success_at >= start:
+            return True
+        generated = self.generated_at()
+        return generated is not None and generated >= start
+
+    def ready(self, now: datetime):
+        """Occurrence to run now, or None"""
+        if self.running:
+            return None
+        due = self.target(now)
+        if self.done(due) or (now - due).total_seconds() > min(CATCHUP_WINDOW, self.period):
+            return None
+        if self.occurrence == due and self.attempts:
+            if self.attempts >= JOB_ATTEMPTS or time.time() - (self.last_attempt_at or 0) < RETRY_DELAY:
+                return None
+        return due
+
+    def next_due(self, now: datetime) -> datetime:
+        due = self.target(now)
+        return due + timedelta(seconds=self.period) if self.done(due) else due
+
+    def next_start(self, now: datetime) -> datetime:
+        """Earliest time the job may become ready"""
+        if self.ready(now) is not None:
+            return now
+        due = self.target(now)
+        if not self.done(due) and self.occurrence == due and 0 < self.attempts < JOB_ATTEMPTS:
+            retry_at = datetime.fromtimestamp(self.last_attempt_at + RETRY_DELAY, timezone.utc)
+            if (retry_at - due).total_seconds() <= min(CATCHUP_WINDOW, self.period):
+                return retry_at
+        return due + timedelta(seconds=self.period - self.lead())
+
+    def matches(self, record: dict) -> bool:
+        return all(record.get(key) == value for key, value in self.span.items())
+
+
+def build_jobs() -> list:
+    jobs = []
+    for brief_type in generate_brief.BRIEF_TYPES:
+        for region in generate_brief.BRIEF_REGIONS:
+            slot = generate_brief.publication_slot(region, brief_type).astimezone(timezone.utc)
+            jobs.append(Job(f"{region}-{brief_type}", lambda r=region, t=brief_type: run_brief(r, t),
+                            minute=slot.minute, hour=slot.hour,
+                            span={"name": "brief", "region": region, "brief_type": brief_type},
+                            output=generate_brief.CONTENT_DIR / region / f"{brief_type}.json"))
+    jobs.append(Job("week-ahead", lambda: run_brief("global", "week-ahead"), hour=20, weekday=6,
+                    span={"name": "brief", "brief_type": "week-ahead"},
+                    output=generate_brief.CONTENT_DIR / "week-ahead.json"))
+    jobs.append(Job("weekend-magazine", run_weekend, hour=23, weekday=4,
+                    span={"name": "weekend"}, default_lead=600,
+                    output=REPO_DIR / "content" / "weekend" / "magazine.json"))
+    jobs.append(Job("weekend-audio", run_audio, hour=9, weekday=5,
+                    span={"name": "audio"}, default_lead=120))
+    jobs.append(Job("capture-mood", run_capture, span={"name": "capture"}, default_lead=30))
+    return sorted(jobs, key=lambda job: (job.period, job.hour or 0, job.minute))
+
+
+def load_history(jobs: list, path: Path = None):
+    """Fill each job's durations and last success from the end of the trace file
+
+    The trace is read newest first, stopping once every job has HISTORY_RUNS
+    durations or HISTORY_BYTES have been read.
+    """
+    found = {job.name: [] for job in jobs}
+    for record in tracing.tail(HISTORY_BYTES, path):
+        if record.get("outcome") != "ok":
+            continue
+        for job in jobs:
+            if job.matches(record):
+                durations = found[job.name]
+                if len(durations) < HISTORY_RUNS:
+                    durations.append(record["duration_ms"] / 1000)
+                ended = datetime.fromisoformat(record["end"])
+                if job.last_success_at is None or ended > job.last_success_at:
+                    job.last_success_at = ended
+                break
+        if all(len(durations) >= HISTORY_RUNS for durations in found.values()):
+            break
+    for job in jobs:
+        job.durations.extend(reversed(found[job.name]))
+
+
+def load_status(jobs: list, now: datetime = None):
+    """Restore per-job progress from a previous daemon's status file
+
+    Only occurrences that came due after the previous daemon's last status
+    count as missed. A job with no saved progress (a first start, a new
+    job) starts from its next occurrence: the ones before were cron's.
+    """
+    now = now or datetime.now(timezone.utc)
+    try:
+        with open(STATUS_FILE, encoding="utf-8") as f:
+            status = json.load(f)
+        saved = status.get("jobs", {})
+        since = datetime.fromisoformat(status["updated_at"])
+    except (OSError, ValueError, KeyError):
+        saved, since = {}, now
+    for job in jobs:
+        state = saved.get(job.name)
+        if not state:
+            job.last_done = job.latest_due(now)
+            continue
+        if state.get("last_done"):
+            job.last_done = datetime.fromisoformat(state["last_done"])
+        floor = job.latest_due(min(since, now))
+        if job.last_done is None or job.last_done < floor:
+            job.last_done = floor
+        if state.get("occurrence"):
+            job.occurrence = datetime.fromisoformat(state["occurrence"])
+            job.attempts = state.get("attempts", 0)
+            job.last_attempt_at = state.get("last_attempt_at")
+        job.last = state.get("last")
+
+
+# ============================================================================
+# DAEMON
+# ============================================================================
+
+class Scheduler:
+    def __init__(self, jobs: list, workers: int = WORKERS):
+        self.jobs = jobs
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self.stop = threading.Event()
+        self.wake = threading.Event()
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+
+    def status(self) -> dict:
+        now = datetime.now(timezone.utc)
+        jobs = {}
+        for job in self.jobs:
+            jobs[job.name] = {
+                "schedule": job.describe(),
+                "lead_s": round(job.lead(), 1),
+                "history_runs": len(job.durations),
+                "next_due": job.next_due(now).isoformat(),
+                "next_start": job.next_start(now).isoformat(),
+                "running": job.running,
+                "last_done": job.last_done.isoformat() if job.last_done else None,
+                "occurrence": job.occurrence.isoformat() if job.occurrence else None,
+                "attempts": job.attempts,
+                "last_attempt_at": job.last_attempt_at,
+                "last": job.last,
+            }
+        return {"pid": os.getpid(), "started_at": self.started_at.isoformat(), "updated_at": now.isoformat(),
+                "jobs": jobs}
+
+    def write_status(self):
+        try:
+            with self._lock:
+                payload = json.dumps(self.status(), indent=2, ensure_ascii=False).encode("utf-8")
+                content_writer.atomic_write(STATUS_FILE, payload)
+        except OSError as e:
+            print(f"  Warning: Could not write scheduler status: {e}")
+
+    def execute(self, job: Job, due: datetime):
+        started = time.monotonic()
+        late = (datetime.now(timezone.utc) - due).total_seconds()
+        print(f"\n[{datetime.now(timezone.utc).isoformat()}] {job.name}: due {due.isoformat()} "
+              f"({'catch-up, ' if late > 0 else ''}{abs(late):.0f}s {'late' if late > 0 else 'early'}, "
+              f"attempt {job.attempts})")
+        error = None
+        try:
+            job.run()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:300]
+        seconds = round(time.monotonic() - started, 1)
+
+        with self._lock:
+            job.running = False
+            job.last = {"due": due.isoformat(), "started": datetime.fromtimestamp(job.last_attempt_at, timezone.utc).isoformat(),
+                        "seconds": seconds, "ok": error is None, "error": error}
+            if error is None:
+                job.durations.append(seconds)
+                job.last_done = due
+        if error is None:
+            print(f"  {job.name}: done in {seconds}s (next lead {job.lead():.0f}s)")
+            self.after_job(job)
+        else:
+            print(f"  {job.name}: failed after {seconds}s - {error}")
+        self.write_status()
+        self.wake.set()
+
+    def after_job(self, job: Job):
+        if not AFTER_JOB:
+            return
+        with tracing.span("after_job", job=job.name) as span:
+            result = subprocess.run(AFTER_JOB, shell=True, cwd=REPO_DIR, env={**os.environ, "LITMUS_JOB": job.name})
+            span.set(returncode=result.returncode)
+        if result.returncode:
+            print(f"  {job.name}: after-job command exited {result.returncode}")
+
+    def tick(self) -> float:
+        """Start every ready job; return seconds until the next may be ready"""
+        now = datetime.now(timezone.utc)
+        started = False
+        with self._lock:
+            for job in self.jobs:
+                due = job.ready(now)
+                if due is None:
+                    continue
+                if job.occurrence != due:
+                    job.occurrence, job.attempts = due, 0
+                job.attempts += 1
+                job.last_attempt_at = time.time()
+                job.running = True
+                self.pool.submit(self.execute, job, due)
+                started = True
+            upcoming = min((job.next_start(now) for job in self.jobs if not job.running), default=None)
+        if started:
+            self.write_status()
+        if upcoming is None:
+            return MAX_SLEEP
+        return min(max((upcoming - now).total_seconds(), 1), MAX_SLEEP)
+
+    def run(self):
+        print(f"[{self.started_at.isoformat()}] Scheduler started (pid {os.getpid()}, {len(self.jobs)} jobs, "
+              f"{self.pool._max_workers} workers)", flush=True)
+        self.write_status()
+        while not self.stop.is_set():
+            delay = self.tick()
+            self.wake.wait(delay)
+            self.wake.clear()
+        print("  Stopping: waiting for running jobs to finish", flush=True)
+        self.pool.shutdown(wait=True)
+        self.write_status()
+
+    def request_stop(self, *_):
+        self.stop.set()
+        self.wake.set()
+
+
+def print_plan(jobs: list):
+    now = datetime.now(timezone.utc)
+    print(f"  {'job':<18} {'schedule':<20} {'lead':>7} {'runs':>5}  next start (UTC)")
+    for job in jobs:
+        due = job.ready(now)
+        start = "now (catch-up)" if due is not None else job.next_start(now).strftime("%a %Y-%m-%d %H:%M:%S")
+        print(f"  {job.name:<18} {job.describe():<20} {job.lead():>6.0f}s {len(job.durations):>5}  {start}")
+
+
+def print_status() -> int:
+    try:
+        with open(STATUS_FILE, encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"No scheduler status: {e}")
+        return 1
+    print(f"Scheduler pid {status['pid']}, started {status['started_at']}, updated {status['updated_at']}")
+    for name, job in status["jobs"].items():
+        last = job.get("last") or {}
+        outcome = "running" if job["running"] else ("-" if not last else ("ok" if last["ok"] else f"failed: {last['error']}"))
+        print(f"  {name:<18} next start {job['next_start'][:19]}  lead {job['lead_s']:>5.0f}s  last {outcome}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scheduled Litmus jobs in one long-running process")
+    parser.add_argument("--jobs", help="comma-separated job names (default: all)")
+    parser.add_argument("--plan", action="store_true", help="show next start times and exit")
+    parser.add_argument("--status", action="store_true", help="print the running daemon's status and exit")
+    opts = parser.parse_args()
+
+    if opts.status:
+        return print_status()
+
+    jobs = build_jobs()
+    if opts.jobs:
+        names = [name.strip() for name in opts.jobs.split(",") if name.strip()]
+        unknown = sorted(set(names) - {job.name for job in jobs})
+        if unknown:
+            print(f"Unknown jobs: {', '.join(unknown)} (choose from {', '.join(job.name for job in jobs)})")
+            return 1
+        jobs = [job for job in jobs if job.name in names]
+
+    load_history(jobs)
+    load_status(jobs)
+    if opts.plan:
+        print_plan(jobs)
+        return 0
+
+    # generate_weekend and generate_audio write relative to the working directory
+    os.chdir(REPO_DIR)
+    scheduler = Scheduler(jobs)
+    signal.signal(signal.SIGTERM, scheduler.request_stop)
+    signal.signal(signal.SIGINT, scheduler.request_stop)
+    print_plan(jobs)
+    scheduler.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
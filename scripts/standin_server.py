@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Stand-in server - The Litmus
+Local HTTP stand-in for CoinGecko, Anthropic, Unsplash and ElevenLabs, for
+load and soak tests of every generator on an offline box.
+
+With LITMUS_TRANSPORT=replay the shared http_client sends each request to
+this server as /<host>/<path>. Responses come from recordings captured with
+LITMUS_TRANSPORT=record (see recordings.py); requests with no recording fall
+back to the bundled fixtures the offline benchmark uses
+(fixtures/pipeline_responses.json), so a fresh checkout works too.
+Anthropic responses are served streamed (SSE) or buffered to match the
+request, whichever way they were recorded.
+
+Run:
+    python scripts/standin_server.py [--port 8750] [--recordings .cache/recordings]
+        [--latency anthropic=1.5,coingecko=0.25] [--recorded-latency]
+        [--failure-rate 0.05] [--retry-after 0] [--seed 7]
+
+    LITMUS_TRANSPORT=replay ANTHROPIC_API_KEY=x UNSPLASH_ACCESS_KEY=x \\
+        python scripts/generate_brief.py --all
+
+Latency is added per service (spread across the lines of a stream);
+--recorded-latency uses each recording's own elapsed time instead. Failures
+are injected as HTTP 529 (Anthropic) or 503 (everything else) with a
+Retry-After header, which the retry policy handles as in production.
+
+Programmable while running:
+    GET  /__standin/stats    calls, injected failures and misses per service
+    GET  /__standin/config
+    POST /__standin/config   {"latency": {"anthropic": 3.0}, "failure_rate": 0.2, "retry_after": 1}
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import recordings
+
+SCRIPT_DIR = Path(__file__).parent
+FIXTURES = SCRIPT_DIR / "fixtures" / "pipeline_responses.json"
+DEFAULT_PORT = 8750
+
+SERVICES = {
+    "api.coingecko.com": "coingecko",
+    "api.anthropic.com": "anthropic",
+    "api.unsplash.com": "unsplash",
+    "api.elevenlabs.io": "elevenlabs",
+}
+ERROR_STATUS = {"anthropic": (529, "Overloaded")}
+DEFAULT_ERROR = (503, "Service Unavailable")
+
+# Which recorded model output a prompt gets when serving from fixtures
+FIXTURE_MARKERS = [
+    ("Weekend Magazine", "weekend"),
+    ("senior strategist", "week-ahead"),
+    ("writing the evening brief", "evening"),
+]
+STREAM_CHUNK_CHARS = 64
+FIXTURE_AUDIO_BYTES = 256 * 1024
+
+
+def sse_lines(text: str, input_tokens: int = 2400) -> list:
+    """Messages API SSE events streaming text in small deltas"""
+    def event(payload):
+        return [f"event: {payload['type']}", f"data: {json.dumps(payload)}", ""]
+
+    lines = event({"type": "message_start", "message": {"usage": {"input_tokens": input_tokens}}})
+    for start in range(0, len(text), STREAM_CHUNK_CHARS):
+        lines += event({"type": "content_block_delta", "index": 0,
+                        "delta": {"type": "text_delta", "text": text[start:start + STREAM_CHUNK_CHARS]}})
+    lines += event({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                    "usage": {"output_tokens": len(text) // 4}})
+    lines += event({"type": "message_stop"})
+    return lines
+
+
+def message_body(text: str, input_tokens: int = 2400) -> bytes:
+    """Buffered Messages API response for text"""
+    return json.dumps({"content": [{"type": "text", "text": text}], "stop_reason": "end_turn",
+                       "usage": {"input_tokens": input_tokens, "output_tokens": len(text) // 4}}).encode()
+
+
+def markets_page(coins: list, query: str) -> list:
+    """One /coins/markets page; ranks past the fixture repeat it as smaller, renamed coins"""
+    params = dict(parse_qsl(query))
+    per_page = int(params.get("per_page", len(coins)))
+    page = int(params.get("page", 1))
+    result = []
+    for rank in range((page - 1) * per_page, page * per_page):
+        coin = dict(coins[rank % len(coins)])
+        cycle = rank // len(coins)
+        if cycle:
+            coin.update(id=f"{coin['id']}-{cycle}", market_cap_rank=rank + 1,
+                        market_cap=(coin.get("market_cap") or 0) / 10 ** cycle)
+        result.append(coin)
+    return result
+
+
+def market_chart_range(coins: list, coin: str, query: str) -> dict:
+    """/coins/{id}/market_chart/range as a deterministic hourly random walk around the fixture's price"""
+    params = dict(parse_qsl(query))
+    start, end = int(float(params.get("from", 0))), int(float(params.get("to", 0)))
+    base = next((c for c in coins if c["id"] == coin.rsplit("-", 1)[0] or c["id"] == coin), coins[0])
+    price = base.get("current_price") or 1.0
+    supply = (base.get("market_cap") or price) / price
+    volume = base.get("total_volume") or 0
+    series = {"prices": [], "market_caps": [], "total_volumes": []}
+    for ts in range(start // 3600 * 3600, end + 1, 3600):
+        # Seeded per coin and hour, so overlapping ranges agree
+        rng = random.Random(f"{coin}:{ts}")
+        walk = price * (1 + 0.1 * math.sin(ts / 86400 / 7 + len(coin)) + 0.02 * rng.uniform(-1, 1))
+        series["prices"].append([ts * 1000, walk])
+        series["market_caps"].append([ts * 1000, walk * supply])
+        series["total_volumes"].append([ts * 1000, volume * rng.uniform(0.5, 1.5)])
+    return series
+
+
+def recorded_text(record: dict) -> str:
+    """Model output of a recorded Anthropic response, streamed or buffered"""
+    response = record["response"]
+    if "lines" in response:
+        chunks = []
+        for line in response["lines"]:
+            if line.startswith("data:"):
+                event = json.loads(line[5:].strip())
+                if event.get("type") == "content_block_delta":
+                    chunks.append(event.get("delta", {}).get("text", ""))
+        return "".join(chunks)
+    return json.loads(response.get("body") or "{}").get("content", [{}])[0].get("text", "")
+
+
+class StandIn:
+    """Response source and runtime configuration shared by all handler threads"""
+
+    def __init__(self, index: recordings.RecordingIndex, fixtures: dict, latency: dict,
+                 failure_rate: float = 0.0, retry_after: float = 0.0, recorded_latency: bool = False,
+                 seed: int = None):
+        self.index = index
+        self.fixtures = fixtures
+        self.config = {"latency": dict(latency), "failure_rate": failure_rate,
+                       "retry_after": retry_after, "recorded_latency": recorded_latency}
+        self.stats = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._audio = random.Random(seed).randbytes(FIXTURE_AUDIO_BYTES)
+
+    def count(self, service: str, field: str):
+        with self._lock:
+            entry = self.stats.setdefault(service, {"calls": 0, "failures_injected": 0, "misses": 0})
+            entry[field] += 1
+
+    def configure(self, changes: dict) -> dict:
+        with self._lock:
+            for key, value in changes.items():
+                if key not in self.config:
+                    raise ValueError(f"Unknown setting {key!r}")
+                if key == "latency":
+                    self.config["latency"].update({k: float(v) for k, v in value.items()})
+                elif key == "recorded_latency":
+                    self.config[key] = bool(value)
+                else:
+                    self.config[key] = float(value)
+            return json.loads(json.dumps(self.config))
+
+    def inject_failure(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.config["failure_rate"]
+
+    def latency(self, service: str, record: dict = None) -> float:
+        if self.config["recorded_latency"] and record and record.get("elapsed_s") is not None:
+            return record["elapsed_s"]
+        return self.config["latency"].get(service, 0.0)
+
+    def anthropic_text(self, record: dict, body: bytes) -> str:
+        if record is not None:
+            return recorded_text(record)
+        prompt = body.decode("utf-8", "replace")
+        fixture = next((name for marker, name in FIXTURE_MARKERS if marker in prompt), "morning")
+        return self.fixtures["anthropic"][fixture]
+
+    def fixture_content(self, service: str, path: str, query: str = ""):
+        """(content_type, bytes) from the bundled fixtures, or None"""
+        if service == "coingecko" and path.endswith("/global"):
+            data = self.fixtures["coingecko"]["global"]
+        elif service == "coingecko" and path.endswith("/market_chart/range"):
+            data = market_chart_range(self.fixtures["coingecko"]["markets"], path.split("/")[-3], query)
+        elif service == "coingecko":
+            data = markets_page(self.fixtures["coingecko"]["markets"], query)
+        elif service == "unsplash":
+            data = self.fixtures["unsplash"]["search"]
+        elif service == "elevenlabs":
+            return "audio/mpeg", self._audio
+        else:
+            return None
+        return "application/json", json.dumps(data).encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "LitmusStandIn/1.0"
+    standin = None  # set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def send_body(self, status: int, reason: str, content_type: str, body: bytes, headers: dict = None):
+        self.send_response(status, reason)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, data):
+        self.send_body(status, "OK" if status == 200 else "Error", "application/json", json.dumps(data).encode())
+
+    def send_stream(self, lines: list, delay_per_line: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for line in lines:
+                if delay_per_line and line.startswith("data:"):
+                    time.sleep(delay_per_line)
+                self.wfile.write(line.encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client cancelled or aborted the stream
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        parts = urlsplit(self.path)
+
+        if parts.path.startswith("/__standin/"):
+            return self.handle_control(parts.path, body)
+
+        host, _, rest = parts.path.lstrip("/").partition("/")
+        path = "/" + rest
+        service = SERVICES.get(host, host)
+        standin = self.standin
+        standin.count(service, "calls")
+
+        record = standin.index.match(self.command, host, path, parts.query, body)
+
+        if standin.inject_failure():
+            standin.count(service, "failures_injected")
+            time.sleep(min(standin.latency(service, record), 0.2))
+            status, reason = ERROR_STATUS.get(service, DEFAULT_ERROR)
+            error = {"type": "error", "error": {"type": "overloaded_error", "message": "Injected failure"}}
+            return self.send_body(status, reason, "application/json", json.dumps(error).encode(),
+                                  {"Retry-After": f"{standin.config['retry_after']:g}"})
+
+        latency = standin.latency(service, record)
+        if service == "anthropic":
+            text = standin.anthropic_text(record, body)
+            if recordings.is_stream_request(body):
+                lines = sse_lines(text)
+                deltas = sum(1 for line in lines if line.startswith("data:"))
+                return self.send_stream(lines, latency / max(deltas, 1))
+            time.sleep(latency)
+            return self.send_body(200, "OK", "application/json", message_body(text))
+
+        if record is not None:
+            time.sleep(latency)
+            response = record["response"]
+            headers = dict(response.get("headers", {}))
+            content_type = headers.pop("content-type", "application/json")
+            return self.send_body(response["status"], response.get("reason", "OK"), content_type,
+                                  recordings.response_body(record), headers)
+
+        fixture = standin.fixture_content(service, path, parts.query)
+        if fixture is None:
+            standin.count(service, "misses")
+            return self.send_json(404, {"error": f"No recording or fixture for {self.command} {host}{path}"})
+        time.sleep(latency)
+        return self.send_body(200, "OK", *fixture)
+
+    def handle_control(self, path: str, body: bytes):
+        standin = self.standin
+        if path == "/__standin/stats":
+            return self.send_json(200, {"stats": standin.stats, "recordings": len(standin.index)})
+        if path == "/__standin/config":
+            if self.command == "POST":
+                try:
+                    return self.send_json(200, standin.configure(json.loads(body or b"{}")))
+                except (ValueError, TypeError, AttributeError) as e:
+                    return self.send_json(400, {"error": str(e)})
+            return self.send_json(200, standin.config)
+        return self.send_json(404, {"error": f"Unknown control endpoint {path}"})
+
+
+def serve(standin: StandIn, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Start the stand-in on a background thread; returns the server (call shutdown() to stop)"""
+    handler = type("BoundStandInHandler", (StandInHandler,), {"standin": standin})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="standin").start()
+    return server
+
+
+def parse_latency(value: str) -> dict:
+    latency = {}
+    for item in filter(None, (value or "").split(",")):
+        service, _, seconds = item.partition("=")
+        latency[service.strip()] = float(seconds)
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the external APIs (LITMUS_TRANSPORT=replay)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--recordings", default=str(recordings.RECORDINGS_DIR))
+    parser.add_argument("--fixtures", default=str(FIXTURES))
+    parser.add_argument("--latency", default="", help="per-service seconds, e.g. anthropic=1.5,coingecko=0.25")
+    parser.add_argument("--recorded-latency", action="store_true", help="replay each recording's own elapsed time")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    opts = parser.parse_args()
+
+    index = recordings.RecordingIndex.load(Path(opts.recordings))
+    with open(opts.fixtures, encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    standin = StandIn(index, fixtures, parse_latency(opts.latency), opts.failure_rate,
+                      opts.retry_after, opts.recorded_latency, opts.seed)
+    server = serve(standin, opts.host, opts.port)
+    print(f"Stand-in listening on http://{opts.host}:{opts.port} "
+          f"({len(index)} recordings from {opts.recordings}, fixtures fallback)", flush=True)
+    print(f"  Run generators with LITMUS_TRANSPORT=replay LITMUS_STANDIN_URL=http://{opts.host}:{opts.port}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(f"\nStats: {json.dumps(standin.stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Tracing - The Litmus
+Lightweight per-stage spans appended to a JSONL trace file.
+
+Every generator run records its stages (market fetch, prompt build, LLM
+call, JSON parse, image lookup, save, TTS) as spans, so a late brief can be
+traced to the stage that ate the publication deadline:
+
+    with tracing.span("llm_call", attempt=attempt, bytes_out=len(prompt)) as s:
+        text = ...
+        s.set(bytes_in=len(text))
+
+Each line of the trace file is one finished span:
+    {"run", "script", "span", "parent", "name", "start", "end", "duration_ms",
+     "attempt", "bytes_in", "bytes_out", "outcome", "error", ...attributes}
+
+Spans nest per thread (batch jobs each get their own tree); children
+inherit their parent's attempt number. The run id ties together every span
+written by one process.
+
+Long-running writers (the scheduler daemon, capture_mood --watch) would grow
+the file forever, so once it reaches LITMUS_TRACE_MAX_MB it is renamed to
+trace.jsonl.1 (replacing the previous one) and a new file is started.
+tail() reads both newest first, stopping wherever the caller has enough.
+
+Show the latest runs as span trees: python scripts/tracing.py [--runs 3]
+
+Configuration:
+- LITMUS_TRACE_FILE: trace location (default .cache/trace.jsonl)
+- LITMUS_TRACE_MAX_MB: size at which the file is rotated (default 10)
+- LITMUS_TRACE=0 disables tracing
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = SCRIPT_DIR.parent / ".cache"
+TRACE_FILE = Path(os.environ.get("LITMUS_TRACE_FILE", CACHE_DIR / "trace.jsonl"))
+TRACE_ENABLED = os.environ.get("LITMUS_TRACE", "1") != "0"
+TRACE_MAX_BYTES = int(float(os.environ.get("LITMUS_TRACE_MAX_MB", "10")) * 1024 * 1024)
+
+TAIL_BLOCK = 64 * 1024
+
+RUN_ID = uuid.uuid4().hex[:12]
+SCRIPT = Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "python"
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+class Span:
+    """One timed stage; use via tracing.span()"""
+
+    def __init__(self, name: str, attempt: int = None, **attributes):
+        parent = _stack()[-1] if _stack() else None
+        self.name = name
+        self.id = uuid.uuid4().hex[:8]
+        self.parent = parent.id if parent else None
+        self.attempt = attempt if attempt is not None else (parent.attempt if parent else None)
+        self.attributes = attributes
+        self.outcome = None
+        self.error = None
+
+    def set(self, **attributes):
+        """Attach attributes (bytes_in, bytes_out, outcome, anything else) before the span ends"""
+        if "outcome" in attributes:
+            self.outcome = attributes.pop("outcome")
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc is not None:
+            self.outcome = "error"
+            self.error = f"{exc_type.__name__}: {exc}"[:300]
+        record = {
+            "run": RUN_ID,
+            "script": SCRIPT,
+            "span": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "start": self.started_at.isoformat(),
+            "end": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration * 1000, 1),
+            "attempt": self.attempt,
+            "bytes_in": self.attributes.pop("bytes_in", None),
+            "bytes_out": self.attributes.pop("bytes_out", None),
+            "outcome": self.outcome or "ok",
+            "error": self.error,
+            **self.attributes
+        }
+        write(record)
+        return False
+
+
+class _NoopSpan:
+    attempt = None
+
+    def set(self, **attributes):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, attempt: int = None, **attributes):
+    """Context manager timing one stage; exceptions mark it outcome=error and propagate"""
+    if not TRACE_ENABLED:
+        return _NOOP
+    return Span(name, attempt, **attributes)
+
+
+def current():
+    """Innermost open span on this thread (a no-op span if none)"""
+    stack = _stack() if TRACE_ENABLED else []
+    return stack[-1] if stack else _NOOP
+
+
+@contextlib.contextmanager
+def adopt(parent):
+    """Nest spans opened on this thread under a span owned by another thread
+
+    Worker threads (hedged requests) start with an empty stack; adopting the
+    caller's span keeps their spans in the caller's tree.
+    """
+    stack = _stack() if TRACE_ENABLED and isinstance(parent, Span) else None
+    if stack is None:
+        yield
+        return
+    stack.append(parent)
+    try:
+        yield
+    finally:
+        if stack and stack[-1] is parent:
+            stack.pop()
+
+
+def rotated(path: Path) -> Path:
+    """trace.jsonl -> trace.jsonl.1"""
+    return path.with_name(path.name + ".1")
+
+
+def write(record: dict):
+    """Append one span as a JSON line; tracing must never break a run"""
+    line = json.dumps(record, default=str) + "\n"
+    try:
+        with _write_lock:
+            TRACE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                if TRACE_FILE.stat().st_size >= TRACE_MAX_BYTES:
+                    os.replace(TRACE_FILE, rotated(TRACE_FILE))
+            except FileNotFoundError:
+                pass
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        print(f"  Warning: Could not write trace: {e}")
+
+
+def tail(max_bytes: int, path: Path = None):
+    """Span records newest first from the end of the trace, then its rotated file
+
+    Reads backwards in blocks and stops after max_bytes, so the cost depends
+    on how much history the caller wants, not on the size of the file.
+    """
+    path = Path(path or TRACE_FILE)
+    for candidate in (path, rotated(path)):
+        if max_bytes <= 0:
+            return
+        try:
+            f = open(candidate, "rb")
+        except OSError:
+            continue
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            start = max(0, end - max_bytes)
+            max_bytes -= end - start
+            pos, rest = end, b""
+            while pos > start:
+                size = min(TAIL_BLOCK, pos - start)
+                pos -= size
+                f.seek(pos)
+                lines = (f.read(size) + rest).split(b"\n")
+                # The first piece may be cut off; it is completed by the next block
+                rest = lines.pop(0)
+                for line in reversed(lines):
+                    record = _parse(line)
+                    if record is not None:
+                        yield record
+            if start == 0:
+                record = _parse(rest)
+                if record is not None:
+                    yield record
+
+
+def _parse(line: bytes):
+    try:
+        return json.loads(line) if line.strip() else None
+    except ValueError:
+        return None
+
+
+# ============================================================================
+# READER - python scripts/tracing.py [--runs N] [--file trace.jsonl]
+# ============================================================================
+
+def load_runs(path: Path) -> dict:
+    """{run_id: [span records]} in file order"""
+    runs = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            runs.setdefault(record.get("run"), []).append(record)
+    return runs
+
+
+def print_run(spans: list):
+    """Span tree of one run, children under their parent, in start order"""
+    children = {}
+    for record in sorted(spans, key=lambda r: r["start"]):
+        children.setdefault(record["parent"], []).append(record)
+    ids = {record["span"] for record in spans}
+
+    def show(record, depth):
+        attempt = f" #{record['attempt']}" if record.get("attempt") else ""
+        size = ""
+        if record.get("bytes_in") or record.get("bytes_out"):
+            size = f"  in {record.get('bytes_in') or 0}B out {record.get('bytes_out') or 0}B"
+        outcome = "" if record["outcome"] == "ok" else f"  [{record['outcome']}] {record.get('error') or ''}"
+        label = f"{'  ' * depth}{record['name']}{attempt}"
+        print(f"  {label:<34} {record['duration_ms']:>10.1f}ms{size}{outcome}")
+        for child in children.get(record["span"], []):
+            show(child, depth + 1)
+
+    # Roots, plus orphans whose parent never finished (e.g. the process died)
+    for record in sorted(spans, key=lambda r: r["start"]):
+        if record["parent"] is None or record["parent"] not in ids:
+            show(record, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show recent runs from the trace file")
+    parser.add_argument("--runs", type=int, default=1, help="how many recent runs to show")
+    parser.add_argument("--file", default=str(TRACE_FILE))
+    opts = parser.parse_args()
+
+    try:
+        runs = load_runs(Path(opts.file))
+    except OSError as e:
+        print(f"Could not read trace: {e}")
+        return 1
+
+    for run_id, spans in list(runs.items())[-opts.runs:]:
+        started = min(r["start"] for r in spans)
+        print(f"\nrun {run_id} ({spans[0].get('script')}) started {started}")
+        print_run(spans)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Unsplash search cache - The Litmus
+On-disk cache of Unsplash search results shared by every generator.
+
+Brief keywords repeat constantly ("Canary Wharf bright", "Marina Bay dawn"),
+so each normalized query is searched once and its top results are kept.
+The weighted random pick then happens over the cached pool, which keeps
+variety without a live request per brief - Unsplash's 50 req/h demo limit
+and its slow responses stay off the critical path.
+
+- entries expire after UNSPLASH_CACHE_TTL seconds (default 7 days); empty
+  result sets are remembered for a day so dead queries are not re-searched
+- the file is bounded to UNSPLASH_CACHE_SIZE queries, least recently used
+  evicted first
+- if a refresh fails, the expired entry is served instead
+- with no UNSPLASH_ACCESS_KEY, cached entries are still used
+
+Configuration:
+- UNSPLASH_CACHE_FILE: cache location (default .cache/unsplash-search.json)
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+import http_client
+import retry
+
+UNSPLASH_ACCESS_KEY = os.environ.get("UNSPLASH_ACCESS_KEY", "")
+UNSPLASH_API_URL = "https://api.unsplash.com/search/photos"
+RESULTS_PER_QUERY = 10
+
+# Paths
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = SCRIPT_DIR.parent / ".cache"
+CACHE_FILE = Path(os.environ.get("UNSPLASH_CACHE_FILE", CACHE_DIR / "unsplash-search.json"))
+
+CACHE_TTL = int(os.environ.get("UNSPLASH_CACHE_TTL", str(7 * 24 * 3600)))
+EMPTY_RESULT_TTL = 24 * 3600
+CACHE_SIZE = int(os.environ.get("UNSPLASH_CACHE_SIZE", "300"))
+SEARCH_BUDGET = 30  # Seconds per live search, retries included
+
+# Earlier results rank higher - weight the pick toward them
+PICK_WEIGHTS = [3, 3, 2, 2, 1, 1, 1, 1, 1, 1]
+
+# Serialises read-modify-write of the cache file when briefs run in parallel
+_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Cache key: lowercase, single-spaced"""
+    return " ".join(query.lower().split())
+
+
+def load_cache() -> dict:
+    """Load {query: entry} from disk, or {} if missing/corrupt"""
+    try:
+        with open(CACHE_FILE, "r") as f:
+            cache = json.load(f)
+        if isinstance(cache.get("queries"), dict):
+            return cache["queries"]
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return {}
+
+
+def save_cache(queries: dict):
+    """Evict least recently used entries beyond CACHE_SIZE and write atomically"""
+    if len(queries) > CACHE_SIZE:
+        by_use = sorted(queries, key=lambda q: queries[q].get("used_ts", 0))
+        for query in by_use[:len(queries) - CACHE_SIZE]:
+            del queries[query]
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_file, "w") as f:
+        json.dump({"queries": queries}, f)
+    os.replace(tmp_file, CACHE_FILE)
+
+
+def is_fresh(entry: dict) -> bool:
+    ttl = CACHE_TTL if entry.get("results") else EMPTY_RESULT_TTL
+    return time.time() - entry.get("fetched_ts", 0) <= ttl
+
+
+def slim_result(photo: dict) -> dict:
+    """Keep only what image selection needs from an Unsplash photo"""
+    return {
+        "id": photo.get("id"),
+        "raw": (photo.get("urls") or {}).get("raw", ""),
+        "description": photo.get("description") or photo.get("alt_description") or ""
+    }
+
+
+def fetch_results(query: str, content_filter: bool = True) -> list:
+    """Live Unsplash search, returning slimmed results"""
+    params = {
+        "query": query,
+        "per_page": RESULTS_PER_QUERY,
+        "orientation": "landscape"
+    }
+    if content_filter:
+        params["content_filter"] = "high"
+    headers = {"Authorization": f"Client-ID {UNSPLASH_ACCESS_KEY}"}
+
+    policy = retry.RetryPolicy("Unsplash", max_attempts=2, budget=SEARCH_BUDGET)
+    data = policy.call(lambda _: http_client.get_json(
+        UNSPLASH_API_URL, params=params, headers=headers, timeout=policy.timeout(15)))
+    return [slim_result(photo) for photo in data.get("results", []) if (photo.get("urls") or {}).get("raw")]
+
+
+def search(query: str, content_filter: bool = True) -> list:
+    """Search results for query, served from the cache when fresh"""
+    key = normalize_query(query)
+    if not content_filter:
+        key = f"{key} [unfiltered]"
+
+    with _lock:
+        queries = load_cache()
+        entry = queries.get(key)
+
+        if entry and (is_fresh(entry) or not UNSPLASH_ACCESS_KEY):
+            print(f"  Unsplash cache hit: '{query}' ({len(entry['results'])} results)")
+        elif not UNSPLASH_ACCESS_KEY:
+            print("  Warning: UNSPLASH_ACCESS_KEY not set and query not cached")
+            return []
+        else:
+            try:
+                entry = {"fetched_ts": time.time(), "results": fetch_results(query, content_filter)}
+            except Exception as e:
+                if not entry:
+                    raise
+                print(f"  Unsplash search failed ({e}), using cached results from "
+                      f"{(time.time() - entry.get('fetched_ts', 0)) / 3600:.0f}h ago")
+
+        entry["used_ts"] = time.time()
+        queries[key] = entry
+        try:
+            save_cache(queries)
+        except OSError as e:
+            print(f"  Warning: Could not save Unsplash cache: {e}")
+        return entry["results"]
+
+
+def pick_result(results: list) -> dict:
+    """Weighted random pick over the pool, favouring the top results"""
+    if not results:
+        return None
+    if len(results) >= 5:
+        return random.choices(results, weights=PICK_WEIGHTS[:len(results)], k=1)[0]
+    return random.choice(results)
+
+
+def image_url(result: dict) -> str:
+    """Sized hero image URL for a cached result"""
+    return f"{result['raw']}&w=1400&h=500&fit=crop&q=80"
+
+
+def find_image(query: str, broad_query: str = None) -> str:
+    """Hero image URL for query (then broad_query if no results), or None"""
+    results = search(query)
+    if not results and broad_query:
+        print(f"  No Unsplash results for: {query}")
+        print(f"  Retrying with broader search: '{broad_query}'")
+        results = search(broad_query, content_filter=False)
+    if not results:
+        return None
+
+    print(f"  Found {len(results)} images")
+    selected = pick_result(results)
+    print(f"  Selected: {(selected['description'] or 'No description')[:60]}...")
+    return image_url(selected)
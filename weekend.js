@@ -527,16 +527,12 @@ function renderMarketMoodFromMagazine(moodData) {
         setText('breadth-value-weekend', `${Math.round(current.breadth)}% of coins are green`);
     }
     
-    // M/V range for mapping (volume_ratio is typically 30-60)
-    const mvRange = { low: 30, high: 60 };
-    
     // Map coordinates
     const mapX = (b) => (b / 100) * 100;
-    const mapY = (mv) => {
-        // Lower M/V = more activity = frenzied = top
-        // Higher M/V = less activity = quiet = bottom
-        const normalized = (mv - mvRange.low) / (mvRange.high - mvRange.low);
-        return Math.max(0, Math.min(100, normalized * 100));
+    const mapY = (activity) => {
+        // volume_ratio is activity on 0-100 (generate_weekend.py maps M/V onto it)
+        // High activity = frenzied = top, low activity = quiet = bottom
+        return Math.max(0, Math.min(100, 100 - activity));
     };
     
     // Position teal dot (current position)